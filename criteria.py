@@ -5,14 +5,16 @@
 
 import abc
 import collections
+import concurrent.futures
 import itertools
 import math
+import os
 
-import cvxpy as cvx
 import numpy as np
 import scipy
 
 import chol
+import sdp
 
 
 #: Minimum gain allowed for Local Search methods to continue searching.
@@ -21,6 +23,28 @@ EPSILON = 0.000001
 #: Maximum rank allowed for sigma_j matrices in Conditional Inferente Tree framework
 BIG_CONTINGENCY_TABLE_THRESHOLD = 200
 
+#: How `select_best_attribute_and_split` evaluates the attributes of a node: one at a time (`None`)
+#: or concurrently in a pool of threads (`'thread'`, for criteria whose work is done by NumPy or by
+#: solvers, which release the GIL).
+ATTRIBUTES_EXECUTOR = None
+#: Number of workers used by `ATTRIBUTES_EXECUTOR`. When `None`, uses the number of CPUs.
+ATTRIBUTES_EXECUTOR_NUM_WORKERS = None
+
+#: Solver of the SDP relaxation used by the GW criteria: `'cvxpy'` (SCS, through cvxpy) or
+#: `'low-rank'` (coordinate descent on a low-rank factor, in NumPy).
+SDP_SOLVER = 'cvxpy'
+#: SDP solver of each GW criterion, by criterion name, overriding `SDP_SOLVER`.
+SDP_SOLVER_PER_CRITERION = {}
+#: Tolerance of the SDP solver used by the GW criteria. When `None`, uses the solver's default.
+#: Larger values trade the precision of the relaxation for speed.
+SDP_SOLVER_EPS = None
+#: Maximum number of iterations of the SDP solver used by the GW criteria. When `None`, uses the
+#: solver's default.
+SDP_SOLVER_MAX_ITERS = None
+#: Maximum time, in seconds, spent by the SDP solver on each attribute by the GW criteria. When
+#: `None`, there is no limit.
+SDP_SOLVER_TIME_LIMIT = None
+
 #: Contains the information about a given split. When empty, defaults to
 #: `(None, [], float('-inf'))`.
 Split = collections.namedtuple('Split',
@@ -29,6 +53,185 @@ Split = collections.namedtuple('Split',
                                 'criterion_value'])
 Split.__new__.__defaults__ = (None, [], float('-inf'))
 
+# Pool of threads used when `ATTRIBUTES_EXECUTOR == 'thread'`, as (num_workers, pool). Created when
+# first needed.
+_THREAD_POOL = (None, None)
+
+
+def _get_thread_pool(num_workers):
+    global _THREAD_POOL
+    if _THREAD_POOL[0] != num_workers:
+        if _THREAD_POOL[1] is not None:
+            _THREAD_POOL[1].shutdown()
+        _THREAD_POOL = (num_workers,
+                        concurrent.futures.ThreadPoolExecutor(max_workers=num_workers))
+    return _THREAD_POOL[1]
+
+
+def _get_numeric_candidate_splits(sorted_values, sorted_classes, num_classes):
+    """Returns the candidate splits of a numeric attribute, given the values and classes of its
+    valid samples sorted by value. A candidate split separates two consecutive samples with
+    different values. Returns a triple with:
+        - the index of the first sample on the right of each candidate split, which is also its
+            number of samples on the left;
+        - the number of samples of each class on the left of each candidate split;
+        - the number of samples of each class on the right of each candidate split.
+    """
+    # Row `i` counts the samples of each class in `sorted_classes[:i + 1]`.
+    cumulative_class_num = np.cumsum(np.eye(num_classes, dtype=np.int64)[sorted_classes[:-1]],
+                                     axis=0)
+    is_candidate_split = sorted_values[1:] != sorted_values[:-1]
+    class_num_left = cumulative_class_num[is_candidate_split]
+    class_num_right = np.bincount(sorted_classes, minlength=num_classes) - class_num_left
+    return np.flatnonzero(is_candidate_split) + 1, class_num_left, class_num_right
+
+
+def _get_best_numeric_split(sorted_values, first_right_indices, splits_criterion_values,
+                            maximize):
+    """Returns the best of the candidate splits given by `_get_numeric_candidate_splits`, as a
+    triple (criterion_value, last_left_value, first_right_value). Ties are broken by the smallest
+    threshold. When there is no candidate split, returns the worst criterion value and `None`
+    values.
+    """
+    if not first_right_indices.size:
+        return (float('-inf') if maximize else float('+inf'), None, None)
+    if maximize:
+        best_split_index = np.argmax(splits_criterion_values)
+    else:
+        best_split_index = np.argmin(splits_criterion_values)
+    first_right_index = first_right_indices[best_split_index]
+    return (splits_criterion_values[best_split_index].item(),
+            sorted_values[first_right_index - 1].item(),
+            sorted_values[first_right_index].item())
+
+
+def _get_superclasses_indicator(class_index_num_samples):
+    """Returns the indicator matrix of the partitions of the non-empty classes in two superclasses,
+    with one row per class and one column per partition. Each column indicates the classes in the
+    first superclass, while the second superclass has the other non-empty classes. Partitions are
+    ordered by size of the first superclass and then lexicographically.
+    """
+    # We only need to look at superclasses of up to (number of non-empty classes / 2) elements
+    # because of symmetry! The subsets we are not choosing are complements of the ones chosen.
+    non_empty_classes = np.flatnonzero(class_index_num_samples).tolist()
+    first_superclasses = list(itertools.chain.from_iterable(
+        itertools.combinations(non_empty_classes, size_first_superclass)
+        for size_first_superclass in range(1, len(non_empty_classes) // 2 + 1)))
+    superclasses_indicator = np.zeros((len(class_index_num_samples), len(first_superclasses)),
+                                      dtype=np.int64)
+    superclasses_indicator[
+        list(itertools.chain.from_iterable(first_superclasses)),
+        np.repeat(np.arange(len(first_superclasses)),
+                  [len(first_superclass) for first_superclass in first_superclasses])] = 1
+    return superclasses_indicator
+
+
+def _get_largest_class_alone_indicator(class_index_num_samples):
+    """Returns the indicator matrix, as in `_get_superclasses_indicator`, of the single partition
+    of the classes where the first superclass has only the class with most samples.
+    """
+    largest_class_alone_indicator = np.zeros((len(class_index_num_samples), 1), dtype=np.int64)
+    largest_class_alone_indicator[np.argmax(class_index_num_samples), 0] = 1
+    return largest_class_alone_indicator
+
+
+def _two_class_trick(contingency_table, values_num_samples, superclasses_indicator, impurity,
+                     superclasses_impurity_gain=False):
+    """Returns the best split of the values of a nominal attribute over the partitions of the
+    classes in two superclasses given by `superclasses_indicator`, as a triple
+    (criterion_value, left_values, right_values).
+
+    For each partition we only need to sort the values by the fraction of their samples in the
+    second superclass: the best split is given by choosing an index to split this list of values in
+    two. When `superclasses_impurity_gain` is `True` the criterion value of a split is the decrease
+    of impurity of the two superclasses, to be maximized (as in Twoing). Otherwise it is the
+    children impurity of the classes, to be minimized (as in Hypercube Cover). The impurity is
+    either the `'gini'` index or the `'entropy'`. Ties are broken by the first partition and then
+    by the smallest prefix of values. When there is no valid split, returns the worst criterion
+    value and empty sets.
+    """
+    def _get_empty_impurity(shape):
+        # Classes are subtracted one at a time, in class order, by `_subtract_class_impurity`.
+        if impurity == 'gini':
+            return np.ones(shape, dtype=float)
+        return np.zeros(shape, dtype=float)
+
+    def _subtract_class_impurity(node_impurity, class_num_samples, num_samples):
+        # Empty classes have frequency 1 in the logarithm, so that they subtract nothing.
+        class_frequency = class_num_samples / num_samples
+        if impurity == 'gini':
+            node_impurity -= class_frequency**2
+        else:
+            node_impurity -= class_frequency * np.log2(np.where(class_frequency > 0.0,
+                                                                class_frequency,
+                                                                1.0))
+
+    worst_criterion_value = float('-inf') if superclasses_impurity_gain else float('+inf')
+    values_seen = np.flatnonzero(values_num_samples)
+    if values_seen.size < 2 or not superclasses_indicator.shape[1]:
+        return (worst_criterion_value, set(), set())
+    values_seen_num_samples = values_num_samples[values_seen]
+    values_seen_contingency_table = contingency_table[values_seen]
+    num_samples = values_seen_num_samples.sum()
+
+    # Every partition is evaluated at once, with one column per partition.
+    num_first = np.dot(values_seen_contingency_table, superclasses_indicator)
+    num_second = values_seen_num_samples[:, np.newaxis] - num_first
+    values_order = np.argsort(num_second / values_seen_num_samples[:, np.newaxis],
+                              axis=0,
+                              kind='stable')
+    if superclasses_impurity_gain:
+        sorted_classes_num_samples = (np.take_along_axis(num_first, values_order, axis=0),
+                                      np.take_along_axis(num_second, values_order, axis=0))
+    else:
+        sorted_classes_num_samples = (values_seen_contingency_table[values_order, class_index]
+                                      for class_index in range(contingency_table.shape[1]))
+
+    # Row `i` has the splits with the first `i + 1` sorted values on the left.
+    num_left_samples = np.cumsum(values_seen_num_samples[values_order], axis=0)[:-1]
+    num_right_samples = num_samples - num_left_samples
+    left_impurity = _get_empty_impurity(num_left_samples.shape)
+    right_impurity = _get_empty_impurity(num_left_samples.shape)
+    for sorted_class_num_samples in sorted_classes_num_samples:
+        class_num_left = np.cumsum(sorted_class_num_samples, axis=0)[:-1]
+        _subtract_class_impurity(left_impurity, class_num_left, num_left_samples)
+        _subtract_class_impurity(right_impurity,
+                                 sorted_class_num_samples.sum(axis=0) - class_num_left,
+                                 num_right_samples)
+    children_impurity = ((num_left_samples * left_impurity + num_right_samples * right_impurity)
+                         / num_samples)
+    is_valid_partition = (num_first.sum(axis=0) > 0) & (num_second.sum(axis=0) > 0)
+    if superclasses_impurity_gain:
+        original_impurity = _get_empty_impurity(superclasses_indicator.shape[1])
+        _subtract_class_impurity(original_impurity, num_first.sum(axis=0), num_samples)
+        _subtract_class_impurity(original_impurity, num_second.sum(axis=0), num_samples)
+        splits_criterion_values = np.where(is_valid_partition,
+                                           original_impurity - children_impurity,
+                                           worst_criterion_value)
+        best_last_left_indices = np.argmax(splits_criterion_values, axis=0)
+    else:
+        splits_criterion_values = np.where(is_valid_partition,
+                                           children_impurity,
+                                           worst_criterion_value)
+        best_last_left_indices = np.argmin(splits_criterion_values, axis=0)
+    superclasses_criterion_values = splits_criterion_values[
+        best_last_left_indices, np.arange(superclasses_indicator.shape[1])]
+    if superclasses_impurity_gain:
+        best_superclasses_index = np.argmax(superclasses_criterion_values)
+    else:
+        best_superclasses_index = np.argmin(superclasses_criterion_values)
+    if superclasses_criterion_values[best_superclasses_index] == worst_criterion_value:
+        return (worst_criterion_value, set(), set())
+
+    # Let's get the values and split the indices corresponding to the best split found.
+    set_left_values = set(values_seen[values_order[
+        :best_last_left_indices[best_superclasses_index] + 1,
+        best_superclasses_index]].tolist())
+    set_right_values = set(values_seen.tolist()) - set_left_values
+    return (superclasses_criterion_values[best_superclasses_index].item(),
+            set_left_values,
+            set_right_values)
+
 
 class Criterion(object):
     """Abstract base class for every criterion.
@@ -45,6 +248,38 @@ class Criterion(object):
         # returns (separation_attrib_index, splits_values, criterion_value)
         pass
 
+    @staticmethod
+    def _evaluate_attributes(get_attribute_split, *valid_attributes):
+        """Returns a list with `get_attribute_split(attrib_index)` for every attribute valid in any
+        of the `valid_attributes` lists, in order of attribute index. The attributes are evaluated
+        as given by `ATTRIBUTES_EXECUTOR`. Since `max` and `min` return the first best split, ties
+        are always broken by the smallest attribute index.
+        """
+        attrib_indices = [attrib_index
+                          for attrib_index, is_valid_attrib in enumerate(zip(*valid_attributes))
+                          if any(is_valid_attrib)]
+        if ATTRIBUTES_EXECUTOR is None or len(attrib_indices) <= 1:
+            return [get_attribute_split(attrib_index) for attrib_index in attrib_indices]
+
+        if ATTRIBUTES_EXECUTOR_NUM_WORKERS is None:
+            num_workers = os.cpu_count()
+        else:
+            num_workers = ATTRIBUTES_EXECUTOR_NUM_WORKERS
+        return list(_get_thread_pool(num_workers).map(get_attribute_split, attrib_indices))
+
+    @staticmethod
+    def _get_attributes_random_states(*valid_attributes):
+        """Returns a list with the random state to be used by each attribute evaluated by
+        `_evaluate_attributes`. When the attributes are evaluated one at a time, it is `np.random`.
+        Otherwise each valid attribute has its own `np.random.RandomState`, seeded from `np.random`
+        in order of attribute index, so that the results don't depend on the order in which the
+        attributes are evaluated.
+        """
+        if ATTRIBUTES_EXECUTOR is None:
+            return [np.random] * len(valid_attributes[0])
+        return [np.random.RandomState(np.random.randint(2**32)) if any(is_valid_attrib) else None
+                for is_valid_attrib in zip(*valid_attributes)]
+
 
 
 #################################################################################################
@@ -70,40 +305,18 @@ class Twoing(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
-                best_total_gini_gain = float('-inf')
-                best_left_values = set()
-                best_right_values = set()
-                values_seen = cls._get_values_seen(
-                    tree_node.contingency_tables[attrib_index].values_num_samples)
-                for (set_left_classes,
-                     set_right_classes) in cls._generate_twoing(tree_node.class_index_num_samples):
-                    (twoing_contingency_table,
-                     superclass_index_num_samples) = cls._get_twoing_contingency_table(
-                         tree_node.contingency_tables[attrib_index].contingency_table,
-                         tree_node.contingency_tables[attrib_index].values_num_samples,
-                         set_left_classes,
-                         set_right_classes)
-                    original_gini = cls._calculate_gini_index(len(tree_node.valid_samples_indices),
-                                                              superclass_index_num_samples)
-                    (curr_gini_gain,
-                     left_values,
-                     right_values) = cls._two_class_trick(
-                         original_gini,
-                         superclass_index_num_samples,
-                         values_seen,
-                         tree_node.contingency_tables[attrib_index].values_num_samples,
-                         twoing_contingency_table,
-                         len(tree_node.valid_samples_indices))
-                    if curr_gini_gain > best_total_gini_gain:
-                        best_total_gini_gain = curr_gini_gain
-                        best_left_values = left_values
-                        best_right_values = right_values
+        superclasses_indicator = _get_superclasses_indicator(tree_node.class_index_num_samples)
+
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
+                (_,
+                 best_left_values,
+                 best_right_values) = _two_class_trick(
+                     tree_node.contingency_tables[attrib_index].contingency_table,
+                     tree_node.contingency_tables[attrib_index].values_num_samples,
+                     superclasses_indicator,
+                     impurity='gini',
+                     superclasses_impurity_gain=True)
 
                 num_values, num_classes = tree_node.contingency_tables[
                     attrib_index].contingency_table.shape
@@ -124,119 +337,48 @@ class Twoing(Criterion):
                             attrib_index].values_num_samples[value]
                 twoing_value = cls._get_twoing_value(
                     class_num_left, class_num_right, num_left_samples, num_right_samples)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[best_left_values, best_right_values],
-                          criterion_value=twoing_value))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                return Split(attrib_index=attrib_index,
+                             splits_values=[best_left_values, best_right_values],
+                             criterion_value=twoing_value)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_twoing,
                  last_left_value,
                  first_right_value) = cls._twoing_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_twoing))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_twoing)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return max(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
 
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
-    @staticmethod
-    def _generate_twoing(class_index_num_samples):
-        # We only need to look at superclasses of up to (len(class_index_num_samples)/2 + 1)
-        # elements because of symmetry! The subsets we are not choosing are complements of the ones
-        # chosen.
-        non_empty_classes = set([])
-        for class_index, class_num_samples in enumerate(class_index_num_samples):
-            if class_num_samples > 0:
-                non_empty_classes.add(class_index)
-        number_non_empty_classes = len(non_empty_classes)
-
-        for left_classes in itertools.chain.from_iterable(
-                itertools.combinations(non_empty_classes, size_left_superclass)
-                for size_left_superclass in range(1, number_non_empty_classes // 2 + 1)):
-            set_left_classes = set(left_classes)
-            set_right_classes = non_empty_classes - set_left_classes
-            if not set_left_classes or not set_right_classes:
-                # A valid split must have at least one sample in each side
-                continue
-            yield set_left_classes, set_right_classes
-
-    @staticmethod
-    def _get_twoing_contingency_table(contingency_table, values_num_samples, set_left_classes,
-                                      set_right_classes):
-        twoing_contingency_table = np.zeros((contingency_table.shape[0], 2), dtype=float)
-        superclass_index_num_samples = [0, 0]
-        for value, value_num_samples in enumerate(values_num_samples):
-            if value_num_samples == 0:
-                continue
-            for class_index in set_left_classes:
-                superclass_index_num_samples[0] += contingency_table[value][class_index]
-                twoing_contingency_table[value][0] += contingency_table[value][class_index]
-            for class_index in set_right_classes:
-                superclass_index_num_samples[1] += contingency_table[value][class_index]
-                twoing_contingency_table[value][1] += contingency_table[value][class_index]
-        return twoing_contingency_table, superclass_index_num_samples
-
     @classmethod
-    def _twoing_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_twoing = float('-inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                twoing_value = cls._get_twoing_value(class_num_left,
-                                                     class_num_right,
-                                                     num_left_samples,
-                                                     num_right_samples)
-                if twoing_value > best_twoing:
-                    best_twoing = twoing_value
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_twoing, best_last_left_value, best_first_right_value)
+    def _twoing_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_left_samples = first_right_indices
+        num_right_samples = len(sorted_values) - first_right_indices
+        # Classes are added one at a time, in the same order as `_get_twoing_value`.
+        sum_dif = np.zeros(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            sum_dif += np.abs(class_num_left[:, class_index] / num_left_samples
+                              - class_num_right[:, class_index] / num_right_samples)
+        frequency_left = num_left_samples / len(sorted_values)
+        frequency_right = num_right_samples / len(sorted_values)
+        twoing_values = (frequency_left * frequency_right / 4.0) * sum_dif ** 2
+        return _get_best_numeric_split(sorted_values, first_right_indices, twoing_values,
+                                       maximize=True)
 
     @staticmethod
     def _get_twoing_value(class_num_left, class_num_right, num_left_samples,
@@ -255,139 +397,6 @@ class Twoing(Criterion):
         twoing_value = (frequency_left * frequency_right / 4.0) * sum_dif ** 2
         return twoing_value
 
-    @staticmethod
-    def _two_class_trick(original_gini, class_index_num_samples, values_seen, values_num_samples,
-                         contingency_table, num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_class_indices(class_index_num_samples):
-            # TESTED!
-            first_non_empty_class = None
-            second_non_empty_class = None
-            for class_index, class_num_samples in enumerate(class_index_num_samples):
-                if class_num_samples > 0:
-                    if first_non_empty_class is None:
-                        first_non_empty_class = class_index
-                    else:
-                        second_non_empty_class = class_index
-                        break
-            return first_non_empty_class, second_non_empty_class
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples, contingency_table,
-                                         non_empty_class_indices):
-            # TESTED!
-            value_number_ratio = [] # [(value, number_on_second_class, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = contingency_table[curr_value][second_class_index]
-                value_number_ratio.append((curr_value,
-                                           number_second_non_empty,
-                                           number_second_non_empty/values_num_samples[curr_value]))
-            value_number_ratio.sort(key=lambda tup: tup[2])
-            return value_number_ratio
-
-        def _calculate_children_gini_index(num_left_first, num_left_second, num_right_first,
-                                           num_right_second, num_left_samples, num_right_samples):
-            # TESTED!
-            if num_left_samples != 0:
-                left_first_class_freq_ratio = float(num_left_first)/float(num_left_samples)
-                left_second_class_freq_ratio = float(num_left_second)/float(num_left_samples)
-                left_split_gini_index = (1.0
-                                         - left_first_class_freq_ratio**2
-                                         - left_second_class_freq_ratio**2)
-            else:
-                # We can set left_split_gini_index to any value here, since it will be multiplied
-                # by zero in curr_children_gini_index
-                left_split_gini_index = 1.0
-
-            if num_right_samples != 0:
-                right_first_class_freq_ratio = float(num_right_first)/float(num_right_samples)
-                right_second_class_freq_ratio = float(num_right_second)/float(num_right_samples)
-                right_split_gini_index = (1.0
-                                          - right_first_class_freq_ratio**2
-                                          - right_second_class_freq_ratio**2)
-            else:
-                # We can set right_split_gini_index to any value here, since it will be multiplied
-                # by zero in curr_children_gini_index
-                right_split_gini_index = 1.0
-
-            curr_children_gini_index = ((num_left_samples * left_split_gini_index
-                                         + num_right_samples * right_split_gini_index)
-                                        / (num_left_samples + num_right_samples))
-            return curr_children_gini_index
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_class,
-         second_non_empty_class) = _get_non_empty_class_indices(class_index_num_samples)
-        if first_non_empty_class is None or second_non_empty_class is None:
-            return (float('-inf'), {0}, set())
-
-        value_number_ratio = _calculate_value_class_ratio(values_seen,
-                                                          values_num_samples,
-                                                          contingency_table,
-                                                          (first_non_empty_class,
-                                                           second_non_empty_class))
-
-        best_split_total_gini_gain = float('-inf')
-        best_last_left_index = 0
-
-        num_left_first = 0
-        num_left_second = 0
-        num_left_samples = 0
-        num_right_first = class_index_num_samples[first_non_empty_class]
-        num_right_second = class_index_num_samples[second_non_empty_class]
-        num_right_samples = num_total_valid_samples
-
-        for last_left_index, (last_left_value, last_left_num_second, _) in enumerate(
-                value_number_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            last_left_num_first = num_samples_last_left_value - last_left_num_second
-
-            num_left_samples += num_samples_last_left_value
-            num_left_first += last_left_num_first
-            num_left_second += last_left_num_second
-            num_right_samples -= num_samples_last_left_value
-            num_right_first -= last_left_num_first
-            num_right_second -= last_left_num_second
-
-            curr_children_gini_index = _calculate_children_gini_index(num_left_first,
-                                                                      num_left_second,
-                                                                      num_right_first,
-                                                                      num_right_second,
-                                                                      num_left_samples,
-                                                                      num_right_samples)
-            curr_gini_gain = original_gini - curr_children_gini_index
-            if curr_gini_gain > best_split_total_gini_gain:
-                best_split_total_gini_gain = curr_gini_gain
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set([tup[0] for tup in value_number_ratio[:best_last_left_index + 1]])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_total_gini_gain, set_left_values, set_right_values)
-
-    @staticmethod
-    def _calculate_gini_index(side_num, class_num_side):
-        gini_index = 1.0
-        for curr_class_num_side in class_num_side:
-            if curr_class_num_side > 0:
-                gini_index -= (curr_class_num_side/side_num)**2
-        return gini_index
-
-    @classmethod
-    def _calculate_children_gini_index(cls, left_num, class_num_left, right_num, class_num_right):
-        left_split_gini_index = cls._calculate_gini_index(left_num, class_num_left)
-        right_split_gini_index = cls._calculate_gini_index(right_num, class_num_right)
-        children_gini_index = ((left_num * left_split_gini_index
-                                + right_num * right_split_gini_index)
-                               / (left_num + right_num))
-        return children_gini_index
-
 
 
 #################################################################################################
@@ -414,24 +423,29 @@ class GWSquaredGini(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for attrib_index, is_valid_nominal_attrib in enumerate(tree_node.valid_nominal_attribute):
-            if is_valid_nominal_attrib:
-                (new_to_orig_value_int,
-                 new_contingency_table,
-                 new_values_num_seen) = cls._remove_empty_values(
-                     tree_node.contingency_tables[attrib_index].contingency_table,
-                     tree_node.contingency_tables[attrib_index].values_num_samples)
+        attributes_random_states = cls._get_attributes_random_states(
+            tree_node.valid_nominal_attribute)
 
-                (curr_cut_value,
-                 left_int_values,
-                 right_int_values) = cls._generate_best_split(new_to_orig_value_int,
-                                                              new_contingency_table,
-                                                              new_values_num_seen)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_int_values, right_int_values],
-                          criterion_value=curr_cut_value))
+        def _get_attribute_split(attrib_index):
+            (new_to_orig_value_int,
+             new_contingency_table,
+             new_values_num_seen) = cls._remove_empty_values(
+                 tree_node.contingency_tables[attrib_index].contingency_table,
+                 tree_node.contingency_tables[attrib_index].values_num_samples)
+
+            (curr_cut_value,
+             left_int_values,
+             right_int_values) = cls._generate_best_split(new_to_orig_value_int,
+                                                          new_contingency_table,
+                                                          new_values_num_seen,
+                                                          attributes_random_states[attrib_index])
+            return Split(attrib_index=attrib_index,
+                         splits_values=[left_int_values, right_int_values],
+                         criterion_value=curr_cut_value)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             return max(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
@@ -463,7 +477,7 @@ class GWSquaredGini(Criterion):
 
     @classmethod
     def _generate_best_split(cls, new_to_orig_value_int, new_contingency_table,
-                             new_values_num_seen):
+                             new_values_num_seen, random_state=np.random):
         def _init_values_weights(new_contingency_table, new_values_num_seen):
             # Initializes the weight of each edge in the values graph (to be sent to the Max Cut).
             weights = np.zeros((new_values_num_seen.shape[0], new_values_num_seen.shape[0]),
@@ -483,7 +497,8 @@ class GWSquaredGini(Criterion):
 
         weights = _init_values_weights(new_contingency_table, new_values_num_seen)
         frac_split_cholesky = cls._solve_max_cut(weights)
-        left_new_values, right_new_values = cls._generate_random_partition(frac_split_cholesky)
+        left_new_values, right_new_values = cls._generate_random_partition(frac_split_cholesky,
+                                                                           random_state)
 
         left_orig_values, right_orig_values = cls._get_split_in_orig_values(new_to_orig_value_int,
                                                                             left_new_values,
@@ -492,22 +507,26 @@ class GWSquaredGini(Criterion):
         return cut_val, left_orig_values, right_orig_values
 
 
-    @staticmethod
-    def _solve_max_cut(weights):
-        def _solve_sdp(weights):
-            # See Max Cut approximation given by Goemans and Williamson, 1995.
-            var = cvx.Semidef(weights.shape[0])
-            obj = cvx.Minimize(0.25 * cvx.trace(weights.T * var))
-
-            constraints = [var == var.T, var >> 0]
-            for i in range(weights.shape[0]):
-                constraints.append(var[i, i] == 1)
-
-            prob = cvx.Problem(obj, constraints)
-            prob.solve(solver=cvx.SCS, verbose=False)
-            return var.value
-
-        fractional_split_squared = _solve_sdp(weights)
+    @classmethod
+    def _solve_max_cut(cls, weights):
+        # See Max Cut approximation given by Goemans and Williamson, 1995.
+        if SDP_SOLVER_PER_CRITERION.get(cls.name, SDP_SOLVER) == 'low-rank':
+            # The relaxation is solved directly on the vectors whose Gram matrix is its solution, so
+            # there's no need to recover them with a Cholesky decomposition. We add zero rows to the
+            # factor since the random vector has one entry per value.
+            low_rank_factor = sdp.solve_max_cut_low_rank(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
+            frac_split_cholesky = np.zeros((weights.shape[0], weights.shape[0]),
+                                           dtype=np.float64)
+            frac_split_cholesky[:low_rank_factor.shape[0], :] = low_rank_factor
+            return frac_split_cholesky
+
+        fractional_split_squared = sdp.solve_max_cut_sdp(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
         # The solution should already be symmetric, but let's just make sure the approximations
         # didn't change that.
         sym_fractional_split_squared = 0.5 * (fractional_split_squared
@@ -525,8 +544,8 @@ class GWSquaredGini(Criterion):
         return np.dot(lower_triang_matrix.T, permutation_matrix)
 
     @staticmethod
-    def _generate_random_partition(frac_split_cholesky):
-        random_vector = np.random.randn(frac_split_cholesky.shape[1])
+    def _generate_random_partition(frac_split_cholesky, random_state=np.random):
+        random_vector = random_state.randn(frac_split_cholesky.shape[1])
         values_split = np.zeros((frac_split_cholesky.shape[1]), dtype=np.float64)
         for column_index in range(frac_split_cholesky.shape[1]):
             column = frac_split_cholesky[:, column_index]
@@ -584,24 +603,29 @@ class GWChiSquare(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for attrib_index, is_valid_nominal_attrib in enumerate(tree_node.valid_nominal_attribute):
-            if is_valid_nominal_attrib:
-                (new_to_orig_value_int,
-                 new_contingency_table,
-                 new_values_num_seen) = cls._remove_empty_values(
-                     tree_node.contingency_tables[attrib_index].contingency_table,
-                     tree_node.contingency_tables[attrib_index].values_num_samples)
+        attributes_random_states = cls._get_attributes_random_states(
+            tree_node.valid_nominal_attribute)
 
-                (curr_cut_value,
-                 left_int_values,
-                 right_int_values) = cls._generate_best_split(new_to_orig_value_int,
-                                                              new_contingency_table,
-                                                              new_values_num_seen)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_int_values, right_int_values],
-                          criterion_value=curr_cut_value))
+        def _get_attribute_split(attrib_index):
+            (new_to_orig_value_int,
+             new_contingency_table,
+             new_values_num_seen) = cls._remove_empty_values(
+                 tree_node.contingency_tables[attrib_index].contingency_table,
+                 tree_node.contingency_tables[attrib_index].values_num_samples)
+
+            (curr_cut_value,
+             left_int_values,
+             right_int_values) = cls._generate_best_split(new_to_orig_value_int,
+                                                          new_contingency_table,
+                                                          new_values_num_seen,
+                                                          attributes_random_states[attrib_index])
+            return Split(attrib_index=attrib_index,
+                         splits_values=[left_int_values, right_int_values],
+                         criterion_value=curr_cut_value)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             return max(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
@@ -633,7 +657,7 @@ class GWChiSquare(Criterion):
 
     @classmethod
     def _generate_best_split(cls, new_to_orig_value_int, new_contingency_table,
-                             new_values_num_seen):
+                             new_values_num_seen, random_state=np.random):
         def _init_values_weights(new_contingency_table, new_values_num_seen):
             # TESTED!
             # Initializes the weight of each edge in the values graph (to be sent to the Max Cut)
@@ -680,7 +704,8 @@ class GWChiSquare(Criterion):
 
         weights = _init_values_weights(new_contingency_table, new_values_num_seen)
         frac_split_cholesky = cls._solve_max_cut(weights)
-        left_new_values, right_new_values = cls._generate_random_partition(frac_split_cholesky)
+        left_new_values, right_new_values = cls._generate_random_partition(frac_split_cholesky,
+                                                                           random_state)
 
         left_orig_values, right_orig_values = cls._get_split_in_orig_values(new_to_orig_value_int,
                                                                             left_new_values,
@@ -688,22 +713,26 @@ class GWChiSquare(Criterion):
         cut_val = cls._calculate_split_value(left_new_values, right_new_values, weights)
         return cut_val, left_orig_values, right_orig_values
 
-    @staticmethod
-    def _solve_max_cut(weights):
-        def _solve_sdp(weights):
-            # See Max Cut approximation given by Goemans and Williamson, 1995.
-            var = cvx.Semidef(weights.shape[0])
-            obj = cvx.Minimize(0.25 * cvx.trace(weights.T * var))
-
-            constraints = [var == var.T, var >> 0]
-            for i in range(weights.shape[0]):
-                constraints.append(var[i, i] == 1)
-
-            prob = cvx.Problem(obj, constraints)
-            prob.solve(solver=cvx.SCS, verbose=False)
-            return var.value
-
-        fractional_split_squared = _solve_sdp(weights)
+    @classmethod
+    def _solve_max_cut(cls, weights):
+        # See Max Cut approximation given by Goemans and Williamson, 1995.
+        if SDP_SOLVER_PER_CRITERION.get(cls.name, SDP_SOLVER) == 'low-rank':
+            # The relaxation is solved directly on the vectors whose Gram matrix is its solution, so
+            # there's no need to recover them with a Cholesky decomposition. We add zero rows to the
+            # factor since the random vector has one entry per value.
+            low_rank_factor = sdp.solve_max_cut_low_rank(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
+            frac_split_cholesky = np.zeros((weights.shape[0], weights.shape[0]),
+                                           dtype=np.float64)
+            frac_split_cholesky[:low_rank_factor.shape[0], :] = low_rank_factor
+            return frac_split_cholesky
+
+        fractional_split_squared = sdp.solve_max_cut_sdp(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
         # The solution should already be symmetric, but let's just make sure the approximations
         # didn't change that.
         sym_fractional_split_squared = 0.5 * (fractional_split_squared
@@ -721,8 +750,8 @@ class GWChiSquare(Criterion):
         return np.dot(lower_triang_matrix.T, permutation_matrix)
 
     @staticmethod
-    def _generate_random_partition(frac_split_cholesky):
-        random_vector = np.random.randn(frac_split_cholesky.shape[1])
+    def _generate_random_partition(frac_split_cholesky, random_state=np.random):
+        random_vector = random_state.randn(frac_split_cholesky.shape[1])
         values_split = np.zeros((frac_split_cholesky.shape[1]), dtype=np.float64)
         for column_index in range(frac_split_cholesky.shape[1]):
             column = frac_split_cholesky[:, column_index]
@@ -780,12 +809,8 @@ class LSSquaredGini(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 (new_to_orig_value_int,
                  new_contingency_table,
                  new_values_num_seen) = cls._remove_empty_values(
@@ -796,25 +821,26 @@ class LSSquaredGini(Criterion):
                  right_int_values) = cls._generate_best_split(new_to_orig_value_int,
                                                               new_contingency_table,
                                                               new_values_num_seen)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_int_values, right_int_values],
-                          criterion_value=curr_cut_value))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                return Split(attrib_index=attrib_index,
+                             splits_values=[left_int_values, right_int_values],
+                             criterion_value=curr_cut_value)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (cut_val,
                  last_left_value,
                  first_right_value) = cls._best_cut_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=cut_val))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=cut_val)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return max(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
@@ -1030,58 +1056,20 @@ class LSSquaredGini(Criterion):
                                 for right_new_value in right_new_values)
         return left_orig_values, right_orig_values
 
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
     @classmethod
-    def _best_cut_for_numeric(cls, sorted_values_and_classes, num_classes):
-        # Initial state is having the first value of `sorted_values_and_classes` on the left and
-        # everything else on the right.
-        last_left_new_value = sorted_values_and_classes[0][0]
-        last_left_class = sorted_values_and_classes[0][1]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[last_left_class] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        # Note that this cut with only the first sample on the left might not be valid: the value on
-        # the left might also appears on the right of the split. Therefore we initialize with cut
-        # value = -inf and only check if the current split is valid (and maybe update the
-        # information about the best cut found) on the next loop iteration. Note that, by doing
-        # this, we never test the split where the last sample is in the left, because there would be
-        # no samples on the right.
-        best_cut_value = float('-inf')
-        best_last_left_new_value = None
-        best_first_right_new_value = None
-
-        # `curr_cut_value` holds the current cut value, even if it's not a valid cut.
-        curr_cut_value = num_right_samples - class_num_right[last_left_class]
-
-        for (first_right_new_value, first_right_class) in sorted_values_and_classes[1:]:
-            if first_right_new_value != last_left_new_value and curr_cut_value > best_cut_value:
-                best_cut_value = curr_cut_value
-                best_last_left_new_value = last_left_new_value
-                best_first_right_new_value = first_right_new_value
-
-            curr_cut_value -= num_left_samples - class_num_left[first_right_class]
-            num_left_samples += 1
-            num_right_samples -= 1
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-            curr_cut_value += num_right_samples - class_num_right[first_right_class]
-            last_left_new_value = first_right_new_value
-
-        return (best_cut_value, best_last_left_new_value, best_first_right_new_value)
+    def _best_cut_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        # The cut value is the number of pairs of samples in different sides and of different
+        # classes.
+        num_left_samples = first_right_indices
+        num_right_samples = len(sorted_values) - first_right_indices
+        cut_values = (num_left_samples * num_right_samples
+                      - np.einsum('ij,ij->i', class_num_left, class_num_right))
+        return _get_best_numeric_split(sorted_values, first_right_indices, cut_values,
+                                       maximize=True)
 
 
 
@@ -1108,12 +1096,8 @@ class LSChiSquare(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 (new_to_orig_value_int,
                  new_contingency_table,
                  new_values_num_seen) = cls._remove_empty_values(
@@ -1124,26 +1108,27 @@ class LSChiSquare(Criterion):
                  right_int_values) = cls._generate_best_split(new_to_orig_value_int,
                                                               new_contingency_table,
                                                               new_values_num_seen)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_int_values, right_int_values],
-                          criterion_value=curr_cut_value))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                return Split(attrib_index=attrib_index,
+                             splits_values=[left_int_values, right_int_values],
+                             criterion_value=curr_cut_value)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (cut_val,
                  last_left_value,
                  first_right_value) = cls._best_cut_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes,
                      tree_node.class_index_num_samples)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=cut_val))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=cut_val)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return max(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
@@ -1383,68 +1368,44 @@ class LSChiSquare(Criterion):
                                 for right_new_value in right_new_values)
         return left_orig_values, right_orig_values
 
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
     @classmethod
-    def _best_cut_for_numeric(cls, sorted_values_and_classes, num_classes, class_index_num_samples):
-        # Initial state is having the first value of `sorted_values_and_classes` on the left and
-        # everything else on the right.
-        last_left_new_value = sorted_values_and_classes[0][0]
-        last_left_class = sorted_values_and_classes[0][1]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-        num_samples = len(sorted_values_and_classes)
-
-        class_num_left = [0] * num_classes
-        class_num_left[last_left_class] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        # Note that this cut with only the first sample on the left might not be valid: the value on
-        # the left might also appears on the right of the split. Therefore we initialize with cut
-        # value = -inf and only check if the current split is valid (and maybe update the
-        # information about the best cut found) on the next loop iteration. Note that, by doing
-        # this, we never test the split where the last sample is in the left, because there would be
-        # no samples on the right.
+    def _best_cut_for_numeric(cls, sorted_values, sorted_classes, num_classes,
+                              class_index_num_samples):
+        # Unlike the other criteria, the cut is evaluated between every pair of consecutive samples,
+        # since the threshold chosen below depends on all of them.
+        num_samples = len(sorted_values)
+        class_num_left = np.cumsum(np.eye(num_classes, dtype=np.int64)[sorted_classes[:-1]],
+                                   axis=0)
+        class_num_right = np.bincount(sorted_classes, minlength=num_classes) - class_num_left
+        num_left_samples = np.arange(1, num_samples)
+        num_right_samples = num_samples - num_left_samples
+        cut_values = np.zeros(num_left_samples.shape, dtype=float)
+        for class_index in range(num_classes):
+            if class_index_num_samples[class_index] != 0:
+                expected_value_left_class = (
+                    num_left_samples * class_index_num_samples[class_index] / num_samples)
+                diff_left = class_num_left[:, class_index] - expected_value_left_class
+                cut_values += diff_left * (diff_left / expected_value_left_class)
+
+                expected_value_right_class = (
+                    num_right_samples * class_index_num_samples[class_index] / num_samples)
+                diff_right = class_num_right[:, class_index] - expected_value_right_class
+                cut_values += diff_right * (diff_right / expected_value_right_class)
+
+        # The last value on the left is only moved when the best cut improves. A cut is taken when
+        # its first value on the right differs from the last value on the left and it improves the
+        # best cut value.
         best_cut_value = float('-inf')
-        best_last_left_new_value = None
-        best_first_right_new_value = None
-
-        for (first_right_new_value, first_right_class) in sorted_values_and_classes[1:]:
-            # `curr_cut_value` holds the current cut value, even if it's not a valid cut.
-            curr_cut_value = 0.0
-            for class_index in range(num_classes):
-                if class_index_num_samples[class_index] != 0:
-                    expected_value_left_class = (
-                        num_left_samples * class_index_num_samples[class_index] / num_samples)
-                    diff_left = class_num_left[class_index] - expected_value_left_class
-                    curr_cut_value += diff_left * (diff_left / expected_value_left_class)
-
-                    expected_value_right_class = (
-                        num_right_samples * class_index_num_samples[class_index] / num_samples)
-                    diff_right = class_num_right[class_index] - expected_value_right_class
-                    curr_cut_value += diff_right * (diff_right / expected_value_right_class)
-
-            if first_right_new_value != last_left_new_value and curr_cut_value > best_cut_value:
-                best_cut_value = curr_cut_value
-                best_last_left_new_value = last_left_new_value
-                best_first_right_new_value = first_right_new_value
-                last_left_new_value = first_right_new_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-
-        return (best_cut_value, best_last_left_new_value, best_first_right_new_value)
+        best_last_left_value = None
+        best_first_right_value = None
+        last_left_value = sorted_values[0].item()
+        for first_right_value, cut_value in zip(sorted_values[1:].tolist(), cut_values.tolist()):
+            if first_right_value != last_left_value and cut_value > best_cut_value:
+                best_cut_value = cut_value
+                best_last_left_value = last_left_value
+                best_first_right_value = first_right_value
+                last_left_value = first_right_value
+        return (best_cut_value, best_last_left_value, best_first_right_value)
 
 
 
@@ -1478,7 +1439,6 @@ class ConditionalInferenceTreeTwoing(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -1487,60 +1447,41 @@ class ConditionalInferenceTreeTwoing(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
             # Let's find the best split for this attribute using the Twoing criterion.
-            best_total_gini_gain = float('-inf')
-            best_left_values = set()
-            best_right_values = set()
-            values_seen = cls._get_values_seen(
-                tree_node.contingency_tables[best_split.attrib_index].values_num_samples)
-            for (set_left_classes,
-                 set_right_classes) in cls._generate_twoing(tree_node.class_index_num_samples):
-                (twoing_contingency_table,
-                 superclass_index_num_samples) = cls._get_twoing_contingency_table(
-                     tree_node.contingency_tables[best_split.attrib_index].contingency_table,
-                     tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
-                     set_left_classes,
-                     set_right_classes)
-                original_gini = cls._calculate_gini_index(len(tree_node.valid_samples_indices),
-                                                          superclass_index_num_samples)
-                (curr_gini_gain,
-                 left_values,
-                 right_values) = cls._two_class_trick(
-                     original_gini,
-                     superclass_index_num_samples,
-                     values_seen,
-                     tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
-                     twoing_contingency_table,
-                     len(tree_node.valid_samples_indices))
-                if curr_gini_gain > best_total_gini_gain:
-                    best_total_gini_gain = curr_gini_gain
-                    best_left_values = left_values
-                    best_right_values = right_values
+            (_,
+             best_left_values,
+             best_right_values) = _two_class_trick(
+                 tree_node.contingency_tables[best_split.attrib_index].contingency_table,
+                 tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
+                 _get_superclasses_indicator(tree_node.class_index_num_samples),
+                 impurity='gini',
+                 superclasses_impurity_gain=True)
             return Split(attrib_index=best_split.attrib_index,
                          splits_values=[best_left_values, best_right_values],
                          criterion_value=best_split.criterion_value)
@@ -1639,184 +1580,6 @@ class ConditionalInferenceTreeTwoing(Criterion):
         c_quad = np.dot(temp_diff, np.dot(sigma_j_pinv, temp_diff.transpose()))
         return scipy.stats.chi2.cdf(x=c_quad, df=sigma_j_rank)
 
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _generate_twoing(class_index_num_samples):
-        # We only need to look at superclasses of up to (len(class_index_num_samples)/2 + 1)
-        # elements because of symmetry! The subsets we are not choosing are complements of the ones
-        # chosen.
-        non_empty_classes = set([])
-        for class_index, class_num_samples in enumerate(class_index_num_samples):
-            if class_num_samples > 0:
-                non_empty_classes.add(class_index)
-        number_non_empty_classes = len(non_empty_classes)
-
-        for left_classes in itertools.chain.from_iterable(
-                itertools.combinations(non_empty_classes, size_left_superclass)
-                for size_left_superclass in range(1, number_non_empty_classes // 2 + 1)):
-            set_left_classes = set(left_classes)
-            set_right_classes = non_empty_classes - set_left_classes
-            if not set_left_classes or not set_right_classes:
-                # A valid split must have at least one sample in each side
-                continue
-            yield set_left_classes, set_right_classes
-
-    @staticmethod
-    def _get_twoing_contingency_table(contingency_table, values_num_samples, set_left_classes,
-                                      set_right_classes):
-        twoing_contingency_table = np.zeros((contingency_table.shape[0], 2), dtype=float)
-        superclass_index_num_samples = [0, 0]
-        for value, value_num_samples in enumerate(values_num_samples):
-            if value_num_samples == 0:
-                continue
-            for class_index in set_left_classes:
-                superclass_index_num_samples[0] += contingency_table[value][class_index]
-                twoing_contingency_table[value][0] += contingency_table[value][class_index]
-            for class_index in set_right_classes:
-                superclass_index_num_samples[1] += contingency_table[value][class_index]
-                twoing_contingency_table[value][1] += contingency_table[value][class_index]
-        return twoing_contingency_table, superclass_index_num_samples
-
-    @staticmethod
-    def _two_class_trick(original_gini, class_index_num_samples, values_seen, values_num_samples,
-                         contingency_table, num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_class_indices(class_index_num_samples):
-            # TESTED!
-            first_non_empty_class = None
-            second_non_empty_class = None
-            for class_index, class_num_samples in enumerate(class_index_num_samples):
-                if class_num_samples > 0:
-                    if first_non_empty_class is None:
-                        first_non_empty_class = class_index
-                    else:
-                        second_non_empty_class = class_index
-                        break
-            return first_non_empty_class, second_non_empty_class
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples, contingency_table,
-                                         non_empty_class_indices):
-            # TESTED!
-            value_number_ratio = [] # [(value, number_on_second_class, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = contingency_table[curr_value][second_class_index]
-                value_number_ratio.append((curr_value,
-                                           number_second_non_empty,
-                                           number_second_non_empty/values_num_samples[curr_value]))
-            value_number_ratio.sort(key=lambda tup: tup[2])
-            return value_number_ratio
-
-        def _calculate_children_gini_index(num_left_first, num_left_second, num_right_first,
-                                           num_right_second, num_left_samples, num_right_samples):
-            # TESTED!
-            if num_left_samples != 0:
-                left_first_class_freq_ratio = float(num_left_first)/float(num_left_samples)
-                left_second_class_freq_ratio = float(num_left_second)/float(num_left_samples)
-                left_split_gini_index = (1.0
-                                         - left_first_class_freq_ratio**2
-                                         - left_second_class_freq_ratio**2)
-            else:
-                # We can set left_split_gini_index to any value here, since it will be multiplied
-                # by zero in curr_children_gini_index
-                left_split_gini_index = 1.0
-
-            if num_right_samples != 0:
-                right_first_class_freq_ratio = float(num_right_first)/float(num_right_samples)
-                right_second_class_freq_ratio = float(num_right_second)/float(num_right_samples)
-                right_split_gini_index = (1.0
-                                          - right_first_class_freq_ratio**2
-                                          - right_second_class_freq_ratio**2)
-            else:
-                # We can set right_split_gini_index to any value here, since it will be multiplied
-                # by zero in curr_children_gini_index
-                right_split_gini_index = 1.0
-
-            curr_children_gini_index = ((num_left_samples * left_split_gini_index
-                                         + num_right_samples * right_split_gini_index)
-                                        / (num_left_samples + num_right_samples))
-            return curr_children_gini_index
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_class,
-         second_non_empty_class) = _get_non_empty_class_indices(class_index_num_samples)
-        if first_non_empty_class is None or second_non_empty_class is None:
-            return (float('-inf'), {0}, set())
-
-        value_number_ratio = _calculate_value_class_ratio(values_seen,
-                                                          values_num_samples,
-                                                          contingency_table,
-                                                          (first_non_empty_class,
-                                                           second_non_empty_class))
-
-        best_split_total_gini_gain = float('-inf')
-        best_last_left_index = 0
-
-        num_left_first = 0
-        num_left_second = 0
-        num_left_samples = 0
-        num_right_first = class_index_num_samples[first_non_empty_class]
-        num_right_second = class_index_num_samples[second_non_empty_class]
-        num_right_samples = num_total_valid_samples
-
-        for last_left_index, (last_left_value, last_left_num_second, _) in enumerate(
-                value_number_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            last_left_num_first = num_samples_last_left_value - last_left_num_second
-
-            num_left_samples += num_samples_last_left_value
-            num_left_first += last_left_num_first
-            num_left_second += last_left_num_second
-            num_right_samples -= num_samples_last_left_value
-            num_right_first -= last_left_num_first
-            num_right_second -= last_left_num_second
-
-            curr_children_gini_index = _calculate_children_gini_index(num_left_first,
-                                                                      num_left_second,
-                                                                      num_right_first,
-                                                                      num_right_second,
-                                                                      num_left_samples,
-                                                                      num_right_samples)
-            curr_gini_gain = original_gini - curr_children_gini_index
-            if curr_gini_gain > best_split_total_gini_gain:
-                best_split_total_gini_gain = curr_gini_gain
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set([tup[0] for tup in value_number_ratio[:best_last_left_index + 1]])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_total_gini_gain, set_left_values, set_right_values)
-
-    @staticmethod
-    def _calculate_gini_index(side_num, class_num_side):
-        gini_index = 1.0
-        for curr_class_num_side in class_num_side:
-            if curr_class_num_side > 0:
-                gini_index -= (curr_class_num_side/side_num)**2
-        return gini_index
-
-    @classmethod
-    def _calculate_children_gini_index(cls, left_num, class_num_left, right_num, class_num_right):
-        left_split_gini_index = cls._calculate_gini_index(left_num, class_num_left)
-        right_split_gini_index = cls._calculate_gini_index(right_num, class_num_right)
-        children_gini_index = ((left_num * left_split_gini_index
-                                + right_num * right_split_gini_index)
-                               / (left_num + right_num))
-        return children_gini_index
-
 
 
 #################################################################################################
@@ -1847,7 +1610,6 @@ class ConditionalInferenceTreeLSSquaredGini(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -1856,29 +1618,30 @@ class ConditionalInferenceTreeLSSquaredGini(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
             # Let's find the best split for this attribute using the LS Squared Gini criterion.
@@ -2231,7 +1994,6 @@ class ConditionalInferenceTreeLSChiSquare(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -2240,29 +2002,30 @@ class ConditionalInferenceTreeLSChiSquare(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
             # Let's find the best split for this attribute using the LS Chi Square criterion.
@@ -2639,7 +2402,6 @@ class ConditionalInferenceTreeGWSquaredGini(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -2648,29 +2410,30 @@ class ConditionalInferenceTreeGWSquaredGini(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
             # Let's find the best split for this attribute using the GW Squared Gini criterion.
@@ -2837,22 +2600,26 @@ class ConditionalInferenceTreeGWSquaredGini(Criterion):
         return left_orig_values, right_orig_values
 
 
-    @staticmethod
-    def _solve_max_cut(weights):
-        def _solve_sdp(weights):
-            # See Max Cut approximation given by Goemans and Williamson, 1995.
-            var = cvx.Semidef(weights.shape[0])
-            obj = cvx.Minimize(0.25 * cvx.trace(weights.T * var))
-
-            constraints = [var == var.T, var >> 0]
-            for i in range(weights.shape[0]):
-                constraints.append(var[i, i] == 1)
-
-            prob = cvx.Problem(obj, constraints)
-            prob.solve(solver=cvx.SCS, verbose=False)
-            return var.value
-
-        fractional_split_squared = _solve_sdp(weights)
+    @classmethod
+    def _solve_max_cut(cls, weights):
+        # See Max Cut approximation given by Goemans and Williamson, 1995.
+        if SDP_SOLVER_PER_CRITERION.get(cls.name, SDP_SOLVER) == 'low-rank':
+            # The relaxation is solved directly on the vectors whose Gram matrix is its solution, so
+            # there's no need to recover them with a Cholesky decomposition. We add zero rows to the
+            # factor since the random vector has one entry per value.
+            low_rank_factor = sdp.solve_max_cut_low_rank(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
+            frac_split_cholesky = np.zeros((weights.shape[0], weights.shape[0]),
+                                           dtype=np.float64)
+            frac_split_cholesky[:low_rank_factor.shape[0], :] = low_rank_factor
+            return frac_split_cholesky
+
+        fractional_split_squared = sdp.solve_max_cut_sdp(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
         # The solution should already be symmetric, but let's just make sure the approximations
         # didn't change that.
         sym_fractional_split_squared = 0.5 * (fractional_split_squared
@@ -2926,7 +2693,6 @@ class ConditionalInferenceTreeGWChiSquare(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -2935,29 +2701,30 @@ class ConditionalInferenceTreeGWChiSquare(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
             # Let's find the best split for this attribute using the GW Chi Square criterion.
@@ -3150,22 +2917,26 @@ class ConditionalInferenceTreeGWChiSquare(Criterion):
                                                                             right_new_values)
         return left_orig_values, right_orig_values
 
-    @staticmethod
-    def _solve_max_cut(weights):
-        def _solve_sdp(weights):
-            # See Max Cut approximation given by Goemans and Williamson, 1995.
-            var = cvx.Semidef(weights.shape[0])
-            obj = cvx.Minimize(0.25 * cvx.trace(weights.T * var))
-
-            constraints = [var == var.T, var >> 0]
-            for i in range(weights.shape[0]):
-                constraints.append(var[i, i] == 1)
-
-            prob = cvx.Problem(obj, constraints)
-            prob.solve(solver=cvx.SCS, verbose=False)
-            return var.value
-
-        fractional_split_squared = _solve_sdp(weights)
+    @classmethod
+    def _solve_max_cut(cls, weights):
+        # See Max Cut approximation given by Goemans and Williamson, 1995.
+        if SDP_SOLVER_PER_CRITERION.get(cls.name, SDP_SOLVER) == 'low-rank':
+            # The relaxation is solved directly on the vectors whose Gram matrix is its solution, so
+            # there's no need to recover them with a Cholesky decomposition. We add zero rows to the
+            # factor since the random vector has one entry per value.
+            low_rank_factor = sdp.solve_max_cut_low_rank(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
+            frac_split_cholesky = np.zeros((weights.shape[0], weights.shape[0]),
+                                           dtype=np.float64)
+            frac_split_cholesky[:low_rank_factor.shape[0], :] = low_rank_factor
+            return frac_split_cholesky
+
+        fractional_split_squared = sdp.solve_max_cut_sdp(weights,
+                                                         eps=SDP_SOLVER_EPS,
+                                                         max_iters=SDP_SOLVER_MAX_ITERS,
+                                                         time_limit=SDP_SOLVER_TIME_LIMIT)
         # The solution should already be symmetric, but let's just make sure the approximations
         # didn't change that.
         sym_fractional_split_squared = 0.5 * (fractional_split_squared
@@ -3231,12 +3002,8 @@ class PCExt(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 contingency_table = tree_node.contingency_tables[attrib_index].contingency_table
                 values_num_samples = tree_node.contingency_tables[
                     attrib_index].values_num_samples
@@ -3244,7 +3011,7 @@ class PCExt(Criterion):
                  new_num_samples_per_value,
                  new_index_to_old) = cls._group_values(contingency_table, values_num_samples)
                 principal_component = cls._get_principal_component(
-                    len(tree_node.valid_samples_indices),
+                    tree_node.num_valid_samples,
                     new_contingency_table,
                     new_num_samples_per_value)
                 inner_product_results = np.dot(principal_component, new_contingency_table.T)
@@ -3290,74 +3057,49 @@ class PCExt(Criterion):
                  best_right_old_values) = cls._change_split_to_use_old_values(best_left_values,
                                                                               best_right_values,
                                                                               new_index_to_old)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[best_left_old_values, best_right_old_values],
-                          criterion_value=best_gini))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                return Split(attrib_index=attrib_index,
+                             splits_values=[best_left_old_values, best_right_old_values],
+                             criterion_value=best_gini)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_gini,
                  last_left_value,
                  first_right_value) = cls._gini_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_gini))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_gini)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
 
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
     @classmethod
-    def _gini_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_gini = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                gini_value = cls._get_gini_value(class_num_left,
-                                                 class_num_right,
-                                                 num_left_samples,
-                                                 num_right_samples)
-                if gini_value < best_gini:
-                    best_gini = gini_value
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_gini, best_last_left_value, best_first_right_value)
+    def _gini_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_samples = len(sorted_values)
+        num_left_samples = first_right_indices
+        num_right_samples = num_samples - first_right_indices
+        # Classes are subtracted one at a time, in the same order as `_get_gini_value`.
+        left_gini = np.ones(first_right_indices.shape, dtype=float)
+        right_gini = np.ones(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_gini -= (class_num_left[:, class_index] / num_left_samples)**2
+            right_gini -= (class_num_right[:, class_index] / num_right_samples)**2
+        gini_values = ((num_left_samples / num_samples) * left_gini +
+                       (num_right_samples / num_samples) * right_gini)
+        return _get_best_numeric_split(sorted_values, first_right_indices, gini_values,
+                                       maximize=False)
 
     @staticmethod
     def _get_num_samples_per_side(values_num_samples, left_values, right_values):
@@ -3527,7 +3269,6 @@ class ConditionalInferenceTreePCExt(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -3536,29 +3277,30 @@ class ConditionalInferenceTreePCExt(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
             # Let's find the best split for this attribute using the PC-ext criterion.
@@ -3570,7 +3312,7 @@ class ConditionalInferenceTreePCExt(Criterion):
              new_num_samples_per_value,
              new_index_to_old) = cls._group_values(contingency_table, values_num_samples)
             principal_component = cls._get_principal_component(
-                len(tree_node.valid_samples_indices),
+                tree_node.num_valid_samples,
                 new_contingency_table,
                 new_num_samples_per_value)
             inner_product_results = np.dot(principal_component, new_contingency_table.T)
@@ -3877,250 +3619,59 @@ class HypercubeCover(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
-                best_children_gini_gain = float('+inf')
-                best_left_values = set()
-                best_right_values = set()
-                values_seen = cls._get_values_seen(
-                    tree_node.contingency_tables[attrib_index].values_num_samples)
-                for (set_left_classes,
-                     set_right_classes) in cls._generate_superclasses(
-                         tree_node.class_index_num_samples):
-                    (superclass_contingency_table,
-                     superclass_index_num_samples) = cls._get_superclass_contingency_table(
-                         tree_node.contingency_tables[attrib_index].contingency_table,
-                         tree_node.contingency_tables[attrib_index].values_num_samples,
-                         set_left_classes,
-                         set_right_classes)
-                    (curr_gini_gain,
-                     left_values,
-                     right_values) = cls._two_class_trick(
-                         tree_node.class_index_num_samples,
-                         superclass_index_num_samples,
-                         values_seen,
-                         tree_node.contingency_tables[attrib_index].contingency_table,
-                         tree_node.contingency_tables[attrib_index].values_num_samples,
-                         superclass_contingency_table,
-                         len(tree_node.valid_samples_indices))
-
-                    if curr_gini_gain < best_children_gini_gain:
-                        best_children_gini_gain = curr_gini_gain
-                        best_left_values = left_values
-                        best_right_values = right_values
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[best_left_values, best_right_values],
-                          criterion_value=best_children_gini_gain))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+        superclasses_indicator = _get_superclasses_indicator(tree_node.class_index_num_samples)
+
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
+                (best_children_gini_gain,
+                 best_left_values,
+                 best_right_values) = _two_class_trick(
+                     tree_node.contingency_tables[attrib_index].contingency_table,
+                     tree_node.contingency_tables[attrib_index].values_num_samples,
+                     superclasses_indicator,
+                     impurity='gini')
+                return Split(attrib_index=attrib_index,
+                             splits_values=[best_left_values, best_right_values],
+                             criterion_value=best_children_gini_gain)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_gini,
                  last_left_value,
                  first_right_value) = cls._solve_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_gini))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_gini)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
 
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
-    @staticmethod
-    def _generate_superclasses(class_index_num_samples):
-        # We only need to look at superclasses of up to (len(class_index_num_samples)/2 + 1)
-        # elements because of symmetry! The subsets we are not choosing are complements of the ones
-        # chosen.
-        non_empty_classes = set([])
-        for class_index, class_num_samples in enumerate(class_index_num_samples):
-            if class_num_samples > 0:
-                non_empty_classes.add(class_index)
-        number_non_empty_classes = len(non_empty_classes)
-
-        for left_classes in itertools.chain.from_iterable(
-                itertools.combinations(non_empty_classes, size_left_superclass)
-                for size_left_superclass in range(1, number_non_empty_classes // 2 + 1)):
-            set_left_classes = set(left_classes)
-            set_right_classes = non_empty_classes - set_left_classes
-            if not set_left_classes or not set_right_classes:
-                # A valid split must have at least one sample in each side
-                continue
-            yield set_left_classes, set_right_classes
-
-    @staticmethod
-    def _get_superclass_contingency_table(contingency_table, values_num_samples, set_left_classes,
-                                          set_right_classes):
-        superclass_contingency_table = np.zeros((contingency_table.shape[0], 2), dtype=float)
-        superclass_index_num_samples = [0, 0]
-        for value, value_num_samples in enumerate(values_num_samples):
-            if value_num_samples == 0:
-                continue
-            for class_index in set_left_classes:
-                superclass_index_num_samples[0] += contingency_table[value][class_index]
-                superclass_contingency_table[value][0] += contingency_table[value][class_index]
-            for class_index in set_right_classes:
-                superclass_index_num_samples[1] += contingency_table[value][class_index]
-                superclass_contingency_table[value][1] += contingency_table[value][class_index]
-        return superclass_contingency_table, superclass_index_num_samples
-
-    @classmethod
-    def _solve_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_gini = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                gini_value = cls._calculate_children_gini_index(num_left_samples,
-                                                                class_num_left,
-                                                                num_right_samples,
-                                                                class_num_right)
-                if gini_value < best_gini:
-                    best_gini = gini_value
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_gini, best_last_left_value, best_first_right_value)
-
-    @staticmethod
-    def _calculate_gini_index(side_num, class_num_side):
-        gini_index = 1.0
-        for curr_class_num_side in class_num_side:
-            if curr_class_num_side > 0:
-                gini_index -= (curr_class_num_side / side_num) ** 2
-        return gini_index
-
     @classmethod
-    def _calculate_children_gini_index(cls, left_num, class_num_left, right_num, class_num_right):
-        left_split_gini_index = cls._calculate_gini_index(left_num, class_num_left)
-        right_split_gini_index = cls._calculate_gini_index(right_num, class_num_right)
-        children_gini_index = ((left_num * left_split_gini_index
-                                + right_num * right_split_gini_index)
-                               / (left_num + right_num))
-        return children_gini_index
-
-    @classmethod
-    def _two_class_trick(cls, class_index_num_samples, superclass_index_num_samples, values_seen,
-                         contingency_table, values_num_samples, superclass_contingency_table,
-                         num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_superclass_indices(superclass_index_num_samples):
-            # TESTED!
-            first_non_empty_superclass = None
-            second_non_empty_superclass = None
-            for superclass_index, superclass_num_samples in enumerate(superclass_index_num_samples):
-                if superclass_num_samples > 0:
-                    if first_non_empty_superclass is None:
-                        first_non_empty_superclass = superclass_index
-                    else:
-                        second_non_empty_superclass = superclass_index
-                        break
-            return first_non_empty_superclass, second_non_empty_superclass
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples,
-                                         superclass_contingency_table, non_empty_class_indices):
-            # TESTED!
-            value_class_ratio = [] # [(value, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = superclass_contingency_table[
-                    curr_value][second_class_index]
-                value_class_ratio.append(
-                    (curr_value, number_second_non_empty / values_num_samples[curr_value]))
-            value_class_ratio.sort(key=lambda tup: tup[1])
-            return value_class_ratio
-
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_superclass,
-         second_non_empty_superclass) = _get_non_empty_superclass_indices(
-             superclass_index_num_samples)
-        if first_non_empty_superclass is None or second_non_empty_superclass is None:
-            return (float('+inf'), {0}, set())
-
-        value_class_ratio = _calculate_value_class_ratio(values_seen,
-                                                         values_num_samples,
-                                                         superclass_contingency_table,
-                                                         (first_non_empty_superclass,
-                                                          second_non_empty_superclass))
-
-        best_split_children_gini_gain = float('+inf')
-        best_last_left_index = 0
-
-        num_right_samples = num_total_valid_samples
-        class_num_right = np.copy(class_index_num_samples)
-        num_left_samples = 0
-        class_num_left = np.zeros(class_num_right.shape, dtype=int)
-
-        for last_left_index, (last_left_value, _) in enumerate(value_class_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            num_left_samples += num_samples_last_left_value
-            num_right_samples -= num_samples_last_left_value
-            class_num_left += contingency_table[last_left_value]
-            class_num_right -= contingency_table[last_left_value]
-
-            curr_children_gini_index = cls._calculate_children_gini_index(num_left_samples,
-                                                                          class_num_left,
-                                                                          num_right_samples,
-                                                                          class_num_right)
-            if curr_children_gini_index < best_split_children_gini_gain:
-                best_split_children_gini_gain = curr_children_gini_index
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set(tup[0] for tup in value_class_ratio[:best_last_left_index + 1])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_children_gini_gain, set_left_values, set_right_values)
+    def _solve_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_left_samples = first_right_indices
+        num_right_samples = len(sorted_values) - first_right_indices
+        # Classes are subtracted one at a time, in class order.
+        left_gini = np.ones(first_right_indices.shape, dtype=float)
+        right_gini = np.ones(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_gini -= (class_num_left[:, class_index] / num_left_samples) ** 2
+            right_gini -= (class_num_right[:, class_index] / num_right_samples) ** 2
+        gini_values = ((num_left_samples * left_gini + num_right_samples * right_gini)
+                       / len(sorted_values))
+        return _get_best_numeric_split(sorted_values, first_right_indices, gini_values,
+                                       maximize=False)
 
 
 
@@ -4152,7 +3703,6 @@ class ConditionalInferenceTreeHypercubeCover(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -4161,59 +3711,39 @@ class ConditionalInferenceTreeHypercubeCover(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
-            best_children_gini_gain = float('+inf')
-            best_left_values = set()
-            best_right_values = set()
-            values_seen = cls._get_values_seen(
-                tree_node.contingency_tables[best_split.attrib_index].values_num_samples)
-            for (set_left_classes,
-                 set_right_classes) in cls._generate_superclasses(
-                     tree_node.class_index_num_samples):
-                (superclass_contingency_table,
-                 superclass_index_num_samples) = cls._get_superclass_contingency_table(
-                     tree_node.contingency_tables[best_split.attrib_index].contingency_table,
-                     tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
-                     set_left_classes,
-                     set_right_classes)
-                (curr_gini_gain,
-                 left_values,
-                 right_values) = cls._two_class_trick(
-                     tree_node.class_index_num_samples,
-                     superclass_index_num_samples,
-                     values_seen,
-                     tree_node.contingency_tables[best_split.attrib_index].contingency_table,
-                     tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
-                     superclass_contingency_table,
-                     len(tree_node.valid_samples_indices))
-                if curr_gini_gain < best_children_gini_gain:
-                    best_children_gini_gain = curr_gini_gain
-                    best_left_values = left_values
-                    best_right_values = right_values
+            (_,
+             best_left_values,
+             best_right_values) = _two_class_trick(
+                 tree_node.contingency_tables[best_split.attrib_index].contingency_table,
+                 tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
+                 _get_superclasses_indicator(tree_node.class_index_num_samples),
+                 impurity='gini')
             return Split(attrib_index=best_split.attrib_index,
                          splits_values=[best_left_values, best_right_values],
                          criterion_value=best_split.criterion_value)
@@ -4312,147 +3842,6 @@ class ConditionalInferenceTreeHypercubeCover(Criterion):
         c_quad = np.dot(temp_diff, np.dot(sigma_j_pinv, temp_diff.transpose()))
         return scipy.stats.chi2.cdf(x=c_quad, df=sigma_j_rank)
 
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _generate_superclasses(class_index_num_samples):
-        # We only need to look at superclasses of up to (len(class_index_num_samples)/2 + 1)
-        # elements because of symmetry! The subsets we are not choosing are complements of the ones
-        # chosen.
-        non_empty_classes = set([])
-        for class_index, class_num_samples in enumerate(class_index_num_samples):
-            if class_num_samples > 0:
-                non_empty_classes.add(class_index)
-        number_non_empty_classes = len(non_empty_classes)
-
-        for left_classes in itertools.chain.from_iterable(
-                itertools.combinations(non_empty_classes, size_left_superclass)
-                for size_left_superclass in range(1, number_non_empty_classes // 2 + 1)):
-            set_left_classes = set(left_classes)
-            set_right_classes = non_empty_classes - set_left_classes
-            if not set_left_classes or not set_right_classes:
-                # A valid split must have at least one sample in each side
-                continue
-            yield set_left_classes, set_right_classes
-
-    @staticmethod
-    def _get_superclass_contingency_table(contingency_table, values_num_samples, set_left_classes,
-                                          set_right_classes):
-        superclass_contingency_table = np.zeros((contingency_table.shape[0], 2), dtype=float)
-        superclass_index_num_samples = [0, 0]
-        for value, value_num_samples in enumerate(values_num_samples):
-            if value_num_samples == 0:
-                continue
-            for class_index in set_left_classes:
-                superclass_index_num_samples[0] += contingency_table[value][class_index]
-                superclass_contingency_table[value][0] += contingency_table[value][class_index]
-            for class_index in set_right_classes:
-                superclass_index_num_samples[1] += contingency_table[value][class_index]
-                superclass_contingency_table[value][1] += contingency_table[value][class_index]
-        return superclass_contingency_table, superclass_index_num_samples
-
-    @staticmethod
-    def _calculate_gini_index(side_num, class_num_side):
-        gini_index = 1.0
-        for curr_class_num_side in class_num_side:
-            if curr_class_num_side > 0:
-                gini_index -= (curr_class_num_side / side_num) ** 2
-        return gini_index
-
-    @classmethod
-    def _calculate_children_gini_index(cls, left_num, class_num_left, right_num, class_num_right):
-        left_split_gini_index = cls._calculate_gini_index(left_num, class_num_left)
-        right_split_gini_index = cls._calculate_gini_index(right_num, class_num_right)
-        children_gini_index = ((left_num * left_split_gini_index
-                                + right_num * right_split_gini_index)
-                               / (left_num + right_num))
-        return children_gini_index
-
-    @classmethod
-    def _two_class_trick(cls, class_index_num_samples, superclass_index_num_samples, values_seen,
-                         contingency_table, values_num_samples, superclass_contingency_table,
-                         num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_superclass_indices(superclass_index_num_samples):
-            # TESTED!
-            first_non_empty_superclass = None
-            second_non_empty_superclass = None
-            for superclass_index, superclass_num_samples in enumerate(superclass_index_num_samples):
-                if superclass_num_samples > 0:
-                    if first_non_empty_superclass is None:
-                        first_non_empty_superclass = superclass_index
-                    else:
-                        second_non_empty_superclass = superclass_index
-                        break
-            return first_non_empty_superclass, second_non_empty_superclass
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples,
-                                         superclass_contingency_table, non_empty_class_indices):
-            # TESTED!
-            value_class_ratio = [] # [(value, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = superclass_contingency_table[
-                    curr_value][second_class_index]
-                value_class_ratio.append(
-                    (curr_value, number_second_non_empty / values_num_samples[curr_value]))
-            value_class_ratio.sort(key=lambda tup: tup[1])
-            return value_class_ratio
-
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_superclass,
-         second_non_empty_superclass) = _get_non_empty_superclass_indices(
-             superclass_index_num_samples)
-        if first_non_empty_superclass is None or second_non_empty_superclass is None:
-            return (float('+inf'), {0}, set())
-
-        value_class_ratio = _calculate_value_class_ratio(values_seen,
-                                                         values_num_samples,
-                                                         superclass_contingency_table,
-                                                         (first_non_empty_superclass,
-                                                          second_non_empty_superclass))
-
-        best_split_children_gini_gain = float('+inf')
-        best_last_left_index = 0
-
-        num_right_samples = num_total_valid_samples
-        class_num_right = np.copy(class_index_num_samples)
-        num_left_samples = 0
-        class_num_left = np.zeros(class_num_right.shape, dtype=int)
-
-        for last_left_index, (last_left_value, _) in enumerate(value_class_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            num_left_samples += num_samples_last_left_value
-            num_right_samples -= num_samples_last_left_value
-            class_num_left += contingency_table[last_left_value]
-            class_num_right -= contingency_table[last_left_value]
-
-            curr_children_gini_index = cls._calculate_children_gini_index(num_left_samples,
-                                                                          class_num_left,
-                                                                          num_right_samples,
-                                                                          class_num_right)
-            if curr_children_gini_index < best_split_children_gini_gain:
-                best_split_children_gini_gain = curr_children_gini_index
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set(tup[0] for tup in value_class_ratio[:best_last_left_index + 1])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_children_gini_gain, set_left_values, set_right_values)
-
 
 
 #################################################################################################
@@ -4477,216 +3866,60 @@ class LargestClassAlone(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
-                values_seen = cls._get_values_seen(
-                    tree_node.contingency_tables[attrib_index].values_num_samples)
-                largest_class_index, _ = max(
-                    enumerate(tree_node.class_index_num_samples), key=lambda x: x[1])
-                (superclass_contingency_table,
-                 superclass_index_num_samples) = cls._get_superclass_contingency_table(
-                     tree_node.contingency_tables[attrib_index].contingency_table,
-                     tree_node.contingency_tables[attrib_index].values_num_samples,
-                     tree_node.class_index_num_samples,
-                     largest_class_index)
+        largest_class_alone_indicator = _get_largest_class_alone_indicator(
+            tree_node.class_index_num_samples)
+
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 (curr_gini_gain,
                  left_values,
-                 right_values) = cls._two_class_trick(
-                     tree_node.class_index_num_samples,
-                     superclass_index_num_samples,
-                     values_seen,
+                 right_values) = _two_class_trick(
                      tree_node.contingency_tables[attrib_index].contingency_table,
                      tree_node.contingency_tables[attrib_index].values_num_samples,
-                     superclass_contingency_table,
-                     len(tree_node.valid_samples_indices))
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_values, right_values],
-                          criterion_value=curr_gini_gain))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                     largest_class_alone_indicator,
+                     impurity='gini')
+                return Split(attrib_index=attrib_index,
+                             splits_values=[left_values, right_values],
+                             criterion_value=curr_gini_gain)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_gini,
                  last_left_value,
                  first_right_value) = cls._solve_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_gini))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_gini)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
 
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _get_superclass_contingency_table(contingency_table, values_num_samples,
-                                          class_index_num_samples, largest_classes_index):
-        superclass_contingency_table = np.array(
-            [contingency_table[:, largest_classes_index],
-             values_num_samples - contingency_table[:, largest_classes_index]
-            ]).T
-        superclass_index_num_samples = [
-            class_index_num_samples[largest_classes_index],
-            sum(class_index_num_samples) - class_index_num_samples[largest_classes_index]]
-        return superclass_contingency_table, superclass_index_num_samples
-
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
     @classmethod
-    def _solve_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_gini = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                gini_value = cls._calculate_children_gini_index(num_left_samples,
-                                                                class_num_left,
-                                                                num_right_samples,
-                                                                class_num_right)
-                if gini_value < best_gini:
-                    best_gini = gini_value
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_gini, best_last_left_value, best_first_right_value)
-
-    @staticmethod
-    def _calculate_gini_index(side_num, class_num_side):
-        gini_index = 1.0
-        for curr_class_num_side in class_num_side:
-            if curr_class_num_side > 0:
-                gini_index -= (curr_class_num_side / side_num) ** 2
-        return gini_index
-
-    @classmethod
-    def _calculate_children_gini_index(cls, left_num, class_num_left, right_num, class_num_right):
-        left_split_gini_index = cls._calculate_gini_index(left_num, class_num_left)
-        right_split_gini_index = cls._calculate_gini_index(right_num, class_num_right)
-        children_gini_index = ((left_num * left_split_gini_index
-                                + right_num * right_split_gini_index)
-                               / (left_num + right_num))
-        return children_gini_index
-
-    @classmethod
-    def _two_class_trick(cls, class_index_num_samples, superclass_index_num_samples, values_seen,
-                         contingency_table, values_num_samples, superclass_contingency_table,
-                         num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_superclass_indices(superclass_index_num_samples):
-            # TESTED!
-            first_non_empty_superclass = None
-            second_non_empty_superclass = None
-            for superclass_index, superclass_num_samples in enumerate(superclass_index_num_samples):
-                if superclass_num_samples > 0:
-                    if first_non_empty_superclass is None:
-                        first_non_empty_superclass = superclass_index
-                    else:
-                        second_non_empty_superclass = superclass_index
-                        break
-            return first_non_empty_superclass, second_non_empty_superclass
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples,
-                                         superclass_contingency_table, non_empty_class_indices):
-            # TESTED!
-            value_class_ratio = [] # [(value, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = superclass_contingency_table[
-                    curr_value][second_class_index]
-                value_class_ratio.append(
-                    (curr_value, number_second_non_empty / values_num_samples[curr_value]))
-            value_class_ratio.sort(key=lambda tup: tup[1])
-            return value_class_ratio
-
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_superclass,
-         second_non_empty_superclass) = _get_non_empty_superclass_indices(
-             superclass_index_num_samples)
-        if first_non_empty_superclass is None or second_non_empty_superclass is None:
-            return (float('+inf'), {0}, set())
-
-        value_class_ratio = _calculate_value_class_ratio(values_seen,
-                                                         values_num_samples,
-                                                         superclass_contingency_table,
-                                                         (first_non_empty_superclass,
-                                                          second_non_empty_superclass))
-
-        best_split_children_gini_gain = float('+inf')
-        best_last_left_index = 0
-
-        num_right_samples = num_total_valid_samples
-        class_num_right = np.copy(class_index_num_samples)
-        num_left_samples = 0
-        class_num_left = np.zeros(class_num_right.shape, dtype=int)
-
-        for last_left_index, (last_left_value, _) in enumerate(value_class_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            num_left_samples += num_samples_last_left_value
-            num_right_samples -= num_samples_last_left_value
-            class_num_left += contingency_table[last_left_value]
-            class_num_right -= contingency_table[last_left_value]
-
-            curr_children_gini_index = cls._calculate_children_gini_index(num_left_samples,
-                                                                          class_num_left,
-                                                                          num_right_samples,
-                                                                          class_num_right)
-            if curr_children_gini_index < best_split_children_gini_gain:
-                best_split_children_gini_gain = curr_children_gini_index
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set(tup[0] for tup in value_class_ratio[:best_last_left_index + 1])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_children_gini_gain, set_left_values, set_right_values)
+    def _solve_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_left_samples = first_right_indices
+        num_right_samples = len(sorted_values) - first_right_indices
+        # Classes are subtracted one at a time, in class order.
+        left_gini = np.ones(first_right_indices.shape, dtype=float)
+        right_gini = np.ones(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_gini -= (class_num_left[:, class_index] / num_left_samples) ** 2
+            right_gini -= (class_num_right[:, class_index] / num_right_samples) ** 2
+        gini_values = ((num_left_samples * left_gini + num_right_samples * right_gini)
+                       / len(sorted_values))
+        return _get_best_numeric_split(sorted_values, first_right_indices, gini_values,
+                                       maximize=False)
 
 
 
@@ -4719,7 +3952,6 @@ class ConditionalInferenceTreeLargestClassAlone(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
         use_chi2 = False
         for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
             if is_valid_attrib and cls._is_big_contingency_table(
@@ -4728,51 +3960,39 @@ class ConditionalInferenceTreeLargestClassAlone(Criterion):
                 use_chi2 = True
                 break
         if use_chi2: # Use Chi²-test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_chi2_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_chi2_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_chi2_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_chi2_cdf)
         else: # Use Conditional Inference Trees' test
-            for attrib_index, is_valid_attrib in enumerate(tree_node.valid_nominal_attribute):
-                if is_valid_attrib:
-                    curr_c_quad_cdf = cls._calculate_c_quad_cdf(
-                        tree_node.contingency_tables[attrib_index].contingency_table,
-                        tree_node.contingency_tables[attrib_index].values_num_samples,
-                        tree_node.class_index_num_samples,
-                        len(tree_node.valid_samples_indices))
-                    # Split will be calculated later
-                    best_splits_per_attrib.append(Split(attrib_index=attrib_index,
-                                                        splits_values=[],
-                                                        criterion_value=curr_c_quad_cdf))
+            def _get_attribute_split(attrib_index):
+                curr_c_quad_cdf = cls._calculate_c_quad_cdf(
+                    tree_node.contingency_tables[attrib_index].contingency_table,
+                    tree_node.contingency_tables[attrib_index].values_num_samples,
+                    tree_node.class_index_num_samples,
+                    tree_node.num_valid_samples)
+                # Split will be calculated later
+                return Split(attrib_index=attrib_index,
+                             splits_values=[],
+                             criterion_value=curr_c_quad_cdf)
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute)
         if best_splits_per_attrib:
             best_split = max(best_splits_per_attrib, key=lambda split: split.criterion_value)
-            values_seen = cls._get_values_seen(
-                tree_node.contingency_tables[best_split.attrib_index].values_num_samples)
-            largest_class_index, _ = max(
-                enumerate(tree_node.class_index_num_samples), key=lambda x: x[1])
-            (superclass_contingency_table,
-             superclass_index_num_samples) = cls._get_superclass_contingency_table(
-                 tree_node.contingency_tables[best_split.attrib_index].contingency_table,
-                 tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
-                 tree_node.class_index_num_samples,
-                 largest_class_index)
             (_,
              left_values,
-             right_values) = cls._two_class_trick(
-                 tree_node.class_index_num_samples,
-                 superclass_index_num_samples,
-                 values_seen,
+             right_values) = _two_class_trick(
                  tree_node.contingency_tables[best_split.attrib_index].contingency_table,
                  tree_node.contingency_tables[best_split.attrib_index].values_num_samples,
-                 superclass_contingency_table,
-                 len(tree_node.valid_samples_indices))
+                 _get_largest_class_alone_indicator(tree_node.class_index_num_samples),
+                 impurity='gini')
             return Split(attrib_index=best_split.attrib_index,
                          splits_values=[left_values, right_values],
                          criterion_value=best_split.criterion_value)
@@ -4871,122 +4091,6 @@ class ConditionalInferenceTreeLargestClassAlone(Criterion):
         c_quad = np.dot(temp_diff, np.dot(sigma_j_pinv, temp_diff.transpose()))
         return scipy.stats.chi2.cdf(x=c_quad, df=sigma_j_rank)
 
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _get_superclass_contingency_table(contingency_table, values_num_samples,
-                                          class_index_num_samples, largest_classes_index):
-        superclass_contingency_table = np.array(
-            [contingency_table[:, largest_classes_index],
-             values_num_samples - contingency_table[:, largest_classes_index]
-            ]).T
-        superclass_index_num_samples = [
-            class_index_num_samples[largest_classes_index],
-            sum(class_index_num_samples) - class_index_num_samples[largest_classes_index]]
-        return superclass_contingency_table, superclass_index_num_samples
-
-    @staticmethod
-    def _calculate_gini_index(side_num, class_num_side):
-        gini_index = 1.0
-        for curr_class_num_side in class_num_side:
-            if curr_class_num_side > 0:
-                gini_index -= (curr_class_num_side / side_num) ** 2
-        return gini_index
-
-    @classmethod
-    def _calculate_children_gini_index(cls, left_num, class_num_left, right_num, class_num_right):
-        left_split_gini_index = cls._calculate_gini_index(left_num, class_num_left)
-        right_split_gini_index = cls._calculate_gini_index(right_num, class_num_right)
-        children_gini_index = ((left_num * left_split_gini_index
-                                + right_num * right_split_gini_index)
-                               / (left_num + right_num))
-        return children_gini_index
-
-    @classmethod
-    def _two_class_trick(cls, class_index_num_samples, superclass_index_num_samples, values_seen,
-                         contingency_table, values_num_samples, superclass_contingency_table,
-                         num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_superclass_indices(superclass_index_num_samples):
-            # TESTED!
-            first_non_empty_superclass = None
-            second_non_empty_superclass = None
-            for superclass_index, superclass_num_samples in enumerate(superclass_index_num_samples):
-                if superclass_num_samples > 0:
-                    if first_non_empty_superclass is None:
-                        first_non_empty_superclass = superclass_index
-                    else:
-                        second_non_empty_superclass = superclass_index
-                        break
-            return first_non_empty_superclass, second_non_empty_superclass
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples,
-                                         superclass_contingency_table, non_empty_class_indices):
-            # TESTED!
-            value_class_ratio = [] # [(value, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = superclass_contingency_table[
-                    curr_value][second_class_index]
-                value_class_ratio.append(
-                    (curr_value, number_second_non_empty / values_num_samples[curr_value]))
-            value_class_ratio.sort(key=lambda tup: tup[1])
-            return value_class_ratio
-
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_superclass,
-         second_non_empty_superclass) = _get_non_empty_superclass_indices(
-             superclass_index_num_samples)
-        if first_non_empty_superclass is None or second_non_empty_superclass is None:
-            return (float('+inf'), {0}, set())
-
-        value_class_ratio = _calculate_value_class_ratio(values_seen,
-                                                         values_num_samples,
-                                                         superclass_contingency_table,
-                                                         (first_non_empty_superclass,
-                                                          second_non_empty_superclass))
-
-        best_split_children_gini_gain = float('+inf')
-        best_last_left_index = 0
-
-        num_right_samples = num_total_valid_samples
-        class_num_right = np.copy(class_index_num_samples)
-        num_left_samples = 0
-        class_num_left = np.zeros(class_num_right.shape, dtype=int)
-
-        for last_left_index, (last_left_value, _) in enumerate(value_class_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            num_left_samples += num_samples_last_left_value
-            num_right_samples -= num_samples_last_left_value
-            class_num_left += contingency_table[last_left_value]
-            class_num_right -= contingency_table[last_left_value]
-
-            curr_children_gini_index = cls._calculate_children_gini_index(num_left_samples,
-                                                                          class_num_left,
-                                                                          num_right_samples,
-                                                                          class_num_right)
-            if curr_children_gini_index < best_split_children_gini_gain:
-                best_split_children_gini_gain = curr_children_gini_index
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set(tup[0] for tup in value_class_ratio[:best_last_left_index + 1])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_children_gini_gain, set_left_values, set_right_values)
-
 
 
 #################################################################################################
@@ -5012,12 +4116,8 @@ class PCExtEntropy(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 contingency_table = tree_node.contingency_tables[attrib_index].contingency_table
                 values_num_samples = tree_node.contingency_tables[
                     attrib_index].values_num_samples
@@ -5025,7 +4125,7 @@ class PCExtEntropy(Criterion):
                  new_num_samples_per_value,
                  new_index_to_old) = cls._group_values(contingency_table, values_num_samples)
                 principal_component = cls._get_principal_component(
-                    len(tree_node.valid_samples_indices),
+                    tree_node.num_valid_samples,
                     new_contingency_table,
                     new_num_samples_per_value)
                 inner_product_results = np.dot(principal_component, new_contingency_table.T)
@@ -5071,25 +4171,26 @@ class PCExtEntropy(Criterion):
                  best_right_old_values) = cls._change_split_to_use_old_values(best_left_values,
                                                                               best_right_values,
                                                                               new_index_to_old)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[best_left_old_values, best_right_old_values],
-                          criterion_value=best_entropy))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                return Split(attrib_index=attrib_index,
+                             splits_values=[best_left_old_values, best_right_old_values],
+                             criterion_value=best_entropy)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_entropy,
                  last_left_value,
                  first_right_value) = cls._solve_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_entropy))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_entropy)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
@@ -5132,51 +4233,32 @@ class PCExtEntropy(Criterion):
                 information -= curr_frequency * math.log2(curr_frequency)
         return information
 
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
     @classmethod
-    def _solve_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_entropy = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                information_gain = cls._get_information_gain_value(class_num_left,
-                                                                   class_num_right,
-                                                                   num_left_samples,
-                                                                   num_right_samples)
-                if information_gain < best_entropy:
-                    best_entropy = information_gain
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_entropy, best_last_left_value, best_first_right_value)
+    def _solve_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_samples = len(sorted_values)
+        num_left_samples = first_right_indices
+        num_right_samples = num_samples - first_right_indices
+        # Classes are added one at a time, in the same order as `_calculate_node_information`.
+        # Empty classes have frequency 1 in the logarithm, so that they add nothing.
+        left_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        right_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_frequency = class_num_left[:, class_index] / num_left_samples
+            left_entropy -= left_frequency * np.log2(np.where(left_frequency > 0.0,
+                                                              left_frequency,
+                                                              1.0))
+            right_frequency = class_num_right[:, class_index] / num_right_samples
+            right_entropy -= right_frequency * np.log2(np.where(right_frequency > 0.0,
+                                                                right_frequency,
+                                                                1.0))
+        information_gains = ((num_left_samples / num_samples) * left_entropy +
+                             (num_right_samples / num_samples) * right_entropy)
+        return _get_best_numeric_split(sorted_values, first_right_indices, information_gains,
+                                       maximize=False)
 
     @staticmethod
     def _get_num_samples_per_side(values_num_samples, left_values, right_values):
@@ -5307,256 +4389,67 @@ class HypercubeCoverEntropy(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
-                best_entropy = float('+inf')
-                best_left_values = set()
-                best_right_values = set()
-                values_seen = cls._get_values_seen(
-                    tree_node.contingency_tables[attrib_index].values_num_samples)
-                for (set_left_classes,
-                     set_right_classes) in cls._generate_superclasses(
-                         tree_node.class_index_num_samples):
-                    (superclass_contingency_table,
-                     superclass_index_num_samples) = cls._get_superclass_contingency_table(
-                         tree_node.contingency_tables[attrib_index].contingency_table,
-                         tree_node.contingency_tables[attrib_index].values_num_samples,
-                         set_left_classes,
-                         set_right_classes)
-                    (curr_entropy,
-                     left_values,
-                     right_values) = cls._two_class_trick(
-                         tree_node.class_index_num_samples,
-                         superclass_index_num_samples,
-                         values_seen,
-                         tree_node.contingency_tables[attrib_index].contingency_table,
-                         tree_node.contingency_tables[attrib_index].values_num_samples,
-                         superclass_contingency_table,
-                         len(tree_node.valid_samples_indices))
-
-                    if curr_entropy < best_entropy:
-                        best_entropy = curr_entropy
-                        best_left_values = left_values
-                        best_right_values = right_values
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[best_left_values, best_right_values],
-                          criterion_value=best_entropy))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+        superclasses_indicator = _get_superclasses_indicator(tree_node.class_index_num_samples)
+
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
+                (best_entropy,
+                 best_left_values,
+                 best_right_values) = _two_class_trick(
+                     tree_node.contingency_tables[attrib_index].contingency_table,
+                     tree_node.contingency_tables[attrib_index].values_num_samples,
+                     superclasses_indicator,
+                     impurity='entropy')
+                return Split(attrib_index=attrib_index,
+                             splits_values=[best_left_values, best_right_values],
+                             criterion_value=best_entropy)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_entropy,
                  last_left_value,
                  first_right_value) = cls._solve_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_entropy))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_entropy)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
 
     @classmethod
-    def _get_information_gain_value(cls, num_samples_per_class_left, num_samples_per_class_right,
-                                    num_left_samples, num_right_samples):
-        """Calculates the weighted Information Gain of a split."""
-        num_samples = num_left_samples + num_right_samples
-        left_entropy = cls._calculate_node_information(
-            num_left_samples, num_samples_per_class_left)
-        right_entropy = cls._calculate_node_information(
-            num_right_samples, num_samples_per_class_right)
-        split_information_gain = ((num_left_samples / num_samples) * left_entropy +
-                                  (num_right_samples / num_samples) * right_entropy)
-        return split_information_gain
-
-    @classmethod
-    def _calculate_node_information(cls, num_split_samples, num_samples_per_class_in_split):
-        """Calculates the Information of the node given by the values."""
-        information = 0.0
-        for curr_class_num_samples in num_samples_per_class_in_split:
-            if curr_class_num_samples != 0:
-                curr_frequency = curr_class_num_samples / num_split_samples
-                information -= curr_frequency * math.log2(curr_frequency)
-        return information
-
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
-    @staticmethod
-    def _generate_superclasses(class_index_num_samples):
-        # We only need to look at superclasses of up to (len(class_index_num_samples)/2 + 1)
-        # elements because of symmetry! The subsets we are not choosing are complements of the ones
-        # chosen.
-        non_empty_classes = set([])
-        for class_index, class_num_samples in enumerate(class_index_num_samples):
-            if class_num_samples > 0:
-                non_empty_classes.add(class_index)
-        number_non_empty_classes = len(non_empty_classes)
-
-        for left_classes in itertools.chain.from_iterable(
-                itertools.combinations(non_empty_classes, size_left_superclass)
-                for size_left_superclass in range(1, number_non_empty_classes // 2 + 1)):
-            set_left_classes = set(left_classes)
-            set_right_classes = non_empty_classes - set_left_classes
-            if not set_left_classes or not set_right_classes:
-                # A valid split must have at least one sample in each side
-                continue
-            yield set_left_classes, set_right_classes
-
-    @staticmethod
-    def _get_superclass_contingency_table(contingency_table, values_num_samples, set_left_classes,
-                                          set_right_classes):
-        superclass_contingency_table = np.zeros((contingency_table.shape[0], 2), dtype=float)
-        superclass_index_num_samples = [0, 0]
-        for value, value_num_samples in enumerate(values_num_samples):
-            if value_num_samples == 0:
-                continue
-            for class_index in set_left_classes:
-                superclass_index_num_samples[0] += contingency_table[value][class_index]
-                superclass_contingency_table[value][0] += contingency_table[value][class_index]
-            for class_index in set_right_classes:
-                superclass_index_num_samples[1] += contingency_table[value][class_index]
-                superclass_contingency_table[value][1] += contingency_table[value][class_index]
-        return superclass_contingency_table, superclass_index_num_samples
-
-    @classmethod
-    def _solve_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_entropy = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                information_gain = cls._get_information_gain_value(class_num_left,
-                                                                   class_num_right,
-                                                                   num_left_samples,
-                                                                   num_right_samples)
-                if information_gain < best_entropy:
-                    best_entropy = information_gain
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_entropy, best_last_left_value, best_first_right_value)
-
-    @classmethod
-    def _two_class_trick(cls, class_index_num_samples, superclass_index_num_samples, values_seen,
-                         contingency_table, values_num_samples, superclass_contingency_table,
-                         num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_superclass_indices(superclass_index_num_samples):
-            # TESTED!
-            first_non_empty_superclass = None
-            second_non_empty_superclass = None
-            for superclass_index, superclass_num_samples in enumerate(superclass_index_num_samples):
-                if superclass_num_samples > 0:
-                    if first_non_empty_superclass is None:
-                        first_non_empty_superclass = superclass_index
-                    else:
-                        second_non_empty_superclass = superclass_index
-                        break
-            return first_non_empty_superclass, second_non_empty_superclass
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples,
-                                         superclass_contingency_table, non_empty_class_indices):
-            # TESTED!
-            value_class_ratio = [] # [(value, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = superclass_contingency_table[
-                    curr_value][second_class_index]
-                value_class_ratio.append(
-                    (curr_value, number_second_non_empty / values_num_samples[curr_value]))
-            value_class_ratio.sort(key=lambda tup: tup[1])
-            return value_class_ratio
-
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_superclass,
-         second_non_empty_superclass) = _get_non_empty_superclass_indices(
-             superclass_index_num_samples)
-        if first_non_empty_superclass is None or second_non_empty_superclass is None:
-            return (float('+inf'), {0}, set())
-
-        value_class_ratio = _calculate_value_class_ratio(values_seen,
-                                                         values_num_samples,
-                                                         superclass_contingency_table,
-                                                         (first_non_empty_superclass,
-                                                          second_non_empty_superclass))
-
-        best_split_entropy = float('+inf')
-        best_last_left_index = 0
-
-        num_right_samples = num_total_valid_samples
-        class_num_right = np.copy(class_index_num_samples)
-        num_left_samples = 0
-        class_num_left = np.zeros(class_num_right.shape, dtype=int)
-
-        for last_left_index, (last_left_value, _) in enumerate(value_class_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            num_left_samples += num_samples_last_left_value
-            num_right_samples -= num_samples_last_left_value
-            class_num_left += contingency_table[last_left_value]
-            class_num_right -= contingency_table[last_left_value]
-
-            curr_information_gain = cls._get_information_gain_value(class_num_left,
-                                                                    class_num_right,
-                                                                    num_left_samples,
-                                                                    num_right_samples)
-            if curr_information_gain < best_split_entropy:
-                best_split_entropy = curr_information_gain
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set(tup[0] for tup in value_class_ratio[:best_last_left_index + 1])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_entropy, set_left_values, set_right_values)
+    def _solve_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_samples = len(sorted_values)
+        num_left_samples = first_right_indices
+        num_right_samples = num_samples - first_right_indices
+        # Classes are added one at a time, in class order. Empty classes have frequency 1 in the
+        # logarithm, so that they add nothing.
+        left_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        right_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_frequency = class_num_left[:, class_index] / num_left_samples
+            left_entropy -= left_frequency * np.log2(np.where(left_frequency > 0.0,
+                                                              left_frequency,
+                                                              1.0))
+            right_frequency = class_num_right[:, class_index] / num_right_samples
+            right_entropy -= right_frequency * np.log2(np.where(right_frequency > 0.0,
+                                                                right_frequency,
+                                                                1.0))
+        information_gains = ((num_left_samples / num_samples) * left_entropy +
+                             (num_right_samples / num_samples) * right_entropy)
+        return _get_best_numeric_split(sorted_values, first_right_indices, information_gains,
+                                       maximize=False)
 
 
 
@@ -5582,222 +4475,68 @@ class LargestClassAloneEntropy(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
-                values_seen = cls._get_values_seen(
-                    tree_node.contingency_tables[attrib_index].values_num_samples)
-                largest_class_index, _ = max(
-                    enumerate(tree_node.class_index_num_samples), key=lambda x: x[1])
-                (superclass_contingency_table,
-                 superclass_index_num_samples) = cls._get_superclass_contingency_table(
-                     tree_node.contingency_tables[attrib_index].contingency_table,
-                     tree_node.contingency_tables[attrib_index].values_num_samples,
-                     tree_node.class_index_num_samples,
-                     largest_class_index)
+        largest_class_alone_indicator = _get_largest_class_alone_indicator(
+            tree_node.class_index_num_samples)
+
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 (best_entropy,
                  left_values,
-                 right_values) = cls._two_class_trick(
-                     tree_node.class_index_num_samples,
-                     superclass_index_num_samples,
-                     values_seen,
+                 right_values) = _two_class_trick(
                      tree_node.contingency_tables[attrib_index].contingency_table,
                      tree_node.contingency_tables[attrib_index].values_num_samples,
-                     superclass_contingency_table,
-                     len(tree_node.valid_samples_indices))
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_values, right_values],
-                          criterion_value=best_entropy))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                     largest_class_alone_indicator,
+                     impurity='entropy')
+                return Split(attrib_index=attrib_index,
+                             splits_values=[left_values, right_values],
+                             criterion_value=best_entropy)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_entropy,
                  last_left_value,
                  first_right_value) = cls._solve_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_entropy))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_entropy)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
 
     @classmethod
-    def _get_information_gain_value(cls, num_samples_per_class_left, num_samples_per_class_right,
-                                    num_left_samples, num_right_samples):
-        """Calculates the weighted Information Gain of a split."""
-        num_samples = num_left_samples + num_right_samples
-        left_entropy = cls._calculate_node_information(
-            num_left_samples, num_samples_per_class_left)
-        right_entropy = cls._calculate_node_information(
-            num_right_samples, num_samples_per_class_right)
-        split_information_gain = ((num_left_samples / num_samples) * left_entropy +
-                                  (num_right_samples / num_samples) * right_entropy)
-        return split_information_gain
-
-    @classmethod
-    def _calculate_node_information(cls, num_split_samples, num_samples_per_class_in_split):
-        """Calculates the Information of the node given by the values."""
-        information = 0.0
-        for curr_class_num_samples in num_samples_per_class_in_split:
-            if curr_class_num_samples != 0:
-                curr_frequency = curr_class_num_samples / num_split_samples
-                information -= curr_frequency * math.log2(curr_frequency)
-        return information
-
-    @staticmethod
-    def _get_values_seen(values_num_samples):
-        values_seen = set()
-        for value, num_samples in enumerate(values_num_samples):
-            if num_samples > 0:
-                values_seen.add(value)
-        return values_seen
-
-    @staticmethod
-    def _get_superclass_contingency_table(contingency_table, values_num_samples,
-                                          class_index_num_samples, largest_classes_index):
-        superclass_contingency_table = np.array(
-            [contingency_table[:, largest_classes_index],
-             values_num_samples - contingency_table[:, largest_classes_index]
-            ]).T
-        superclass_index_num_samples = [
-            class_index_num_samples[largest_classes_index],
-            sum(class_index_num_samples) - class_index_num_samples[largest_classes_index]]
-        return superclass_contingency_table, superclass_index_num_samples
-
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
-    @classmethod
-    def _solve_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_entropy = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                information_gain = cls._get_information_gain_value(class_num_left,
-                                                                   class_num_right,
-                                                                   num_left_samples,
-                                                                   num_right_samples)
-                if information_gain < best_entropy:
-                    best_entropy = information_gain
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_entropy, best_last_left_value, best_first_right_value)
-
-    @classmethod
-    def _two_class_trick(cls, class_index_num_samples, superclass_index_num_samples, values_seen,
-                         contingency_table, values_num_samples, superclass_contingency_table,
-                         num_total_valid_samples):
-        # TESTED!
-        def _get_non_empty_superclass_indices(superclass_index_num_samples):
-            # TESTED!
-            first_non_empty_superclass = None
-            second_non_empty_superclass = None
-            for superclass_index, superclass_num_samples in enumerate(superclass_index_num_samples):
-                if superclass_num_samples > 0:
-                    if first_non_empty_superclass is None:
-                        first_non_empty_superclass = superclass_index
-                    else:
-                        second_non_empty_superclass = superclass_index
-                        break
-            return first_non_empty_superclass, second_non_empty_superclass
-
-        def _calculate_value_class_ratio(values_seen, values_num_samples,
-                                         superclass_contingency_table, non_empty_class_indices):
-            # TESTED!
-            value_class_ratio = [] # [(value, ratio_on_second_class)]
-            second_class_index = non_empty_class_indices[1]
-            for curr_value in values_seen:
-                number_second_non_empty = superclass_contingency_table[
-                    curr_value][second_class_index]
-                value_class_ratio.append(
-                    (curr_value, number_second_non_empty / values_num_samples[curr_value]))
-            value_class_ratio.sort(key=lambda tup: tup[1])
-            return value_class_ratio
-
-
-        # We only need to sort values by the percentage of samples in second non-empty class with
-        # this value. The best split will be given by choosing an index to split this list of
-        # values in two.
-        (first_non_empty_superclass,
-         second_non_empty_superclass) = _get_non_empty_superclass_indices(
-             superclass_index_num_samples)
-        if first_non_empty_superclass is None or second_non_empty_superclass is None:
-            return (float('+inf'), {0}, set())
-
-        value_class_ratio = _calculate_value_class_ratio(values_seen,
-                                                         values_num_samples,
-                                                         superclass_contingency_table,
-                                                         (first_non_empty_superclass,
-                                                          second_non_empty_superclass))
-
-        best_split_entropy = float('+inf')
-        best_last_left_index = 0
-
-        num_right_samples = num_total_valid_samples
-        class_num_right = np.copy(class_index_num_samples)
-        num_left_samples = 0
-        class_num_left = np.zeros(class_num_right.shape, dtype=int)
-
-        for last_left_index, (last_left_value, _) in enumerate(value_class_ratio[:-1]):
-            num_samples_last_left_value = values_num_samples[last_left_value]
-            # num_samples_last_left_value > 0 always, since the values without samples were not
-            # added to the values_seen when created by cls._generate_value_to_index
-
-            num_left_samples += num_samples_last_left_value
-            num_right_samples -= num_samples_last_left_value
-            class_num_left += contingency_table[last_left_value]
-            class_num_right -= contingency_table[last_left_value]
-
-            curr_information_gain = cls._get_information_gain_value(class_num_left,
-                                                                    class_num_right,
-                                                                    num_left_samples,
-                                                                    num_right_samples)
-            if curr_information_gain < best_split_entropy:
-                best_split_entropy = curr_information_gain
-                best_last_left_index = last_left_index
-
-        # Let's get the values and split the indices corresponding to the best split found.
-        set_left_values = set(tup[0] for tup in value_class_ratio[:best_last_left_index + 1])
-        set_right_values = set(values_seen) - set_left_values
-
-        return (best_split_entropy, set_left_values, set_right_values)
+    def _solve_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_samples = len(sorted_values)
+        num_left_samples = first_right_indices
+        num_right_samples = num_samples - first_right_indices
+        # Classes are added one at a time, in class order. Empty classes have frequency 1 in the
+        # logarithm, so that they add nothing.
+        left_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        right_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_frequency = class_num_left[:, class_index] / num_left_samples
+            left_entropy -= left_frequency * np.log2(np.where(left_frequency > 0.0,
+                                                              left_frequency,
+                                                              1.0))
+            right_frequency = class_num_right[:, class_index] / num_right_samples
+            right_entropy -= right_frequency * np.log2(np.where(right_frequency > 0.0,
+                                                                right_frequency,
+                                                                1.0))
+        information_gains = ((num_left_samples / num_samples) * left_entropy +
+                             (num_right_samples / num_samples) * right_entropy)
+        return _get_best_numeric_split(sorted_values, first_right_indices, information_gains,
+                                       maximize=False)
 
 
 
@@ -5822,12 +4561,8 @@ class SliqExt(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 values_seen = cls._get_values_seen(
                     tree_node.contingency_tables[attrib_index].values_num_samples)
                 (best_gini,
@@ -5836,25 +4571,26 @@ class SliqExt(Criterion):
                      values_seen,
                      tree_node.contingency_tables[attrib_index].contingency_table,
                      tree_node.contingency_tables[attrib_index].values_num_samples)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_values, right_values],
-                          criterion_value=best_gini))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                return Split(attrib_index=attrib_index,
+                             splits_values=[left_values, right_values],
+                             criterion_value=best_gini)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_gini,
                  last_left_value,
                  first_right_value) = cls._solve_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_gini))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_gini)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
@@ -5918,14 +4654,6 @@ class SliqExt(Criterion):
                 values_seen.add(value)
         return values_seen
 
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
     @classmethod
     def _get_best_attribute_split(cls, values_seen, contingency_table, num_samples_per_value):
         """Gets the attribute's best split according to the SLIQ-ext criterion."""
@@ -5958,42 +4686,24 @@ class SliqExt(Criterion):
         return best_gini, best_left_values, best_right_values
 
     @classmethod
-    def _solve_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_gini = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                gini_value = cls._get_gini_value(class_num_left,
-                                                 class_num_right,
-                                                 num_left_samples,
-                                                 num_right_samples)
-                if gini_value < best_gini:
-                    best_gini = gini_value
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_gini, best_last_left_value, best_first_right_value)
+    def _solve_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_samples = len(sorted_values)
+        num_left_samples = first_right_indices
+        num_right_samples = num_samples - first_right_indices
+        # Classes are subtracted one at a time, in the same order as `_get_gini_value`.
+        left_gini = np.ones(first_right_indices.shape, dtype=float)
+        right_gini = np.ones(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_gini -= (class_num_left[:, class_index] / num_left_samples)**2
+            right_gini -= (class_num_right[:, class_index] / num_right_samples)**2
+        gini_values = ((num_left_samples / num_samples) * left_gini +
+                       (num_right_samples / num_samples) * right_gini)
+        return _get_best_numeric_split(sorted_values, first_right_indices, gini_values,
+                                       maximize=False)
 
 
 
@@ -6018,12 +4728,8 @@ class SliqExtEntropy(Criterion):
 
         Returns the best split found.
         """
-        best_splits_per_attrib = []
-        for (attrib_index,
-             (is_valid_nominal_attrib,
-              is_valid_numeric_attrib)) in enumerate(zip(tree_node.valid_nominal_attribute,
-                                                         tree_node.valid_numeric_attribute)):
-            if is_valid_nominal_attrib:
+        def _get_attribute_split(attrib_index):
+            if tree_node.valid_nominal_attribute[attrib_index]:
                 values_seen = cls._get_values_seen(
                     tree_node.contingency_tables[attrib_index].values_num_samples)
                 (best_entropy,
@@ -6032,25 +4738,26 @@ class SliqExtEntropy(Criterion):
                      values_seen,
                      tree_node.contingency_tables[attrib_index].contingency_table,
                      tree_node.contingency_tables[attrib_index].values_num_samples)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[left_values, right_values],
-                          criterion_value=best_entropy))
-            elif is_valid_numeric_attrib:
-                values_and_classes = cls._get_numeric_values_seen(tree_node.valid_samples_indices,
-                                                                  tree_node.dataset.samples,
-                                                                  tree_node.dataset.sample_class,
-                                                                  attrib_index)
-                values_and_classes.sort()
+                return Split(attrib_index=attrib_index,
+                             splits_values=[left_values, right_values],
+                             criterion_value=best_entropy)
+            elif tree_node.valid_numeric_attribute[attrib_index]:
+                (sorted_values,
+                 sorted_classes) = tree_node.get_sorted_numeric_values_and_classes(attrib_index)
                 (best_entropy,
                  last_left_value,
                  first_right_value) = cls._solve_for_numeric(
-                     values_and_classes,
+                     sorted_values,
+                     sorted_classes,
                      tree_node.dataset.num_classes)
-                best_splits_per_attrib.append(
-                    Split(attrib_index=attrib_index,
-                          splits_values=[{last_left_value}, {first_right_value}],
-                          criterion_value=best_entropy))
+                return Split(attrib_index=attrib_index,
+                             splits_values=[{last_left_value}, {first_right_value}],
+                             criterion_value=best_entropy)
+
+        best_splits_per_attrib = cls._evaluate_attributes(
+            _get_attribute_split,
+            tree_node.valid_nominal_attribute,
+            tree_node.valid_numeric_attribute)
         if best_splits_per_attrib:
             return min(best_splits_per_attrib, key=lambda split: split.criterion_value)
         return Split()
@@ -6119,14 +4826,6 @@ class SliqExtEntropy(Criterion):
                 values_seen.add(value)
         return values_seen
 
-    @staticmethod
-    def _get_numeric_values_seen(valid_samples_indices, sample, sample_class, attrib_index):
-        values_and_classes = []
-        for sample_index in valid_samples_indices:
-            sample_value = sample[sample_index][attrib_index]
-            values_and_classes.append((sample_value, sample_class[sample_index]))
-        return values_and_classes
-
     @classmethod
     def _get_best_attribute_split(cls, values_seen, contingency_table, num_samples_per_value):
         """Gets the attribute's best split according to the SLIQ-ext criterion."""
@@ -6159,39 +4858,28 @@ class SliqExtEntropy(Criterion):
         return best_entropy, best_left_values, best_right_values
 
     @classmethod
-    def _solve_for_numeric(cls, sorted_values_and_classes, num_classes):
-        last_left_value = sorted_values_and_classes[0][0]
-        num_left_samples = 1
-        num_right_samples = len(sorted_values_and_classes) - 1
-
-        class_num_left = [0] * num_classes
-        class_num_left[sorted_values_and_classes[0][1]] = 1
-
-        class_num_right = [0] * num_classes
-        for _, sample_class in sorted_values_and_classes[1:]:
-            class_num_right[sample_class] += 1
-
-        best_entropy = float('+inf')
-        best_last_left_value = None
-        best_first_right_value = None
-
-        for first_right_index in range(1, len(sorted_values_and_classes)):
-            first_right_value = sorted_values_and_classes[first_right_index][0]
-            if first_right_value != last_left_value:
-                information_gain = cls._get_information_gain_value(class_num_left,
-                                                                   class_num_right,
-                                                                   num_left_samples,
-                                                                   num_right_samples)
-                if information_gain < best_entropy:
-                    best_entropy = information_gain
-                    best_last_left_value = last_left_value
-                    best_first_right_value = first_right_value
-
-                last_left_value = first_right_value
-
-            num_left_samples += 1
-            num_right_samples -= 1
-            first_right_class = sorted_values_and_classes[first_right_index][1]
-            class_num_left[first_right_class] += 1
-            class_num_right[first_right_class] -= 1
-        return (best_entropy, best_last_left_value, best_first_right_value)
+    def _solve_for_numeric(cls, sorted_values, sorted_classes, num_classes):
+        (first_right_indices,
+         class_num_left,
+         class_num_right) = _get_numeric_candidate_splits(sorted_values, sorted_classes,
+                                                          num_classes)
+        num_samples = len(sorted_values)
+        num_left_samples = first_right_indices
+        num_right_samples = num_samples - first_right_indices
+        # Classes are added one at a time, in the same order as `_calculate_node_information`.
+        # Empty classes have frequency 1 in the logarithm, so that they add nothing.
+        left_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        right_entropy = np.zeros(first_right_indices.shape, dtype=float)
+        for class_index in range(num_classes):
+            left_frequency = class_num_left[:, class_index] / num_left_samples
+            left_entropy -= left_frequency * np.log2(np.where(left_frequency > 0.0,
+                                                              left_frequency,
+                                                              1.0))
+            right_frequency = class_num_right[:, class_index] / num_right_samples
+            right_entropy -= right_frequency * np.log2(np.where(right_frequency > 0.0,
+                                                                right_frequency,
+                                                                1.0))
+        information_gains = ((num_left_samples / num_samples) * left_entropy +
+                             (num_right_samples / num_samples) * right_entropy)
+        return _get_best_numeric_split(sorted_values, first_right_indices, information_gains,
+                                       maximize=False)
@@ -17,6 +17,7 @@ import numpy as np
 import criteria
 import dataset
 import decision_tree
+import logger
 
 
 
@@ -50,6 +51,11 @@ def main(experiment_config):
         else:
             starting_seed = experiment_config["starting seed index"]
 
+        if "num processes to load datasets" not in experiment_config:
+            num_processes_to_load_datasets = None
+        else:
+            num_processes_to_load_datasets = experiment_config["num processes to load datasets"]
+
         if experiment_config["prunning parameters"]["use chi-sq test"]:
             max_p_value_chi_sq = experiment_config["prunning parameters"]["max chi-sq p-value"]
             decision_tree.MIN_SAMPLES_IN_SECOND_MOST_FREQUENT_VALUE = experiment_config[
@@ -86,9 +92,9 @@ def main(experiment_config):
                                                dataset_config["missing value string"],
                                                experiment_config["use numeric attributes"])
                 for criterion in criteria_list:
-                    print('-'*100)
-                    print(criterion.name)
-                    print()
+                    logger.info('-'*100)
+                    logger.info(criterion.name)
+                    logger.info()
                     run(dataset_config["dataset name"],
                         curr_dataset,
                         criterion,
@@ -105,15 +111,16 @@ def main(experiment_config):
                         output_split_char=',')
         else:
             datasets = dataset.load_all_datasets(datasets_configs,
-                                                 experiment_config["use numeric attributes"])
+                                                 experiment_config["use numeric attributes"],
+                                                 num_processes_to_load_datasets)
             for ((dataset_name, curr_dataset),
                  min_num_samples_allowed) in itertools.product(
                      datasets,
                      experiment_config["prunning parameters"]["min num samples allowed"]):
                 for criterion in criteria_list:
-                    print('-'*100)
-                    print(criterion.name)
-                    print()
+                    logger.info('-'*100)
+                    logger.info(criterion.name)
+                    logger.info()
                     run(dataset_name,
                         curr_dataset,
                         criterion,
@@ -249,10 +256,10 @@ def run(dataset_name, train_dataset, criterion, min_num_samples_allowed, max_dep
         np.random.seed(seed)
 
     for trial_number in range(num_trials):
-        print('*'*80)
-        print('STARTING TRIAL #{} USING SEED #{}'.format(
+        logger.info('*'*80)
+        logger.info('STARTING TRIAL #{} USING SEED #{}'.format(
             trial_number + 1, starting_seed + trial_number))
-        print()
+        logger.info()
 
         if seed is None:
             random.seed(RANDOM_SEEDS[trial_number + starting_seed - 1])
@@ -2,15 +2,37 @@
 # -*- coding: utf-8 -*-
 
 """
-This module contains only the Dataset class.
+This module contains the Dataset class and the cost models used to evaluate misclassifications.
 """
 
+import abc
+import collections.abc
+import contextlib
 import copy
+import io
 import json
+import math
+import multiprocessing
+import operator
 import os
 import sys
 import timeit
 
+import numpy as np
+
+import logger
+
+
+#: Suffix appended to the dataset's CSV filepath to name the folder containing its binary cache.
+CACHE_FOLDER_SUFFIX = '.cache'
+#: Name of the file, inside the cache folder, containing the cache key and the dataset information
+#: that is not stored as arrays (vocabularies, validity flags, etc).
+CACHE_INFO_FILENAME = 'cache_info.json'
+#: Version of the binary cache format. Caches saved with a different version are ignored.
+CACHE_FORMAT_VERSION = 2
+#: Approximate number of characters read from the CSV file at a time when loading a dataset.
+CSV_CHUNK_SIZE = 1 << 22
+
 
 class Dataset(object):
     """This class contains information about the loaded dataset used for training of decision
@@ -28,15 +50,28 @@ class Dataset(object):
         class_attrib_index (int): CSV column index of the sample class.
         split_char (str, optional): Split char used in the CSV file. Defaults to ';'.
         missing_value_string (str): Indicates the current sample does not have this value.
+        load_numeric (bool, optional): Indicates wether numeric attributes should be loaded.
+            Defaults to `False`.
+        use_cache (bool, optional): Indicates wether the binary cache saved next to the CSV file
+            should be used. When it is valid, the encoded columns are memory-mapped from it instead
+            of parsing the CSV; otherwise the CSV is parsed and the cache is (re)written. Defaults
+            to `True`.
 
     Attributes:
         attrib_names (:obj:'list' of :obj'str'): Names of each attribute in order of appearance.
         num_classes (int): number of different classes in dataset.
         num_samples (int): number of samples in dataset.
-        sample_index_to_key (:obj:'list' of 'str'): Sample names in order of appearance in CSV.
-        sample_key_to_index (:obj:'dict' from 'str' to 'int'): Sample index by key.
+        sample_index_to_key (SampleKeys): Sample names in order of appearance in CSV. When there
+            is no key attribute, keys are implicit (see `ImplicitSampleKeys`).
+        sample_key_to_index (:obj:'dict' from 'str' to 'int'): Sample index by key. A read-only
+            view of `sample_index_to_key`.
+        attrib_columns (:obj:'list' of 'np.array'): the i-th entry contains the values of the i-th
+            attribute for every sample, by index. Valid nominal attributes are stored as int codes
+            (see `attrib_int_to_value`) and valid numeric attributes as floats. Invalid attributes
+            have `None` as entry.
         samples (:obj:'list' of 'list' of 'int'): list of samples, each represented by a list of
-            it's attributes values (represented by ints).
+            it's attributes values (represented by ints). It is built from `attrib_columns` only
+            when first accessed, and invalid attributes have `None` as value.
         attrib_int_to_value (:obj:'list' of 'list' of 'str'): Given an attribute index and it's int
             value representation, returns the string value represented by this int.
         attrib_value_to_int (:obj:'list' of 'list' of 'str'): Given an attribute index and it's
@@ -52,9 +87,11 @@ class Dataset(object):
         class_index_num_samples (:obj:'list' of 'int'): Number of samples for the class given by
             this int representation.
         number_samples_in_rarest_class ('int'): Number of samples in the rarest class in CSV.
-        sample_class (:obj:'list' of 'int'): Class for each sample, by index.
-        sample_costs (:obj:'list' of 'list' of 'float'): Misclassification cost for each sample, by
-            class int.
+        sample_class (:obj:'np.array' of 'int'): Class for each sample, by index.
+        cost_model (CostModel): Misclassification costs of the training samples. Defaults to
+            uniform costs (see `UniformCostModel`).
+        test_cost_model (CostModel): Misclassification costs of the test samples. Defaults to
+            uniform costs (see `UniformCostModel`).
         training_dataset_csv_filepath (str): System filepath to csv file containing the training
             dataset.
         key_attrib_index (int, optional): CSV column index of the sample keys. If 'None', samples
@@ -65,23 +102,23 @@ class Dataset(object):
     """
 
     def __init__(self, training_dataset_csv_filepath, key_attrib_index, class_attrib_index,
-                 split_char, missing_value_string, load_numeric=False):
+                 split_char, missing_value_string, load_numeric=False, use_cache=True):
         # Init variables to default value
         self.attrib_names = []
         self.num_classes = 0
         self.num_samples = 0
 
-        self.sample_index_to_key = [] # [sample_index] = key
-        self.sample_key_to_index = {} # [key] = sample_index
-        self.samples = [] # [sample_index][attrib_index] = sample_attrib_value
+        self.sample_index_to_key = ExplicitSampleKeys([]) # [sample_index] = key
+        self.attrib_columns = [] # [attrib_index][sample_index] = sample_attrib_value
+        self._samples = None # [sample_index][attrib_index] = sample_attrib_value
         self.sample_class = [] # [sample_index] = int_class
-        self.sample_costs = [] # [sample_index][class_index] = misclassification_cost
+        self.cost_model = UniformCostModel()
 
-        self.test_sample_index_to_key = [] # [sample_index] = key
-        self.test_sample_key_to_index = {} # [key] = sample_index
-        self.test_samples = [] # [sample_index][attrib_index] = sample_attrib_value
+        self.test_sample_index_to_key = ExplicitSampleKeys([]) # [sample_index] = key
+        self.test_attrib_columns = [] # [attrib_index][sample_index] = sample_attrib_value
+        self._test_samples = None # [sample_index][attrib_index] = sample_attrib_value
         self.test_sample_class = [] # [sample_index] = int_class
-        self.test_sample_costs = [] # [sample_index][class_index] = misclassification_cost
+        self.test_cost_model = UniformCostModel()
         self.test_num_samples = 0
         self.test_dataset_csv_filepath = None
 
@@ -101,163 +138,280 @@ class Dataset(object):
 
         self.load_train_dataset_time_taken = None
         self.load_numeric = load_numeric
-
-        self._load_train_dataset(split_char, missing_value_string)
+        self._split_char = split_char
+        self._missing_value_string = missing_value_string
+
+        if not use_cache or not self._load_train_dataset_from_cache(split_char,
+                                                                     missing_value_string):
+            self._load_train_dataset(split_char, missing_value_string)
+            if use_cache:
+                self._save_train_dataset_cache(split_char, missing_value_string)
         self._print_loaded_information()
 
+    @property
+    def sample_key_to_index(self):
+        """Sample index by key (a read-only view of `sample_index_to_key`)."""
+        return _SampleKeyToIndex(self.sample_index_to_key)
+
+    @property
+    def test_sample_key_to_index(self):
+        """Test sample index by key (a read-only view of `test_sample_index_to_key`)."""
+        return _SampleKeyToIndex(self.test_sample_index_to_key)
+
+    @property
+    def samples(self):
+        """List of training samples, each represented by a list of it's attributes values. Built
+        from `attrib_columns` on first access.
+        """
+        if self._samples is None:
+            self._samples = self._get_samples_from_columns(self.attrib_columns, self.num_samples)
+        return self._samples
+
+    @property
+    def test_samples(self):
+        """List of test samples, each represented by a list of it's attributes values. Missing
+        values are -1 in nominal attributes and `None` in numeric ones. Built from
+        `test_attrib_columns` on first access.
+        """
+        if self._test_samples is None:
+            self._test_samples = self._get_samples_from_columns(self.test_attrib_columns,
+                                                                self.test_num_samples)
+        return self._test_samples
+
     def _load_train_dataset(self, split_char, missing_value_string):
-        # TESTED!
         """Loads the CSV and initialize auxiliary data.
 
+        The CSV is read in chunks of about `CSV_CHUNK_SIZE` characters. Each column of a chunk is
+        factorized into int codes, one per distinct string, so that every distinct string is
+        converted to float only once. Samples with missing values are then dropped using masks,
+        attribute by attribute, which gives the same attributes' validity, values encodings and
+        dropped samples as processing the samples one at a time, in order of appearance.
+
         Args:
             split_char (str, optional): Split char used in the CSV file. Defaults to ';'.
             missing_value_string (str): Indicates the current sample does not have this value.
         """
-        print()
-        print('LOADING dataset...')
+        logger.info()
+        logger.info('LOADING dataset...')
         if self.class_attrib_index is None:
             print('Error: No class attribute!')
             sys.exit(1)
         if self.key_attrib_index is None:
-            print('No key attribute used! Numbering samples in order of appearance.')
-        samples_counter = -1 # header is 0, first sample is 1
-        wrong_samples = 0
-        num_attributes = None
+            logger.info('No key attribute used! Numbering samples in order of appearance.')
+        # Messages about dropped samples, logged in order of appearance: [(sample_number, text)].
+        # Only kept when they are shown (see `logger.is_verbose`), otherwise they are just counted.
+        messages = []
+        is_verbose = logger.is_verbose()
         with open(self.training_dataset_csv_filepath, 'r') as fin:
             start_time = timeit.default_timer()
-            for line in fin:
-                line_list = line.rstrip().split(split_char)
-                if not line_list:
-                    # empty line
-                    continue
-                samples_counter += 1
-                if samples_counter == 0:
-                    # header
-                    num_attributes = len(line_list)
-                    for attrib_index, attrib_name in enumerate(line_list):
-                        self.valid_nominal_attribute.append(True)
-                        self.valid_numeric_attribute.append(self.load_numeric)
-                        self.attrib_value_to_int.append({})
-                        self.attrib_int_to_value.append([])
-                        self.attrib_names.append(attrib_name)
-                    if self.key_attrib_index is not None:
-                        self.valid_nominal_attribute[self.key_attrib_index] = False
-                        self.valid_numeric_attribute[self.key_attrib_index] = False
-                    self.valid_nominal_attribute[self.class_attrib_index] = False
-                    self.valid_numeric_attribute[self.class_attrib_index] = False
-                    continue
-
-                # not header
-
-                if len(line_list) != num_attributes:
-                    # Sample with wrong number of attributes
-                    wrong_samples += 1
-                    print('\tSample {} with wrong number of attributes: {} instead of {}.'.format(
-                        samples_counter,
-                        len(line_list),
-                        num_attributes))
-                    print('\n\t{}\n'.format(line))
+            # Header
+            self.attrib_names = fin.readline().rstrip().split(split_char)
+            num_attributes = len(self.attrib_names)
+            for _ in range(num_attributes):
+                self.valid_nominal_attribute.append(True)
+                self.valid_numeric_attribute.append(self.load_numeric)
+                self.attrib_value_to_int.append({})
+                self.attrib_int_to_value.append([])
+            if self.key_attrib_index is not None:
+                self.valid_nominal_attribute[self.key_attrib_index] = False
+                self.valid_numeric_attribute[self.key_attrib_index] = False
+            self.valid_nominal_attribute[self.class_attrib_index] = False
+            self.valid_numeric_attribute[self.class_attrib_index] = False
+
+            # Samples
+            samples_counter = 0
+            samples_numbers = [] # Number of each sample with correct number of attributes.
+            strings_codes = [{} for _ in range(num_attributes)] # [attrib_index][string] = code
+            samples_codes = [[] for _ in range(num_attributes)] # [attrib_index][chunk] = codes
+            while True:
+                lines = fin.readlines(CSV_CHUNK_SIZE)
+                if not lines:
+                    break
+                lines_list = [line.rstrip().split(split_char) for line in lines]
+                lines_num_attributes = np.fromiter(map(len, lines_list), dtype=int,
+                                                   count=len(lines_list))
+                is_correct_line = lines_num_attributes == num_attributes
+                wrong_lines_indices = np.flatnonzero(~is_correct_line).tolist()
+                logger.count_events('Samples with wrong number of attributes',
+                                    [None] * len(wrong_lines_indices))
+                if is_verbose:
+                    for line_index in wrong_lines_indices:
+                        # Sample with wrong number of attributes
+                        messages.append((
+                            samples_counter + line_index + 1,
+                            '\tSample {} with wrong number of attributes: {} instead of {}.\n'
+                            '\n\t{}\n'.format(samples_counter + line_index + 1,
+                                              lines_num_attributes[line_index],
+                                              num_attributes,
+                                              lines[line_index])))
+                correct_lines_indices = np.flatnonzero(is_correct_line)
+                samples_counter += len(lines)
+                if not len(correct_lines_indices):
                     continue
-
-                # Sample with correct number of attributes
-
-                # Key
-                sample_index = samples_counter - wrong_samples - 1
-                key = '' # just to have it in scope in the second 'if' below
-                if self.key_attrib_index is not None:
-                    try:
-                        key = line_list[self.key_attrib_index]
-                    except IndexError:
-                        print('Key attribute index '
-                              '({}) is equal or larger than the number of attributes ({}).'.format(
-                                  self.key_attrib_index,
-                                  len(line_list)))
-                        sys.exit(1)
-                else:
-                    sample_name_index = samples_counter - 1
-                    key = 'sample_{}'.format(sample_name_index)
-                if key in self.sample_key_to_index:
-                    print('Repeated key: {}'.format(key))
-                    sys.exit(1)
-
-                # Class
-                try:
-                    sample_class_name = line_list[self.class_attrib_index]
-                except IndexError:
-                    print('Class attribute index '
-                          '({}) is equal or larger than the number of attributes ({}).'.format(
-                              self.class_attrib_index,
-                              len(line_list)))
-                    sys.exit(1)
-                if sample_class_name in self.class_name_to_int:
-                    sample_int_class = self.class_name_to_int[sample_class_name]
-                else:
-                    sample_int_class = len(self.class_int_to_name)
-                    self.class_name_to_int[sample_class_name] = sample_int_class
-                    self.class_int_to_name.append(sample_class_name)
-                    self.class_index_num_samples.append(0)
-
-                # Sample and attributes
-                sample = copy.copy(line_list)
-                is_correct = True
-                for attrib_index, value in enumerate(line_list):
-                    if self.valid_nominal_attribute[attrib_index]:
-                        try:
-                            float(value)
-                            # If did not throw, then attribute is numeric, thus invalid.
-                            self.valid_nominal_attribute[attrib_index] = False
-                            self.attrib_value_to_int[attrib_index] = {}
-                            self.attrib_int_to_value[attrib_index] = []
-                        except ValueError:
-                            if value == missing_value_string:
-                                # This sample won't be saved in dataset
-                                print('\tSample {} has a missing value in attribute {} ({})'.format(
-                                    key,
-                                    attrib_index,
-                                    self.attrib_names[attrib_index]))
-                                wrong_samples += 1
-                                is_correct = False
-                                break
-                            elif self.valid_numeric_attribute[attrib_index]:
-                                self.valid_numeric_attribute[attrib_index] = False
-                            if value not in self.attrib_value_to_int[attrib_index]:
-                                self.attrib_value_to_int[attrib_index][value] = len(
-                                    self.attrib_int_to_value[attrib_index])
-                                self.attrib_int_to_value[attrib_index].append(value)
-                            sample[attrib_index] = self.attrib_value_to_int[attrib_index][value]
-                    if self.valid_numeric_attribute[attrib_index]:
-                        try:
-                            sample[attrib_index] = float(value)
-                            # If did not throw, then attribute is numeric.
-                            if self.valid_nominal_attribute[attrib_index]:
-                                self.valid_nominal_attribute[attrib_index] = False
-                                self.attrib_value_to_int[attrib_index] = {}
-                                self.attrib_int_to_value[attrib_index] = []
-                        except ValueError:
-                            if value == missing_value_string:
-                                # This sample won't be saved in dataset
-                                print('\tSample {} has a missing value in attribute {} ({})'.format(
-                                    key,
-                                    attrib_index,
-                                    self.attrib_names[attrib_index]))
-                                wrong_samples += 1
-                                is_correct = False
-                                break
-                            self.valid_numeric_attribute[attrib_index] = False
-
-
-                if is_correct:
-                    # Save this sample in dataset
-                    self.samples.append(sample)
-                    self.sample_index_to_key.append(key)
-                    self.sample_key_to_index[key] = sample_index
-                    self.sample_class.append(sample_int_class)
-                    self.class_index_num_samples[sample_int_class] += 1
-
-        self.num_samples = samples_counter - wrong_samples
+                samples_numbers.append(samples_counter - len(lines) + correct_lines_indices)
+                correct_lines_list = [lines_list[line_index]
+                                      for line_index in correct_lines_indices.tolist()]
+                for attrib_index, chunk_values in enumerate(zip(*correct_lines_list)):
+                    # Distinct strings are numbered in order of appearance in the file.
+                    curr_strings_codes = strings_codes[attrib_index]
+                    for value in dict.fromkeys(chunk_values):
+                        curr_strings_codes.setdefault(value, len(curr_strings_codes))
+                    samples_codes[attrib_index].append(np.fromiter(
+                        map(curr_strings_codes.__getitem__, chunk_values),
+                        dtype=int,
+                        count=len(chunk_values)))
+
+        # Index `i` of the arrays below refers to the i-th sample with correct number of attributes.
+        samples_numbers = np.concatenate(samples_numbers) if samples_numbers else np.zeros(
+            0, dtype=int)
+        samples_codes = [np.concatenate(attrib_samples_codes)
+                         if attrib_samples_codes else np.zeros(0, dtype=int)
+                         for attrib_samples_codes in samples_codes]
+        attrib_strings = [list(attrib_strings_codes) for attrib_strings_codes in strings_codes]
+        num_correct_samples = len(samples_numbers)
+
+        # Key
+        if self.key_attrib_index is None:
+            keys = ImplicitSampleKeys('sample_', samples_numbers)
+        elif num_correct_samples:
+            try:
+                keys = ExplicitSampleKeys(np.array(attrib_strings[self.key_attrib_index],
+                                                   dtype=str)[samples_codes[self.key_attrib_index]])
+            except IndexError:
+                print('Key attribute index '
+                      '({}) is equal or larger than the number of attributes ({}).'.format(
+                          self.key_attrib_index,
+                          num_attributes))
+                sys.exit(1)
+        else:
+            keys = ExplicitSampleKeys([])
+
+        # Class
+        if num_correct_samples:
+            try:
+                class_samples_codes = samples_codes[self.class_attrib_index]
+            except IndexError:
+                print('Class attribute index '
+                      '({}) is equal or larger than the number of attributes ({}).'.format(
+                          self.class_attrib_index,
+                          num_attributes))
+                sys.exit(1)
+            classes_codes, samples_int_class = self._get_codes_in_order_of_appearance(
+                class_samples_codes)
+            class_strings = attrib_strings[self.class_attrib_index]
+            self.class_int_to_name = [class_strings[code] for code in classes_codes.tolist()]
+            self.class_name_to_int = {class_name: class_int
+                                      for class_int, class_name in enumerate(
+                                          self.class_int_to_name)}
+
+        # Sample and attributes
+        is_correct = np.ones(num_correct_samples, dtype=bool)
+        attrib_values = [None] * num_attributes # [attrib_index][code] = int or float value
+        for attrib_index in range(num_attributes):
+            if (not self.valid_nominal_attribute[attrib_index]
+                    and not self.valid_numeric_attribute[attrib_index]):
+                continue
+            is_float_string, float_values = self._get_float_values(attrib_strings[attrib_index])
+            is_missing_string = np.fromiter(
+                (value == missing_value_string for value in attrib_strings[attrib_index]),
+                dtype=bool,
+                count=len(attrib_strings[attrib_index])) & ~is_float_string
+
+            # Indices of the samples which were not dropped in a previous attribute.
+            curr_samples_indices = np.flatnonzero(is_correct)
+            curr_samples_codes = samples_codes[attrib_index][curr_samples_indices]
+            is_float_sample = is_float_string[curr_samples_codes]
+            is_missing_sample = is_missing_string[curr_samples_codes]
+            is_nominal_sample = ~is_float_sample & ~is_missing_sample
+            # A missing value drops the sample while this attribute is still valid: a float value
+            # makes it invalid as nominal and a non-float value makes it invalid as numeric.
+            first_float_sample = (np.argmax(is_float_sample)
+                                  if np.any(is_float_sample) else len(curr_samples_indices))
+            first_nominal_sample = (np.argmax(is_nominal_sample)
+                                    if np.any(is_nominal_sample) else len(curr_samples_indices))
+            is_still_valid = np.zeros(len(curr_samples_indices), dtype=bool)
+            if self.valid_nominal_attribute[attrib_index]:
+                is_still_valid[:first_float_sample] = True
+                if first_float_sample < len(curr_samples_indices):
+                    self.valid_nominal_attribute[attrib_index] = False
+            if self.valid_numeric_attribute[attrib_index]:
+                is_still_valid[:first_nominal_sample] = True
+                if first_nominal_sample < len(curr_samples_indices):
+                    self.valid_numeric_attribute[attrib_index] = False
+            is_dropped_sample = is_missing_sample & is_still_valid
+            logger.count_events('Samples with missing values',
+                                [attrib_index] * int(np.sum(is_dropped_sample)))
+            if is_verbose:
+                for sample_index in curr_samples_indices[is_dropped_sample].tolist():
+                    # This sample won't be saved in dataset
+                    messages.append((
+                        samples_numbers[sample_index] + 1,
+                        '\tSample {} has a missing value in attribute {} ({})'.format(
+                            keys[sample_index],
+                            attrib_index,
+                            self.attrib_names[attrib_index])))
+            is_correct[curr_samples_indices[is_dropped_sample]] = False
+
+            if self.valid_nominal_attribute[attrib_index]:
+                # Values are numbered in order of appearance, including in samples that are dropped
+                # in a later attribute.
+                (values_codes,
+                 _) = self._get_codes_in_order_of_appearance(
+                     curr_samples_codes[~is_dropped_sample])
+                self.attrib_int_to_value[attrib_index] = [
+                    attrib_strings[attrib_index][code] for code in values_codes.tolist()]
+                self.attrib_value_to_int[attrib_index] = {
+                    value: int_value
+                    for int_value, value in enumerate(self.attrib_int_to_value[attrib_index])}
+                attrib_values[attrib_index] = np.full(len(attrib_strings[attrib_index]), -1,
+                                                      dtype=np.int32)
+                attrib_values[attrib_index][values_codes] = np.arange(len(values_codes))
+            elif self.valid_numeric_attribute[attrib_index]:
+                attrib_values[attrib_index] = float_values
+
+        # A sample with a repeated key is an error if a previous sample with the same key was saved.
+        if self.key_attrib_index is not None and num_correct_samples:
+            key_samples_codes = samples_codes[self.key_attrib_index]
+            samples_order = np.lexsort((np.arange(num_correct_samples), key_samples_codes))
+            is_key_start = np.ones(num_correct_samples, dtype=bool)
+            is_key_start[1:] = (key_samples_codes[samples_order][1:]
+                                != key_samples_codes[samples_order][:-1])
+            num_correct_until = np.cumsum(is_correct[samples_order]) - is_correct[samples_order]
+            key_start = np.maximum.accumulate(
+                np.where(is_key_start, np.arange(num_correct_samples), 0))
+            is_repeated_key = num_correct_until > num_correct_until[key_start]
+            if np.any(is_repeated_key):
+                repeated_key_sample_index = np.min(samples_order[is_repeated_key])
+                messages.sort(key=lambda message: message[0])
+                for sample_number, message in messages:
+                    if sample_number < samples_numbers[repeated_key_sample_index] + 1:
+                        logger.debug(message)
+                print('Repeated key: {}'.format(keys[repeated_key_sample_index]))
+                sys.exit(1)
+
+        messages.sort(key=lambda message: message[0])
+        for _, message in messages:
+            logger.debug(message)
+        logger.report_counts('Samples not loaded from "{}"'.format(
+            self.training_dataset_csv_filepath))
+
+        # Save the samples in dataset
+        correct_samples_indices = np.flatnonzero(is_correct)
+        self.sample_index_to_key = keys.take(correct_samples_indices)
+        self.num_samples = len(correct_samples_indices)
         self.num_classes = len(self.class_int_to_name)
+        if num_correct_samples:
+            self.sample_class = samples_int_class[correct_samples_indices].astype(int)
+        else:
+            self.sample_class = np.zeros(0, dtype=int)
+        self.class_index_num_samples = np.bincount(self.sample_class,
+                                                   minlength=self.num_classes).tolist()
+        self.attrib_columns = [
+            None if curr_attrib_values is None
+            else curr_attrib_values[samples_codes[attrib_index][correct_samples_indices]]
+            for attrib_index, curr_attrib_values in enumerate(attrib_values)]
+
         self.number_samples_in_rarest_class = min(self.class_index_num_samples)
-        self.sample_costs = self._initialize_integer_costs(self.sample_class)
         self.load_train_dataset_time_taken = timeit.default_timer() - start_time
         if (num_attributes == 0
                 or (sum(self.valid_nominal_attribute) == 0
@@ -265,33 +419,273 @@ class Dataset(object):
             print('Must have at least ONE valid attribute.')
             sys.exit(1)
 
-    def _initialize_integer_costs(self, sample_class):
-        # TESTED!
-        """Initialize costs for each sample (1.0 for wrong class and 0.0 for the correct one).
+    @staticmethod
+    def _get_float_values(strings):
+        """Converts strings to float, as done by `float()`. Returns a pair of arrays: the first
+        indicates wether each string could be converted and the second contains the converted
+        values (NaN when conversion failed).
+        """
+        try:
+            return (np.ones(len(strings), dtype=bool),
+                    np.array(strings, dtype=str).astype(np.float64))
+        except ValueError:
+            pass
+        is_float_string = np.zeros(len(strings), dtype=bool)
+        float_values = np.full(len(strings), np.nan)
+        for string_index, string in enumerate(strings):
+            try:
+                float_values[string_index] = float(string)
+                is_float_string[string_index] = True
+            except ValueError:
+                pass
+        return is_float_string, float_values
+
+    @staticmethod
+    def _get_codes_in_order_of_appearance(codes):
+        """Returns the distinct entries of the int array `codes`, in order of first appearance, and
+        an array containing the position of each entry of `codes` in this order.
         """
-        sample_costs = []
-        for curr_sample_class in sample_class:
-            sample_costs.append([1.0] * self.num_classes)
-            if curr_sample_class < self.num_classes:
-                sample_costs[-1][curr_sample_class] = 0.0
-        return sample_costs
+        (unique_codes,
+         first_indices,
+         inverse) = np.unique(codes, return_index=True, return_inverse=True)
+        order = np.argsort(first_indices, kind='stable')
+        position_in_order = np.empty(len(order), dtype=int)
+        position_in_order[order] = np.arange(len(order))
+        return unique_codes[order], position_in_order[inverse.ravel()]
+
+    def _get_cache_folderpath(self):
+        return self.training_dataset_csv_filepath + CACHE_FOLDER_SUFFIX
+
+    def _get_cache_key(self, split_char, missing_value_string):
+        """Returns a dict identifying the CSV file (by modification time and size) and the
+        arguments used to load it. A cache is only valid if it was saved with the same key.
+        """
+        csv_file_stat = os.stat(self.training_dataset_csv_filepath)
+        return {"format version": CACHE_FORMAT_VERSION,
+                "csv modification time": csv_file_stat.st_mtime_ns,
+                "csv size": csv_file_stat.st_size,
+                "key attrib index": self.key_attrib_index,
+                "class attrib index": self.class_attrib_index,
+                "split char": split_char,
+                "missing value string": missing_value_string,
+                "load numeric": self.load_numeric}
+
+    def _read_cache_info(self, split_char, missing_value_string):
+        """Returns the information saved with the binary cache, or `None` if there is no valid cache
+        for the current CSV file and loading arguments.
+        """
+        try:
+            with open(os.path.join(self._get_cache_folderpath(), CACHE_INFO_FILENAME), 'r') as fin:
+                cache_info = json.load(fin)
+            if cache_info["cache key"] != self._get_cache_key(split_char, missing_value_string):
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return cache_info
+
+    def _open_cached_columns(self, cache_info):
+        """Returns a pair with the list of memory-mapped encoded columns (`None` for invalid
+        attributes) and the memory-mapped classes of the training samples saved in the cache.
+        """
+        cache_folderpath = self._get_cache_folderpath()
+        attrib_columns = []
+        for attrib_index, (is_valid_nominal_attrib, is_valid_numeric_attrib) in enumerate(
+                zip(cache_info["valid nominal attribute"],
+                    cache_info["valid numeric attribute"])):
+            if is_valid_nominal_attrib or is_valid_numeric_attrib:
+                attrib_columns.append(np.load(
+                    os.path.join(cache_folderpath, 'attrib_{}.npy'.format(attrib_index)),
+                    mmap_mode='r'))
+            else:
+                attrib_columns.append(None)
+        sample_class = np.load(os.path.join(cache_folderpath, 'sample_class.npy'), mmap_mode='r')
+        return attrib_columns, sample_class
+
+    def memory_map_columns(self):
+        """Replaces the encoded columns and the classes of the training samples, when held in
+        memory, by memory-mapped ones read from the binary cache, which is saved first if needed.
+        Returns `False` if the cache could not be saved or read, in which case they are kept in
+        memory.
+        """
+        if isinstance(self.sample_class, np.memmap):
+            return True
+        if self._read_cache_info(self._split_char, self._missing_value_string) is None:
+            self._save_train_dataset_cache(self._split_char, self._missing_value_string)
+        cache_info = self._read_cache_info(self._split_char, self._missing_value_string)
+        if cache_info is None:
+            return False
+        try:
+            self.attrib_columns, self.sample_class = self._open_cached_columns(cache_info)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def get_columns_num_bytes_in_memory(self):
+        """Returns the number of bytes of the encoded columns and of the classes of the training
+        samples that are held in memory, that is, that are not memory-mapped.
+        """
+        return sum(array.nbytes for array in self.attrib_columns + [self.sample_class]
+                   if array is not None and not isinstance(array, np.memmap))
+
+    def _load_train_dataset_from_cache(self, split_char, missing_value_string):
+        """Loads the dataset from the binary cache saved next to the CSV file, memory-mapping the
+        encoded columns. Returns `False` if there is no valid cache for the current CSV file and
+        loading arguments.
+
+        Args:
+            split_char (str, optional): Split char used in the CSV file. Defaults to ';'.
+            missing_value_string (str): Indicates the current sample does not have this value.
+        """
+        start_time = timeit.default_timer()
+        cache_folderpath = self._get_cache_folderpath()
+        try:
+            cache_info = self._read_cache_info(split_char, missing_value_string)
+            if cache_info is None:
+                return False
+            attrib_columns, sample_class = self._open_cached_columns(cache_info)
+            if cache_info["sample keys prefix"] is None:
+                sample_keys = ExplicitSampleKeys(np.load(
+                    os.path.join(cache_folderpath, 'sample_keys.npy'), mmap_mode='r'))
+            elif cache_info["first sample number"] is None:
+                sample_keys = ImplicitSampleKeys(
+                    cache_info["sample keys prefix"],
+                    np.load(os.path.join(cache_folderpath, 'samples_numbers.npy'), mmap_mode='r'))
+            else:
+                sample_keys = ImplicitSampleKeys.from_range(cache_info["sample keys prefix"],
+                                                            cache_info["first sample number"],
+                                                            cache_info["num samples"])
+        except (OSError, ValueError, KeyError):
+            return False
+
+        logger.info()
+        logger.info('LOADING dataset from cache in "{}"...'.format(cache_folderpath))
+        self.attrib_names = cache_info["attrib names"]
+        self.valid_nominal_attribute = cache_info["valid nominal attribute"]
+        self.valid_numeric_attribute = cache_info["valid numeric attribute"]
+        self.attrib_int_to_value = cache_info["attrib int to value"]
+        self.attrib_value_to_int = [
+            {value: int_value for int_value, value in enumerate(int_to_value)}
+            for int_to_value in self.attrib_int_to_value]
+        self.class_int_to_name = cache_info["class int to name"]
+        self.class_name_to_int = {
+            class_name: class_int for class_int, class_name in enumerate(self.class_int_to_name)}
+        self.class_index_num_samples = cache_info["class index num samples"]
+
+        self.attrib_columns = attrib_columns
+        self.sample_class = sample_class
+        self.sample_index_to_key = sample_keys
+
+        self.num_samples = len(self.sample_index_to_key)
+        self.num_classes = len(self.class_int_to_name)
+        self.number_samples_in_rarest_class = min(self.class_index_num_samples)
+        self.load_train_dataset_time_taken = timeit.default_timer() - start_time
+        return True
+
+    def _save_train_dataset_cache(self, split_char, missing_value_string):
+        """Saves the loaded dataset in a binary cache next to the CSV file, so that later loads can
+        memory-map it. Every file is written to a temporary path and then renamed, so that processes
+        which have the previous cache memory-mapped are not affected.
+
+        Args:
+            split_char (str, optional): Split char used in the CSV file. Defaults to ';'.
+            missing_value_string (str): Indicates the current sample does not have this value.
+        """
+        def _save_array(filepath, array):
+            temp_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+            with open(temp_filepath, 'wb') as fout:
+                np.save(fout, array)
+            os.replace(temp_filepath, filepath)
+
+        cache_folderpath = self._get_cache_folderpath()
+        cache_info_filepath = os.path.join(cache_folderpath, CACHE_INFO_FILENAME)
+        cache_info = {"cache key": self._get_cache_key(split_char, missing_value_string),
+                      "attrib names": self.attrib_names,
+                      "valid nominal attribute": self.valid_nominal_attribute,
+                      "valid numeric attribute": self.valid_numeric_attribute,
+                      "attrib int to value": self.attrib_int_to_value,
+                      "class int to name": self.class_int_to_name,
+                      "class index num samples": self.class_index_num_samples,
+                      "num samples": self.num_samples,
+                      "sample keys prefix": None,
+                      "first sample number": None}
+        if isinstance(self.sample_index_to_key, ImplicitSampleKeys):
+            cache_info["sample keys prefix"] = self.sample_index_to_key.prefix
+            cache_info["first sample number"] = self.sample_index_to_key.first_sample_number
+        try:
+            os.makedirs(cache_folderpath, exist_ok=True)
+            if os.path.exists(cache_info_filepath):
+                # Invalidates the previous cache before overwriting its arrays.
+                os.remove(cache_info_filepath)
+            for attrib_index, attrib_column in enumerate(self.attrib_columns):
+                if attrib_column is not None:
+                    _save_array(
+                        os.path.join(cache_folderpath, 'attrib_{}.npy'.format(attrib_index)),
+                        attrib_column)
+            _save_array(os.path.join(cache_folderpath, 'sample_class.npy'), self.sample_class)
+            if cache_info["sample keys prefix"] is None:
+                _save_array(os.path.join(cache_folderpath, 'sample_keys.npy'),
+                            self.sample_index_to_key.keys)
+            elif cache_info["first sample number"] is None:
+                _save_array(os.path.join(cache_folderpath, 'samples_numbers.npy'),
+                            self.sample_index_to_key.samples_numbers)
+            temp_cache_info_filepath = '{}.{}.tmp'.format(cache_info_filepath, os.getpid())
+            with open(temp_cache_info_filepath, 'w') as fout:
+                json.dump(cache_info, fout)
+            os.replace(temp_cache_info_filepath, cache_info_filepath)
+        except OSError as error:
+            logger.warning('Could not save dataset cache in "{}": {}'.format(cache_folderpath,
+                                                                             error))
+
+    def _get_columns_from_samples(self, samples):
+        """Returns a list with the values of each attribute for every sample, by index. Nominal
+        attributes are stored as int codes and numeric ones as floats (where missing values, given
+        as `None`, are stored as NaN). Invalid attributes are not stored.
+        """
+        attrib_columns = []
+        for attrib_index in range(len(self.attrib_names)):
+            if self.valid_nominal_attribute[attrib_index]:
+                attrib_columns.append(np.fromiter(
+                    (sample[attrib_index] for sample in samples), dtype=np.int32,
+                    count=len(samples)))
+            elif self.valid_numeric_attribute[attrib_index]:
+                attrib_columns.append(np.array(
+                    [sample[attrib_index] for sample in samples], dtype=np.float64))
+            else:
+                attrib_columns.append(None)
+        return attrib_columns
+
+    @staticmethod
+    def _get_samples_from_columns(attrib_columns, num_samples):
+        """Returns the list of samples, each represented by a list of it's attributes values, stored
+        in `attrib_columns`. NaN values are returned as `None`.
+        """
+        columns_values = []
+        for attrib_column in attrib_columns:
+            if attrib_column is None:
+                columns_values.append([None] * num_samples)
+            elif attrib_column.dtype.kind == 'f':
+                columns_values.append([None if math.isnan(value) else value
+                                       for value in attrib_column.tolist()])
+            else:
+                columns_values.append(attrib_column.tolist())
+        return [list(sample) for sample in zip(*columns_values)]
 
     def _print_loaded_information(self):
         # TESTED!
-        """Prints basic information of the loaded CSV.
+        """Logs basic information of the loaded CSV.
         """
-        print('Number of attributes: {}'.format(
+        logger.info('Number of attributes: {}'.format(
             sum(self.valid_nominal_attribute) + sum(self.valid_numeric_attribute)))
-        print('Number of nominal attributes: {}'.format(sum(self.valid_nominal_attribute)))
-        print('Number of numeric attributes: {}'.format(sum(self.valid_numeric_attribute)))
-        print('{} samples found!'.format(self.num_samples))
-        print('{} classes found:'.format(self.num_classes))
+        logger.info('Number of nominal attributes: {}'.format(sum(self.valid_nominal_attribute)))
+        logger.info('Number of numeric attributes: {}'.format(sum(self.valid_numeric_attribute)))
+        logger.info('{} samples found!'.format(self.num_samples))
+        logger.info('{} classes found:'.format(self.num_classes))
         for class_index in range(self.num_classes):
-            print('\tClass # {}: "{}" ({} samples)'.format(
+            logger.info('\tClass # {}: "{}" ({} samples)'.format(
                 class_index,
                 self.class_int_to_name[class_index],
                 self.class_index_num_samples[class_index]))
-        print('Time taken to load training dataset: {:.6f}s'.format(
+        logger.info('Time taken to load training dataset: {:.6f}s'.format(
             self.load_train_dataset_time_taken))
 
     def load_test_set_from_csv(self, test_dataset_csv_filepath, key_attrib_index,
@@ -305,22 +699,11 @@ class Dataset(object):
             split_char (str): char used to split columns in the csv.
             missing_value_string (str): string used to indicate that a sample does not have a value.
         """
-        def _is_header_match(train_attrib_names, test_attrib_names):
-            """Tests wether both headers are the same (up to lower/uppercase)."""
-            if len(train_attrib_names) != len(test_attrib_names):
-                return False
-            for curr_train_attrib_name, curr_test_attrib_name in zip(train_attrib_names,
-                                                                     test_attrib_names):
-                if curr_train_attrib_name.lower() != curr_test_attrib_name.lower():
-                    return False
-            return True
-
         # First let's remove any previously loaded test set
-        self.test_sample_index_to_key = []
-        self.test_sample_key_to_index = {}
-        self.test_samples = []
+        self.test_sample_index_to_key = ExplicitSampleKeys([])
+        self.test_attrib_columns = []
+        self._test_samples = None
         self.test_sample_class = []
-        self.test_sample_costs = []
         self.test_num_samples = 0
         self.test_dataset_csv_filepath = None
 
@@ -337,7 +720,11 @@ class Dataset(object):
             sys.exit(1)
 
         samples_counter = -1 # header is 0, first sample is 1
-        wrong_samples = 0
+        keys_seen = set()
+        test_samples = []
+        test_sample_keys = []
+        test_samples_numbers = []
+        test_sample_class = []
         with open(test_dataset_csv_filepath, 'r') as fin:
             start_time = timeit.default_timer()
             for line in fin:
@@ -348,7 +735,7 @@ class Dataset(object):
                 samples_counter += 1
                 if samples_counter == 0:
                     # header
-                    if not _is_header_match(self.attrib_names, line_list):
+                    if not self._is_header_match(self.attrib_names, line_list):
                         print('Test dataset header is not equal to train dataset header.')
                         sys.exit(1)
                     continue
@@ -357,27 +744,27 @@ class Dataset(object):
 
                 if len(line_list) != len(self.attrib_names):
                     # Sample with wrong number of attributes
-                    wrong_samples += 1
-                    print('\tSample {} with wrong number of attributes: {} instead of {}.'.format(
-                        samples_counter,
-                        len(line_list),
-                        len(self.attrib_names)))
-                    print('\n\t{}\n'.format(line))
+                    logger.count_events('Test samples with wrong number of attributes', [None])
+                    logger.debug('\tSample {} with wrong number of attributes: {} instead of {}.'
+                                 '\n\n\t{}\n'.format(samples_counter,
+                                                     len(line_list),
+                                                     len(self.attrib_names),
+                                                     line))
                     continue
 
                 # Sample with correct number of attributes
 
                 # Key
-                sample_index = samples_counter - wrong_samples - 1
                 key = '' # just to have it in scope in the second 'if' below
                 if key_attrib_index is not None:
                     key = line_list[key_attrib_index]
+                    if key in keys_seen:
+                        print('Repeated key: {}'.format(key))
+                        sys.exit(1)
+                    keys_seen.add(key)
                 else:
                     sample_name_index = samples_counter - 1
                     key = 'test_sample_{}'.format(sample_name_index)
-                if key in self.test_sample_key_to_index:
-                    print('Repeated key: {}'.format(key))
-                    sys.exit(1)
 
                 # Class
                 sample_class_name = line_list[class_attrib_index]
@@ -403,10 +790,12 @@ class Dataset(object):
                             sys.exit(1)
                         except ValueError:
                             if value == missing_value_string:
-                                print('\tTest sample {} has missing value in attribute'
-                                      ' {} ({}).'.format(key,
-                                                         attrib_index,
-                                                         self.attrib_names[attrib_index]))
+                                logger.count_events('Test samples with missing values',
+                                                    [attrib_index])
+                                logger.debug('\tTest sample {} has missing value in attribute'
+                                             ' {} ({}).'.format(key,
+                                                                attrib_index,
+                                                                self.attrib_names[attrib_index]))
                                 sample[attrib_index] = -1
                                 continue
                             if value not in self.attrib_value_to_int[attrib_index]:
@@ -419,10 +808,12 @@ class Dataset(object):
                             sample[attrib_index] = float(value)
                         except ValueError:
                             if value == missing_value_string:
-                                print('\tTest sample {} has missing value in attribute'
-                                      ' {} ({}).'.format(key,
-                                                         attrib_index,
-                                                         self.attrib_names[attrib_index]))
+                                logger.count_events('Test samples with missing values',
+                                                    [attrib_index])
+                                logger.debug('\tTest sample {} has missing value in attribute'
+                                             ' {} ({}).'.format(key,
+                                                                attrib_index,
+                                                                self.attrib_names[attrib_index]))
                                 sample[attrib_index] = None
                                 continue
                             print('\tTest sample {} has nominal value ({}) in attribute {} ({})'
@@ -433,17 +824,208 @@ class Dataset(object):
                             sys.exit(1)
 
                 # Save this sample in test dataset
-                self.test_samples.append(sample)
-                self.test_sample_index_to_key.append(key)
-                self.test_sample_key_to_index[key] = sample_index
-                self.test_sample_class.append(sample_int_class)
-
-        self.test_sample_costs = self._initialize_integer_costs(self.test_sample_class)
+                test_samples.append(sample)
+                test_sample_keys.append(key)
+                test_samples_numbers.append(samples_counter - 1)
+                test_sample_class.append(sample_int_class)
+
+        if key_attrib_index is not None:
+            self.test_sample_index_to_key = ExplicitSampleKeys(test_sample_keys)
+        else:
+            self.test_sample_index_to_key = ImplicitSampleKeys('test_sample_',
+                                                               test_samples_numbers)
+        self.test_attrib_columns = self._get_columns_from_samples(test_samples)
+        self.test_sample_class = np.array(test_sample_class, dtype=int)
         time_taken = timeit.default_timer() - start_time
-        print('Time taken to load test dataset: {:.6f}s'.format(time_taken))
+        logger.info('Time taken to load test dataset: {:.6f}s'.format(time_taken))
         self.test_num_samples = len(self.test_sample_index_to_key)
         self.test_dataset_csv_filepath = test_dataset_csv_filepath
 
+    def iterate_test_set_from_csv(self, test_dataset_csv_filepath, key_attrib_index,
+                                  class_attrib_index, split_char, missing_value_string):
+        """Reads the test CSV in chunks of about `CSV_CHUNK_SIZE` characters, encoding each chunk
+        against the training vocabularies, which are not changed. Only the current chunk is kept in
+        memory (and the keys already seen, when there is a key attribute, to find repeated keys).
+
+        Nominal values unknown to the training set are encoded as -1, like missing nominal values,
+        and missing numeric values are NaN. Classes unknown to the training set are -1.
+
+        Args:
+            test_dataset_csv_filepath (str): path to the test dataset.
+            key_attrib_index (int): column index of the samples' keys on the csv.
+            class_attrib_index (int): column index of the samples' classes on the csv.
+            split_char (str): char used to split columns in the csv.
+            missing_value_string (str): string used to indicate that a sample does not have a value.
+
+        Yields:
+            For each chunk, a tuple containing, in order:
+                - the chunk's attribute columns (see `attrib_columns`);
+                - np.array with the class of each sample in the chunk;
+                - the key of each sample in the chunk (see `SampleKeys`).
+        """
+        if key_attrib_index != self.key_attrib_index:
+            print('Test dataset key attribute ({}) is not equal to train'
+                  ' dataset key attribute ({}).'.format(key_attrib_index,
+                                                        self.key_attrib_index))
+            sys.exit(1)
+
+        if class_attrib_index != self.class_attrib_index:
+            print('Test dataset class attribute ({}) is not equal to train'
+                  ' dataset class attribute ({}).'.format(class_attrib_index,
+                                                          self.class_attrib_index))
+            sys.exit(1)
+
+        num_attributes = len(self.attrib_names)
+        keys_seen = set()
+        is_verbose = logger.is_verbose()
+        with open(test_dataset_csv_filepath, 'r') as fin:
+            if not self._is_header_match(self.attrib_names,
+                                         fin.readline().rstrip().split(split_char)):
+                print('Test dataset header is not equal to train dataset header.')
+                sys.exit(1)
+            samples_counter = 0
+            while True:
+                lines = fin.readlines(CSV_CHUNK_SIZE)
+                if not lines:
+                    break
+                # Messages logged in order of appearance: [(sample_number, attrib_index, text)].
+                # Only kept when they are shown (see `logger.is_verbose`), otherwise they are just
+                # counted.
+                messages = []
+                # First sample that stops the test: (sample_number, attrib_index, text)
+                error = None
+                correct_lines_list = []
+                samples_numbers = []
+                for line_index, line in enumerate(lines):
+                    line_list = line.rstrip().split(split_char)
+                    if len(line_list) != num_attributes:
+                        # Sample with wrong number of attributes
+                        logger.count_events('Test samples with wrong number of attributes',
+                                            [None])
+                        if is_verbose:
+                            messages.append((
+                                samples_counter + line_index + 1,
+                                -1,
+                                '\tSample {} with wrong number of attributes: {} instead of {}.\n'
+                                '\n\t{}\n'.format(samples_counter + line_index + 1,
+                                                  len(line_list),
+                                                  num_attributes,
+                                                  line)))
+                        continue
+                    correct_lines_list.append(line_list)
+                    samples_numbers.append(samples_counter + line_index + 1)
+                samples_counter += len(lines)
+                if not correct_lines_list:
+                    for _, _, message in messages:
+                        logger.debug(message)
+                    continue
+                attrib_chunk_values = list(zip(*correct_lines_list))
+
+                # Key
+                if key_attrib_index is not None:
+                    sample_keys = ExplicitSampleKeys(attrib_chunk_values[key_attrib_index])
+                    for sample_number, key in zip(samples_numbers,
+                                                  attrib_chunk_values[key_attrib_index]):
+                        if key in keys_seen:
+                            error = (sample_number, -1, 'Repeated key: {}'.format(key))
+                            break
+                        keys_seen.add(key)
+                else:
+                    sample_keys = ImplicitSampleKeys('test_sample_',
+                                                     np.array(samples_numbers, dtype=int) - 1)
+
+                # Class
+                class_chunk_values = attrib_chunk_values[class_attrib_index]
+                class_name_to_int = {class_name: self.class_name_to_int.get(class_name, -1)
+                                     for class_name in dict.fromkeys(class_chunk_values)}
+                sample_class = np.fromiter(map(class_name_to_int.__getitem__, class_chunk_values),
+                                           dtype=int,
+                                           count=len(class_chunk_values))
+
+                # Sample and attributes
+                attrib_columns = []
+                for attrib_index, chunk_values in enumerate(attrib_chunk_values):
+                    if (not self.valid_nominal_attribute[attrib_index]
+                            and not self.valid_numeric_attribute[attrib_index]):
+                        attrib_columns.append(None)
+                        continue
+                    unique_values = list(dict.fromkeys(chunk_values))
+                    is_float_value, float_values = self._get_float_values(unique_values)
+                    is_missing_value = np.fromiter(
+                        (value == missing_value_string for value in unique_values),
+                        dtype=bool,
+                        count=len(unique_values)) & ~is_float_value
+                    if self.valid_nominal_attribute[attrib_index]:
+                        is_wrong_value = is_float_value
+                        wrong_value_message = ('\tTest sample {} has numeric value ({}) in'
+                                               ' attribute {} ({}) (which is nominal).')
+                        value_to_int = self.attrib_value_to_int[attrib_index]
+                        encoded_values = dict(zip(unique_values,
+                                                  [value_to_int.get(value, -1)
+                                                   for value in unique_values]))
+                        attrib_columns.append(np.fromiter(map(encoded_values.__getitem__,
+                                                              chunk_values),
+                                                          dtype=np.int32,
+                                                          count=len(chunk_values)))
+                    else:
+                        is_wrong_value = ~is_float_value & ~is_missing_value
+                        wrong_value_message = ('\tTest sample {} has nominal value ({}) in'
+                                               ' attribute {} ({}) (which is numeric).')
+                        encoded_values = dict(zip(unique_values, float_values.tolist()))
+                        attrib_columns.append(np.fromiter(map(encoded_values.__getitem__,
+                                                              chunk_values),
+                                                          dtype=np.float64,
+                                                          count=len(chunk_values)))
+                    if np.any(is_missing_value):
+                        logger.count_events('Test samples with missing values',
+                                            [attrib_index] * chunk_values.count(
+                                                missing_value_string))
+                    if np.any(is_missing_value) and is_verbose:
+                        for sample_index, value in enumerate(chunk_values):
+                            if value == missing_value_string:
+                                messages.append((
+                                    samples_numbers[sample_index],
+                                    attrib_index,
+                                    '\tTest sample {} has missing value in attribute'
+                                    ' {} ({}).'.format(sample_keys[sample_index],
+                                                       attrib_index,
+                                                       self.attrib_names[attrib_index])))
+                    if np.any(is_wrong_value):
+                        wrong_values = set(np.array(unique_values, dtype=object)[
+                            is_wrong_value].tolist())
+                        for sample_index, value in enumerate(chunk_values):
+                            if value in wrong_values:
+                                if error is None or (samples_numbers[sample_index],
+                                                     attrib_index) < error[:2]:
+                                    error = (samples_numbers[sample_index],
+                                             attrib_index,
+                                             wrong_value_message.format(
+                                                 sample_keys[sample_index],
+                                                 value,
+                                                 attrib_index,
+                                                 self.attrib_names[attrib_index]))
+                                break
+
+                messages.sort(key=lambda message: message[:2])
+                for sample_number, attrib_index, message in messages:
+                    if error is None or (sample_number, attrib_index) < error[:2]:
+                        logger.debug(message)
+                if error is not None:
+                    print(error[2])
+                    sys.exit(1)
+                yield attrib_columns, sample_class, sample_keys
+
+    @staticmethod
+    def _is_header_match(train_attrib_names, test_attrib_names):
+        """Tests wether both headers are the same (up to lower/uppercase)."""
+        if len(train_attrib_names) != len(test_attrib_names):
+            return False
+        for curr_train_attrib_name, curr_test_attrib_name in zip(train_attrib_names,
+                                                                 test_attrib_names):
+            if curr_train_attrib_name.lower() != curr_test_attrib_name.lower():
+                return False
+        return True
+
     def _print_debug_info(self):
         # TESTED!
         print()
@@ -484,11 +1066,7 @@ class Dataset(object):
             print('\t{} --> {}'.format(int_key, sample_class))
         print()
 
-        print('self.sample_costs:')
-        for int_key, cost_array in enumerate(self.sample_costs):
-            print('\tSample # {}:'.format(int_key))
-            for class_int, cost in enumerate(cost_array):
-                print('\t\t{} --> {}'.format(class_int, cost))
+        print('self.cost_model: {}'.format(self.cost_model))
         print()
 
         print('self.test_sample_index_to_key:')
@@ -511,11 +1089,7 @@ class Dataset(object):
             print('\t{} --> {}'.format(int_key, sample_class))
         print()
 
-        print('self.test_sample_costs:')
-        for int_key, cost_array in enumerate(self.test_sample_costs):
-            print('\tTest Sample # {}:'.format(int_key))
-            for class_int, cost in enumerate(cost_array):
-                print('\t\t{} --> {}'.format(class_int, cost))
+        print('self.test_cost_model: {}'.format(self.test_cost_model))
         print()
 
         print('self.test_dataset_csv_filepath: {}'.format(self.test_dataset_csv_filepath))
@@ -576,6 +1150,238 @@ class Dataset(object):
         print()
 
 
+class SampleKeys(object):
+    """Abstract base class for the mapping between sample indices and sample keys. Behaves as a
+    read-only list of keys (`sample_keys[sample_index]` gives the key of a sample) and `get_index`
+    gives the sample index of a key.
+    """
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def __len__(self):
+        pass
+
+    @abc.abstractmethod
+    def _get_key(self, sample_index):
+        """Returns the key of the sample with (non-negative) index `sample_index`."""
+        pass
+
+    @abc.abstractmethod
+    def get_index(self, key):
+        """Returns the index of the sample with the given key. Raises `KeyError` if there is no
+        sample with this key.
+        """
+        pass
+
+    @abc.abstractmethod
+    def take(self, samples_indices):
+        """Returns a SampleKeys containing only the keys of the samples in `samples_indices`, in
+        this order.
+        """
+        pass
+
+    def __getitem__(self, sample_index):
+        sample_index = operator.index(sample_index)
+        if sample_index < 0:
+            sample_index += len(self)
+        if not 0 <= sample_index < len(self):
+            raise IndexError('sample index out of range')
+        return self._get_key(sample_index)
+
+    def __iter__(self):
+        for sample_index in range(len(self)):
+            yield self._get_key(sample_index)
+
+    def __contains__(self, key):
+        try:
+            self.get_index(key)
+            return True
+        except KeyError:
+            return False
+
+
+class ImplicitSampleKeys(SampleKeys):
+    """Sample keys made of a prefix followed by the sample's number in the CSV (e.g. 'sample_0'),
+    used when there is no key attribute. Keys are only built when asked for. When the samples
+    numbers are consecutive only the first one is stored, otherwise they are kept in an int array.
+
+    Args:
+        prefix (str): prefix of every key.
+        samples_numbers (np.array of int): number of each sample.
+    """
+    def __init__(self, prefix, samples_numbers):
+        samples_numbers = np.asarray(samples_numbers, dtype=np.int64)
+        self.prefix = prefix
+        self.num_samples = len(samples_numbers)
+        if np.any(np.diff(samples_numbers) != 1):
+            self.first_sample_number = None
+            self.samples_numbers = samples_numbers
+        else:
+            self.first_sample_number = int(samples_numbers[0]) if self.num_samples else 0
+            self.samples_numbers = None
+        self._sample_number_to_index = None
+
+    @classmethod
+    def from_range(cls, prefix, first_sample_number, num_samples):
+        """Returns the keys of `num_samples` samples with consecutive numbers starting at
+        `first_sample_number`, without building any array.
+        """
+        sample_keys = cls(prefix, [])
+        sample_keys.first_sample_number = first_sample_number
+        sample_keys.num_samples = num_samples
+        return sample_keys
+
+    def __len__(self):
+        return self.num_samples
+
+    def _get_key(self, sample_index):
+        if self.samples_numbers is None:
+            return '{}{}'.format(self.prefix, self.first_sample_number + sample_index)
+        return '{}{}'.format(self.prefix, self.samples_numbers[sample_index])
+
+    def get_index(self, key):
+        if not isinstance(key, str) or not key.startswith(self.prefix):
+            raise KeyError(key)
+        number_string = key[len(self.prefix):]
+        if not number_string.isdigit() or str(int(number_string)) != number_string:
+            raise KeyError(key)
+        sample_number = int(number_string)
+        if self.samples_numbers is None:
+            if not 0 <= sample_number - self.first_sample_number < self.num_samples:
+                raise KeyError(key)
+            return sample_number - self.first_sample_number
+        if self._sample_number_to_index is None:
+            self._sample_number_to_index = {
+                curr_sample_number: sample_index
+                for sample_index, curr_sample_number in enumerate(self.samples_numbers.tolist())}
+        try:
+            return self._sample_number_to_index[sample_number]
+        except KeyError:
+            raise KeyError(key)
+
+    def take(self, samples_indices):
+        samples_indices = np.asarray(samples_indices, dtype=int)
+        if self.samples_numbers is None:
+            return ImplicitSampleKeys(self.prefix, self.first_sample_number + samples_indices)
+        return ImplicitSampleKeys(self.prefix, self.samples_numbers[samples_indices])
+
+
+class ExplicitSampleKeys(SampleKeys):
+    """Sample keys read from the key attribute, stored as an array of strings. The dict from key to
+    sample index is only built when first needed.
+
+    Args:
+        keys (np.array of str): key of each sample.
+    """
+    def __init__(self, keys):
+        self.keys = np.asarray(keys, dtype=str)
+        self._key_to_index = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _get_key(self, sample_index):
+        return str(self.keys[sample_index])
+
+    def get_index(self, key):
+        if self._key_to_index is None:
+            self._key_to_index = {curr_key: sample_index
+                                  for sample_index, curr_key in enumerate(self.keys.tolist())}
+        return self._key_to_index[key]
+
+    def take(self, samples_indices):
+        return ExplicitSampleKeys(self.keys[np.asarray(samples_indices, dtype=int)])
+
+
+class _SampleKeyToIndex(collections.abc.Mapping):
+    """Read-only dict view from key to sample index of a SampleKeys object."""
+    def __init__(self, sample_keys):
+        self._sample_keys = sample_keys
+
+    def __getitem__(self, key):
+        return self._sample_keys.get_index(key)
+
+    def __iter__(self):
+        return iter(self._sample_keys)
+
+    def __len__(self):
+        return len(self._sample_keys)
+
+    def __contains__(self, key):
+        return key in self._sample_keys
+
+
+class CostModel(object):
+    """Abstract base class for misclassification cost models.
+    """
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def get_costs(self, samples_indices, samples_classes, predicted_classes):
+        """Returns an array with the cost of classifying each sample in its predicted class.
+
+        Args:
+            samples_indices (np.array of int): indices of the classified samples.
+            samples_classes (np.array of int): true class of each classified sample.
+            predicted_classes (np.array of int): predicted class of each classified sample.
+        """
+        pass
+
+
+class UniformCostModel(CostModel):
+    """Cost model where every misclassification costs 1.0 and every correct classification costs
+    0.0.
+    """
+    def get_costs(self, samples_indices, samples_classes, predicted_classes):
+        return (np.asarray(predicted_classes) != np.asarray(samples_classes)).astype(np.float64)
+
+    def __repr__(self):
+        return 'UniformCostModel()'
+
+
+class ClassCostMatrix(CostModel):
+    """Cost model where the cost depends only on the true and predicted classes.
+
+    Args:
+        cost_matrix (:obj:'list' of 'list' of 'float'): matrix of shape (num_classes, num_classes)
+            where entry [i][j] is the cost of classifying a sample of class i in class j. Samples
+            whose class is not in the matrix (e.g. a class only seen in the test set) cost 1.0 when
+            misclassified, as in `UniformCostModel`.
+    """
+    def __init__(self, cost_matrix):
+        self.cost_matrix = np.array(cost_matrix, dtype=np.float64)
+
+    def get_costs(self, samples_indices, samples_classes, predicted_classes):
+        samples_classes = np.asarray(samples_classes)
+        predicted_classes = np.asarray(predicted_classes)
+        is_known_class = (samples_classes >= 0) & (samples_classes < self.cost_matrix.shape[0])
+        return np.where(is_known_class,
+                        self.cost_matrix[np.where(is_known_class, samples_classes, 0),
+                                         predicted_classes],
+                        (predicted_classes != samples_classes).astype(np.float64))
+
+    def __repr__(self):
+        return 'ClassCostMatrix({})'.format(self.cost_matrix.tolist())
+
+
+class SampleCosts(CostModel):
+    """Cost model with a given cost for each sample and predicted class.
+
+    Args:
+        sample_costs (np.array of float): array of shape (num_samples, num_classes) where entry
+            [i][j] is the cost of classifying the i-th sample in class j.
+    """
+    def __init__(self, sample_costs):
+        self.sample_costs = np.array(sample_costs, dtype=np.float64)
+
+    def get_costs(self, samples_indices, samples_classes, predicted_classes):
+        return self.sample_costs[np.asarray(samples_indices, dtype=int),
+                                 np.asarray(predicted_classes, dtype=int)]
+
+    def __repr__(self):
+        return 'SampleCosts(<{} samples>)'.format(self.sample_costs.shape[0])
+
+
 def load_config(folderpath):
     """Loads the configuration information for the dataset contained in the given folderpath in a
     dict.
@@ -596,23 +1402,22 @@ def load_config(folderpath):
         data.csv path.
     """
     if not os.path.exists(folderpath):
-        print('Folder "{}" does not exist.'.format(folderpath))
-        print('Skipping this dataset.')
+        logger.warning('Folder "{}" does not exist.\nSkipping this dataset.'.format(folderpath))
         return None
 
     config_filepath = os.path.join(folderpath, 'config.json')
     if not os.path.exists(config_filepath) or not os.path.isfile(config_filepath):
-        print('"config.json" file does not exist in folder "{}".'.format(folderpath))
-        print('Skipping this dataset.')
+        logger.warning('"config.json" file does not exist in folder "{}".\n'
+                       'Skipping this dataset.'.format(folderpath))
         return None
 
     data_filepath = os.path.join(folderpath, 'data.csv')
     if not os.path.exists(data_filepath) or not os.path.isfile(data_filepath):
-        print('data.csv file does not exist in folder "{}".'.format(folderpath))
-        print('Skipping this dataset.')
+        logger.warning('data.csv file does not exist in folder "{}".\n'
+                       'Skipping this dataset.'.format(folderpath))
         return None
 
-    print('Loading dataset configuration file for "{}".'.format(folderpath))
+    logger.info('Loading dataset configuration file for "{}".'.format(folderpath))
     with open(config_filepath, 'r') as config:
         config = json.load(config)
         mandatory_fields = ["dataset name", "key attrib index", "class attrib index", "split char",
@@ -622,33 +1427,31 @@ def load_config(folderpath):
             if field not in config:
                 missing_fields.append(field)
         if missing_fields:
-            print('Missing field(s) in {}:'.format(config_filepath))
-            for field in missing_fields:
-                print('\t{}'.format(field))
-            print()
-            print('Skipping this dataset.')
+            logger.warning('Missing field(s) in {}:\n{}\n\nSkipping this dataset.'.format(
+                config_filepath,
+                '\n'.join('\t{}'.format(field) for field in missing_fields)))
             return None
         if not isinstance(config["dataset name"], str):
-            print('"dataset name" must be a string.')
-            print('Skipping this dataset.')
+            logger.warning('"dataset name" must be a string.\n'
+                           'Skipping this dataset.')
             return None
         if (config["key attrib index"] is not None
                 and not isinstance(config["key attrib index"], int)):
-            print('"key attrib index" must have an integer value or be null.')
-            print('Skipping this dataset.')
+            logger.warning('"key attrib index" must have an integer value or be null.\n'
+                           'Skipping this dataset.')
             return None
         if not isinstance(config["class attrib index"], int):
-            print('"class attrib index" must have an integer value.')
-            print('Skipping this dataset.')
+            logger.warning('"class attrib index" must have an integer value.\n'
+                           'Skipping this dataset.')
             return None
         if not isinstance(config["split char"], str):
-            print('"split char" must be a string.')
-            print('Skipping this dataset.')
+            logger.warning('"split char" must be a string.\n'
+                           'Skipping this dataset.')
             return None
         if (config["missing value string"] is not None
                 and not isinstance(config["missing value string"], str)):
-            print('"missing value string" must be a string or null.')
-            print('Skipping this dataset.')
+            logger.warning('"missing value string" must be a string or null.\n'
+                           'Skipping this dataset.')
             return None
 
         config["filepath"] = data_filepath
@@ -672,20 +1475,78 @@ def load_all_configs(dataset_basepath):
     return config_list
 
 
-def load_all_datasets(datasets_configs, load_numeric):
+def load_all_datasets(datasets_configs, load_numeric, num_processes=None):
     """Creates a Dataset object for every dataset available in the `datasets_configs` list.
     The argument `load_numeric` informs wether we should load numeric attributes or not.
 
+    Datasets are parsed concurrently by `num_processes` processes (defaults to the number of CPUs),
+    each one saving its binary cache next to the dataset's CSV. The returned Dataset objects are
+    then memory-mapped from these caches, so no samples are copied between processes. Each
+    dataset's `load_train_dataset_time_taken` is the time spent parsing it in its process.
+
     Returns:
-        List of tuples (dataset_name, Dataset object).
+        List of tuples (dataset_name, Dataset object), in the same order as `datasets_configs`.
     """
+    if num_processes is None:
+        num_processes = os.cpu_count()
+    num_processes = min(num_processes, len(datasets_configs))
+    if num_processes <= 1:
+        datasets_list = []
+        for dataset_config in datasets_configs:
+            datasets_list.append((dataset_config["dataset name"],
+                                  Dataset(dataset_config["filepath"],
+                                          dataset_config["key attrib index"],
+                                          dataset_config["class attrib index"],
+                                          dataset_config["split char"],
+                                          dataset_config["missing value string"],
+                                          load_numeric)))
+        return datasets_list
+
+    with multiprocessing.Pool(num_processes) as pool:
+        parsing_results = pool.starmap(_parse_dataset_to_cache,
+                                       [(dataset_config, load_numeric, logger.get_level())
+                                        for dataset_config in datasets_configs])
     datasets_list = []
-    for dataset_config in datasets_configs:
-        datasets_list.append((dataset_config["dataset name"],
-                              Dataset(dataset_config["filepath"],
-                                      dataset_config["key attrib index"],
-                                      dataset_config["class attrib index"],
-                                      dataset_config["split char"],
-                                      dataset_config["missing value string"],
-                                      load_numeric)))
+    for dataset_config, (parsing_output, exit_code, time_taken) in zip(datasets_configs,
+                                                                        parsing_results):
+        print(parsing_output, end='')
+        if exit_code is not None:
+            sys.exit(exit_code)
+        with contextlib.redirect_stdout(io.StringIO()):
+            curr_dataset = Dataset(dataset_config["filepath"],
+                                   dataset_config["key attrib index"],
+                                   dataset_config["class attrib index"],
+                                   dataset_config["split char"],
+                                   dataset_config["missing value string"],
+                                   load_numeric)
+        curr_dataset.load_train_dataset_time_taken = time_taken
+        datasets_list.append((dataset_config["dataset name"], curr_dataset))
     return datasets_list
+
+
+def _parse_dataset_to_cache(dataset_config, load_numeric, log_level):
+    """Parses the dataset given by `dataset_config`, saving its binary cache. Used by
+    `load_all_datasets` in its worker processes, which log with the same `log_level` as the main
+    process.
+
+    Returns:
+        A tuple containing, in order:
+            - the text logged while parsing the dataset;
+            - the exit code, if the dataset is invalid and parsing called `sys.exit`, or `None`;
+            - the time taken to load the dataset.
+    """
+    logger.set_level(log_level)
+    parsing_output = io.StringIO()
+    exit_code = None
+    time_taken = None
+    with contextlib.redirect_stdout(parsing_output):
+        try:
+            time_taken = Dataset(dataset_config["filepath"],
+                                 dataset_config["key attrib index"],
+                                 dataset_config["class attrib index"],
+                                 dataset_config["split char"],
+                                 dataset_config["missing value string"],
+                                 load_numeric).load_train_dataset_time_taken
+        except SystemExit as exception:
+            exit_code = exception.code
+    return parsing_output.getvalue(), exit_code, time_taken
@@ -1,19 +1,26 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
-"""Module containing the DecisionTree, TreeNode and NodeSplit classes.
+"""Module containing the DecisionTree, CompiledTree, TreeNode and NodeSplit classes.
 """
 
 import collections
+import concurrent.futures
+import heapq
 import math
+import multiprocessing
+import os
 import random
 import sys
+import tempfile
 import timeit
 
 import numpy as np
 from sklearn.model_selection import StratifiedKFold, KFold
 from scipy.stats import chi2
 
+import logger
+
 
 #: Minimum number of samples needed in the two most frequent values of an attribute such that it is
 #: considered valid.
@@ -26,6 +33,50 @@ USE_MIN_SAMPLES_SECOND_LARGEST_CLASS = True
 #: split.
 MIN_SAMPLES_SECOND_LARGEST_CLASS = 40
 
+#: Order in which the tree nodes are grown during training: `'depth-first'`, recursively, by
+#: `TreeNode.create_subtree`, `'level-wise'`, one tree level at a time, with a pass over the
+#: training samples per level (see `_LevelWiseTreeGrower`), or `'best-first'`, in the order given
+#: by `BEST_FIRST_PRIORITY`, until a growth budget runs out (see `_BestFirstTreeGrower`).
+TREE_GROWTH_ORDER = 'depth-first'
+
+#: When growing best-first, which nodes are split first: `'num samples'`, the ones with most
+#: training samples, or `'impurity gain'`, the ones whose split most decreases the Gini impurity
+#: (weighted by the number of samples).
+BEST_FIRST_PRIORITY = 'num samples'
+#: When growing best-first, maximum number of leaves in the tree. When `None`, there is no limit.
+MAX_LEAVES = None
+#: When growing best-first, maximum number of nodes in the tree. When `None`, there is no limit.
+MAX_NODES = None
+#: When growing best-first, maximum time (in seconds) spent growing the tree. Nodes not split when
+#: it runs out become leaves. When `None`, there is no limit.
+TRAINING_TIME_BUDGET = None
+
+#: When growing depth-first, child subtrees of the root with at least this number of training
+#: samples are grown in parallel by a pool of processes (see `_ParallelTreeGrower`). When `None`,
+#: every subtree is grown in the main process.
+PARALLEL_SUBTREES_MIN_SAMPLES = None
+#: Number of processes used to grow subtrees in parallel. When `None`, uses the number of CPUs.
+PARALLEL_SUBTREES_NUM_PROCESSES = None
+
+#: Release the state of each TreeNode which is only needed during training (contingency tables,
+#: indices of training samples and lists of valid attributes) as soon as the node is known to be a
+#: leaf or its children are created (see `TreeNode._release_training_state`).
+MEMORY_LEAN_TRAINING = False
+
+#: Maximum number of bytes used by the training samples' indices and the dataset's encoded columns
+#: kept in memory while training. When a tree's training samples don't fit in it, the tree is
+#: trained out of core (see `DecisionTree.train`). When `None`, trees are always trained in memory.
+TRAINING_MEMORY_BUDGET = None
+#: Number of training samples read at a time from disk when training out of core.
+OUT_OF_CORE_CHUNK_SIZE = 1 << 18
+
+#: Name of the event counted (see `logger.count_events`) when a sample is classified with a value
+#: unkown to a split.
+UNKOWN_VALUE_EVENT = 'Samples classified with values unkown to split'
+
+# Dataset of the tree being grown by `_ParallelTreeGrower`, which its forked processes inherit.
+_PARALLEL_DATASET = None
+
 #: Contains the information about an attribute's contingency table. When empty, defaults to
 #: `(None, None)`.
 ContingencyTable = collections.namedtuple('ContingencyTable',
@@ -48,111 +99,100 @@ class DecisionTree(object):
         self._criterion = criterion
         self._dataset = None
         self._root_node = None
+        self._compiled_tree = None
 
     def get_root_node(self):
         """Returns the TreeNode at the root of the tree. Might be None.
         """
         return self._root_node
 
+    def get_compiled_tree(self):
+        """Returns the CompiledTree used to classify samples, created after training. Might be None.
+        """
+        return self._compiled_tree
+
     def get_trivial_accuracy(self, test_samples_indices):
         """Returns the accuracy obtained by classifying all test samples in the most common class
         among training samples. Must be called after training the tree.
         """
-        num_correct = sum(
-            self._dataset.sample_class[curr_sample_index] == self._root_node.most_common_int_class
-            for curr_sample_index in test_samples_indices)
+        num_correct = int(np.sum(
+            np.asarray(self._dataset.sample_class)[np.asarray(test_samples_indices, dtype=int)]
+            == self._root_node.most_common_int_class))
         return 100.0 * num_correct / len(test_samples_indices)
 
-    def _classify_sample(self, sample, sample_key):
-        if self._root_node is None:
+    @staticmethod
+    def _log_unkown_values(attrib_columns, samples_indices, sample_keys,
+                           classified_with_unkown_value, unkown_value_attrib_index):
+        """Counts (and, if verbose, logs) the samples classified with values unkown to a split, given
+        the arrays returned by `CompiledTree.classify` for `samples_indices`.
+        """
+        logger.count_events(UNKOWN_VALUE_EVENT,
+                            unkown_value_attrib_index[classified_with_unkown_value].tolist())
+        if logger.is_verbose():
+            for position in np.flatnonzero(classified_with_unkown_value).tolist():
+                sample_index = samples_indices[position]
+                attrib_index = unkown_value_attrib_index[position]
+                logger.debug('\tSample {} has value unkown to split'
+                             ' (value = {} in attrib #{}).'.format(
+                                 sample_keys[sample_index],
+                                 attrib_columns[attrib_index][sample_index],
+                                 attrib_index))
+
+    def _classify_samples(self, test_dataset_attrib_columns, test_dataset_sample_class,
+                          test_dataset_cost_model, test_samples_indices,
+                          test_dataset_sample_keys):
+        if self._compiled_tree is None:
             print('Cannot classify in untrained tree!')
             sys.exit(1)
-        curr_node = self._root_node
-        classified_with_unkown_value = False
-        unkown_value_attrib_index = None
-        while not curr_node.is_leaf:
-            split_attrib_index = curr_node.node_split.separation_attrib_index
-            sample_value = sample[split_attrib_index]
-            if self._dataset.valid_numeric_attribute[split_attrib_index]:
-                if sample_value is None:
-                    print('\tSample {} has value unkown to split'
-                          ' (value = {} in attrib #{}).'.format(
-                              sample_key,
-                              sample_value,
-                              curr_node.node_split.separation_attrib_index))
-                    classified_with_unkown_value = True
-                    unkown_value_attrib_index = curr_node.node_split.separation_attrib_index
-                    break
-                mid_point = curr_node.node_split.mid_point
-                if sample_value <= mid_point:
-                    curr_node = curr_node.nodes[0]
-                else:
-                    curr_node = curr_node.nodes[1]
-            else:
-                try:
-                    split_index = curr_node.node_split.values_to_split[sample_value]
-                    curr_node = curr_node.nodes[split_index]
-                except KeyError:
-                    print('\tSample {} has value unkown to split'
-                          ' (value = {} in attrib #{}).'.format(
-                              sample_key,
-                              sample_value,
-                              curr_node.node_split.separation_attrib_index))
-                    classified_with_unkown_value = True
-                    unkown_value_attrib_index = curr_node.node_split.separation_attrib_index
-                    break
-        return (curr_node.most_common_int_class,
-                classified_with_unkown_value,
-                unkown_value_attrib_index)
-
-    def _classify_samples(self, test_dataset_sample, test_dataset_sample_class,
-                          test_dataset_sample_costs, test_samples_indices,
-                          test_dataset_sample_keys):
-        print('Starting classifications...')
-        classifications = []
-        classified_with_unkown_value_array = []
-        unkown_value_attrib_index_array = []
-
-        num_correct_classifications = 0
-        num_correct_classifications_wo_unkown = 0
-        num_unkown = 0
-
-        total_cost = 0.0
-        total_cost_wo_unkown = 0.0
-
-        for test_sample_index in test_samples_indices:
-            (predicted_class,
-             classified_with_unkown_value,
-             unkown_value_attrib_index) = self._classify_sample(
-                 test_dataset_sample[test_sample_index],
-                 test_dataset_sample_keys[test_sample_index])
-            classifications.append(predicted_class)
-            classified_with_unkown_value_array.append(classified_with_unkown_value)
-            unkown_value_attrib_index_array.append(unkown_value_attrib_index)
-            if predicted_class == test_dataset_sample_class[test_sample_index]:
-                num_correct_classifications += 1
-                if not classified_with_unkown_value:
-                    num_correct_classifications_wo_unkown += 1
-            total_cost += test_dataset_sample_costs[test_sample_index][predicted_class]
-            if not classified_with_unkown_value:
-                total_cost_wo_unkown += test_dataset_sample_costs[
-                    test_sample_index][predicted_class]
-            else:
-                num_unkown += 1
-        print('Done!')
-        return (classifications,
-                num_correct_classifications,
-                num_correct_classifications_wo_unkown,
-                total_cost,
-                total_cost_wo_unkown,
-                classified_with_unkown_value_array,
-                num_unkown,
-                unkown_value_attrib_index_array)
+        logger.info('Starting classifications...')
+        test_samples_indices = np.asarray(test_samples_indices, dtype=int)
+        (classifications,
+         classified_with_unkown_value,
+         unkown_value_attrib_index) = self._compiled_tree.classify(test_dataset_attrib_columns,
+                                                                   test_samples_indices)
+        self._log_unkown_values(test_dataset_attrib_columns,
+                                test_samples_indices,
+                                test_dataset_sample_keys,
+                                classified_with_unkown_value,
+                                unkown_value_attrib_index)
+
+        is_correct = classifications == np.asarray(test_dataset_sample_class)[test_samples_indices]
+        costs = test_dataset_cost_model.get_costs(
+            test_samples_indices,
+            np.asarray(test_dataset_sample_class)[test_samples_indices],
+            classifications)
+        logger.info('Done!')
+        return (classifications.tolist(),
+                int(np.sum(is_correct)),
+                int(np.sum(is_correct & ~classified_with_unkown_value)),
+                float(np.sum(costs)),
+                float(np.sum(costs[~classified_with_unkown_value])),
+                classified_with_unkown_value.tolist(),
+                int(np.sum(classified_with_unkown_value)),
+                [attrib_index if attrib_index >= 0 else None
+                 for attrib_index in unkown_value_attrib_index.tolist()])
 
     def train(self, curr_dataset, training_samples_indices, max_depth, min_samples_per_node,
               use_stop_conditions=False, max_p_value_chi_sq=0.1):
         """Trains the tree in a recursive fashion, starting at the root's TreeNode. Afterwards,
-        prunes the trivial subtrees.
+        prunes the trivial subtrees and compiles the tree into a CompiledTree, which is used to
+        classify samples.
+
+        Nodes are grown in the order given by `TREE_GROWTH_ORDER`. When growing depth-first, large
+        subtrees are grown in parallel if `PARALLEL_SUBTREES_MIN_SAMPLES` is set. When growing
+        best-first, growth stops early if the tree reaches `MAX_LEAVES` leaves or `MAX_NODES` nodes,
+        or if it takes `TRAINING_TIME_BUDGET` seconds; the tree is still valid. When
+        `MEMORY_LEAN_TRAINING` is set, nodes release the state only needed during training as they
+        are grown, and the amount of memory released is logged. If growing the
+        tree in memory needs more than `TRAINING_MEMORY_BUDGET` bytes (counting the training
+        samples' indices, their sorted copies for numeric attributes and the dataset's columns held
+        in memory), the dataset's columns are memory-mapped from its cache and the tree is trained
+        out of core, level by level, until its nodes fit in the budget (see `_LevelWiseTreeGrower`).
+        Trees grown level-wise, best-first (without budgets) or in parallel are the same as the ones
+        grown depth-first, except when using criteria that choose random partitions (as GW's), since
+        the random numbers are drawn in a different order. Trees grown out of core are also the
+        same, unless there are valid numeric attributes, which are not used in nodes that don't fit
+        in the budget.
 
         Args:
             curr_dataset (Dataset): dataset containing the samples used for training.
@@ -181,21 +221,64 @@ class DecisionTree(object):
                 - nodes_prunned (int): number of nodes prunned.
         """
         self._dataset = curr_dataset
-        print('Starting tree training...')
-        self._root_node = TreeNode(curr_dataset,
-                                   training_samples_indices,
-                                   curr_dataset.valid_nominal_attribute[:],
-                                   curr_dataset.valid_numeric_attribute[:],
-                                   max_depth,
-                                   min_samples_per_node,
-                                   use_stop_conditions,
-                                   max_p_value_chi_sq)
-        self._root_node.create_subtree(self._criterion)
-        print('Starting prunning trivial subtrees...')
+        logger.info('Starting tree training...')
+        if (TRAINING_MEMORY_BUDGET is not None
+                and (len(training_samples_indices)
+                     * _get_training_num_bytes_per_sample(curr_dataset)
+                     + curr_dataset.get_columns_num_bytes_in_memory()) > TRAINING_MEMORY_BUDGET):
+            logger.info('Training out of core...')
+            if not curr_dataset.memory_map_columns():
+                logger.warning('Could not memory-map the dataset, so its columns are kept in '
+                               'memory.')
+            with tempfile.TemporaryDirectory() as temp_folder:
+                tree_grower = _LevelWiseTreeGrower(curr_dataset,
+                                                   training_samples_indices,
+                                                   max_depth,
+                                                   min_samples_per_node,
+                                                   use_stop_conditions,
+                                                   max_p_value_chi_sq,
+                                                   memory_budget=TRAINING_MEMORY_BUDGET,
+                                                   temp_folder=temp_folder)
+                self._root_node = tree_grower.grow(self._criterion)
+                del tree_grower
+        elif TREE_GROWTH_ORDER == 'level-wise':
+            self._root_node = _LevelWiseTreeGrower(curr_dataset,
+                                                   training_samples_indices,
+                                                   max_depth,
+                                                   min_samples_per_node,
+                                                   use_stop_conditions,
+                                                   max_p_value_chi_sq).grow(self._criterion)
+        else:
+            self._root_node = TreeNode(curr_dataset,
+                                       training_samples_indices,
+                                       curr_dataset.valid_nominal_attribute[:],
+                                       curr_dataset.valid_numeric_attribute[:],
+                                       max_depth,
+                                       min_samples_per_node,
+                                       use_stop_conditions,
+                                       max_p_value_chi_sq)
+            if TREE_GROWTH_ORDER == 'best-first':
+                if _BestFirstTreeGrower(BEST_FIRST_PRIORITY,
+                                        MAX_LEAVES,
+                                        MAX_NODES,
+                                        TRAINING_TIME_BUDGET).grow(self._root_node,
+                                                                   self._criterion):
+                    logger.info('Growth budget ran out before the tree was fully grown.')
+            elif PARALLEL_SUBTREES_MIN_SAMPLES is None:
+                self._root_node.create_subtree(self._criterion)
+            else:
+                _ParallelTreeGrower(PARALLEL_SUBTREES_MIN_SAMPLES,
+                                    PARALLEL_SUBTREES_NUM_PROCESSES).grow(self._root_node,
+                                                                          self._criterion)
+        if MEMORY_LEAN_TRAINING:
+            logger.info('Released {:.2f} MB of training state.'.format(
+                self._root_node.get_num_bytes_released() / 2**20))
+        logger.info('Starting prunning trivial subtrees...')
         start_time = timeit.default_timer()
         num_nodes_prunned = self._root_node.prune_trivial_subtrees()
         time_taken_prunning = timeit.default_timer() - start_time
-        print('Done!')
+        self._compiled_tree = CompiledTree(self._root_node)
+        logger.info('Done!')
         return time_taken_prunning, num_nodes_prunned
 
     def train_and_test(self, curr_dataset, training_samples_indices, validation_sample_indices,
@@ -258,9 +341,9 @@ class DecisionTree(object):
                                                             use_stop_conditions,
                                                             max_p_value_chi_sq)
         max_depth = self.get_root_node().get_max_depth()
-        return (self._classify_samples(curr_dataset.samples,
+        return (self._classify_samples(curr_dataset.attrib_columns,
                                        curr_dataset.sample_class,
-                                       curr_dataset.sample_costs,
+                                       curr_dataset.cost_model,
                                        validation_sample_indices,
                                        curr_dataset.sample_index_to_key),
                 max_depth,
@@ -353,12 +436,15 @@ class DecisionTree(object):
 
         fold_count = 0
 
-        sample_indices_and_classes = list(enumerate(curr_dataset.sample_class))
+        # The shuffle only depends on the number of samples, so the indices are shuffled as a list
+        # and then kept in an array, which is much smaller.
+        shuffled_sample_indices = list(range(curr_dataset.num_samples))
         if seed is not None:
             random.seed(seed)
             np.random.seed(seed)
-        random.shuffle(sample_indices_and_classes)
-        shuffled_sample_indices, shuffled_sample_classes = zip(*sample_indices_and_classes)
+        random.shuffle(shuffled_sample_indices)
+        shuffled_sample_indices = np.array(shuffled_sample_indices, dtype=int)
+        shuffled_sample_classes = np.asarray(curr_dataset.sample_class)[shuffled_sample_indices]
 
         if is_stratified:
             for (training_randomized_indices,
@@ -366,10 +452,9 @@ class DecisionTree(object):
                      shuffled_sample_indices,
                      shuffled_sample_classes):
 
-                training_samples_indices = [shuffled_sample_indices[index]
-                                            for index in training_randomized_indices]
-                validation_sample_indices = [shuffled_sample_indices[index]
-                                             for index in validation_randomized_indices]
+                training_samples_indices = shuffled_sample_indices[training_randomized_indices]
+                validation_sample_indices = shuffled_sample_indices[
+                    validation_randomized_indices].tolist()
 
                 if print_samples:
                     print('Samples used for validation in this fold:')
@@ -429,6 +514,7 @@ class DecisionTree(object):
                 fold_count += 1
                 time_taken_prunning_per_fold.append(curr_time_taken_prunning)
                 num_nodes_prunned_per_fold.append(curr_num_nodes_prunned)
+                logger.report_counts('Fold #{}'.format(fold_count))
 
                 if print_tree:
                     print()
@@ -493,6 +579,7 @@ class DecisionTree(object):
                 fold_count += 1
                 time_taken_prunning_per_fold.append(curr_time_taken_prunning)
                 num_nodes_prunned_per_fold.append(curr_num_nodes_prunned)
+                logger.report_counts('Fold #{}'.format(fold_count))
 
                 if print_tree:
                     print()
@@ -549,9 +636,9 @@ class DecisionTree(object):
         if self._root_node is None:
             print('Decision tree must be trained before testing.')
             sys.exit(1)
-        return self._classify_samples(self._dataset.samples,
+        return self._classify_samples(self._dataset.attrib_columns,
                                       self._dataset.sample_class,
-                                      self._dataset.sample_costs,
+                                      self._dataset.cost_model,
                                       test_sample_indices,
                                       self._dataset.sample_index_to_key)
 
@@ -589,16 +676,142 @@ class DecisionTree(object):
         if self._root_node is None or self._dataset is None:
             print('Decision tree must be trained before testing.')
             sys.exit(1)
-        self._dataset.load_test_set_from_csv(test_dataset_csv_filepath,
-                                             key_attrib_index,
-                                             class_attrib_index,
-                                             split_char,
-                                             missing_value_string)
-        return self._classify_samples(self._dataset.test_samples,
-                                      self._dataset.test_sample_class,
-                                      self._dataset.test_sample_costs,
-                                      list(range(len(self._dataset.test_sample_index_to_key))),
-                                      self._dataset.test_sample_index_to_key)
+        classifications = []
+        num_correct_classifications = 0
+        num_correct_classifications_wo_unkown = 0
+        total_cost = 0.0
+        total_cost_wo_unkown = 0.0
+        classified_with_unkown_value_array = []
+        num_unkown = 0
+        unkown_value_attrib_index_array = []
+        for (sample_class,
+             predicted_classes,
+             classified_with_unkown_value,
+             unkown_value_attrib_index,
+             costs) in self._classify_csv_chunks(test_dataset_csv_filepath,
+                                                 key_attrib_index,
+                                                 class_attrib_index,
+                                                 split_char,
+                                                 missing_value_string):
+            is_correct = predicted_classes == sample_class
+            classifications.extend(predicted_classes.tolist())
+            num_correct_classifications += int(np.sum(is_correct))
+            num_correct_classifications_wo_unkown += int(np.sum(
+                is_correct & ~classified_with_unkown_value))
+            total_cost += float(np.sum(costs))
+            total_cost_wo_unkown += float(np.sum(costs[~classified_with_unkown_value]))
+            classified_with_unkown_value_array.extend(classified_with_unkown_value.tolist())
+            num_unkown += int(np.sum(classified_with_unkown_value))
+            unkown_value_attrib_index_array.extend(
+                attrib_index if attrib_index >= 0 else None
+                for attrib_index in unkown_value_attrib_index.tolist())
+        logger.info('Done!')
+        return (classifications,
+                num_correct_classifications,
+                num_correct_classifications_wo_unkown,
+                total_cost,
+                total_cost_wo_unkown,
+                classified_with_unkown_value_array,
+                num_unkown,
+                unkown_value_attrib_index_array)
+
+    def evaluate_from_csv(self, test_dataset_csv_filepath, key_attrib_index, class_attrib_index,
+                          split_char, missing_value_string):
+        """Tests the (already trained) tree using all samples from a given csv file, keeping only
+        the aggregated results. The file is read in chunks, so memory use does not depend on its
+        size. If the tree hasn't been trained, the program will exit.
+
+        Args:
+            test_dataset_csv_filepath (str): path to the test dataset.
+            key_attrib_index (int): column index of the samples' keys on the csv.
+            class_attrib_index (int): column index of the samples' classes on the csv.
+            split_char (str): char used to split columns in the csv.
+            missing_value_string (str): string used to indicate that a sample does not have a value.
+
+        Returns:
+            A tuple containing, in order:
+                - the number of test samples;
+                - the number of correct classifications;
+                - the number of correct classifications done without test samples with unkown
+                    values;
+                - the total cost of the classification errors;
+                - the total cost of the classification errors without considering test samples
+                    with unkown values;
+                - the number of test samples classified with unkown values.
+        """
+        if self._root_node is None or self._dataset is None:
+            print('Decision tree must be trained before testing.')
+            sys.exit(1)
+        num_samples = 0
+        num_correct_classifications = 0
+        num_correct_classifications_wo_unkown = 0
+        total_cost = 0.0
+        total_cost_wo_unkown = 0.0
+        num_unkown = 0
+        for (sample_class,
+             predicted_classes,
+             classified_with_unkown_value,
+             _,
+             costs) in self._classify_csv_chunks(test_dataset_csv_filepath,
+                                                 key_attrib_index,
+                                                 class_attrib_index,
+                                                 split_char,
+                                                 missing_value_string):
+            is_correct = predicted_classes == sample_class
+            num_samples += len(sample_class)
+            num_correct_classifications += int(np.sum(is_correct))
+            num_correct_classifications_wo_unkown += int(np.sum(
+                is_correct & ~classified_with_unkown_value))
+            total_cost += float(np.sum(costs))
+            total_cost_wo_unkown += float(np.sum(costs[~classified_with_unkown_value]))
+            num_unkown += int(np.sum(classified_with_unkown_value))
+        logger.info('Done!')
+        return (num_samples,
+                num_correct_classifications,
+                num_correct_classifications_wo_unkown,
+                total_cost,
+                total_cost_wo_unkown,
+                num_unkown)
+
+    def _classify_csv_chunks(self, test_dataset_csv_filepath, key_attrib_index,
+                             class_attrib_index, split_char, missing_value_string):
+        """Reads the test csv in chunks (see `Dataset.iterate_test_set_from_csv`) and classifies
+        each one in batch.
+
+        Yields:
+            For each chunk, a tuple of arrays containing, in order, the class of each sample, its
+            predicted class, wether it was classified with an unkown value, the attribute index
+            where the unkown value occurred (-1 if none) and its misclassification cost.
+        """
+        logger.info('Starting classifications...')
+        first_sample_index = 0
+        for attrib_columns, sample_class, sample_keys in self._dataset.iterate_test_set_from_csv(
+                test_dataset_csv_filepath,
+                key_attrib_index,
+                class_attrib_index,
+                split_char,
+                missing_value_string):
+            (predicted_classes,
+             classified_with_unkown_value,
+             unkown_value_attrib_index) = self._compiled_tree.classify(
+                 attrib_columns,
+                 np.arange(len(sample_class)))
+            self._log_unkown_values(attrib_columns,
+                                    np.arange(len(sample_class)),
+                                    sample_keys,
+                                    classified_with_unkown_value,
+                                    unkown_value_attrib_index)
+            costs = self._dataset.test_cost_model.get_costs(
+                np.arange(first_sample_index, first_sample_index + len(sample_class)),
+                sample_class,
+                predicted_classes)
+            first_sample_index += len(sample_class)
+            yield (sample_class,
+                   predicted_classes,
+                   classified_with_unkown_value,
+                   unkown_value_attrib_index,
+                   costs)
+        logger.report_counts('Test samples from "{}"'.format(test_dataset_csv_filepath))
 
     def save_tree(self, filepath=None):
         """Saves the tree information: nodes, attributes used to split each one, values to each
@@ -661,6 +874,131 @@ class DecisionTree(object):
                 _aux_print_split(tree_output_file, self._root_node, curr_depth=0)
 
 
+class CompiledTree(object):
+    """Trained decision tree flattened into arrays, used to classify samples.
+
+        Nodes are numbered in breadth-first order, so the children of a node are consecutive. Only
+    what is needed for classification is kept, thus a CompiledTree is much smaller than its
+    TreeNodes and is cheap to copy or pickle.
+
+    Attributes:
+        num_nodes (int): number of nodes in the tree.
+        split_attrib_index (:obj:'np.array' of 'int'): the i-th entry is the index of the attribute
+            used to split the i-th node, or -1 if it is a leaf.
+        mid_point (:obj:'np.array' of 'float'): the i-th entry is the cut point of the i-th node's
+            split when it is numeric. Samples with values larger than it go to the second child.
+            NaN for other nodes.
+        first_child_index (:obj:'np.array' of 'int'): the i-th entry is the index of the first
+            child of the i-th node. Its j-th child has index `first_child_index[i] + j`.
+        num_children (:obj:'np.array' of 'int'): the i-th entry is the number of children of the
+            i-th node (zero for leaves).
+        value_to_split (:obj:'np.array' of 'int'): concatenation of the lookup tables of the nominal
+            splits. In the i-th node's table, the entry for a value is the index of the child it
+            goes to, or -1 if the value is unkown to the split.
+        value_to_split_start (:obj:'np.array' of 'int'): the i-th entry is the position in
+            `value_to_split` where the i-th node's table starts.
+        value_to_split_size (:obj:'np.array' of 'int'): the i-th entry is the size of the i-th
+            node's table (zero for numeric splits and leaves).
+        most_common_int_class (:obj:'np.array' of 'int'): the i-th entry is the most frequent class
+            among the training samples of the i-th node. Used as the prediction of leaves and of
+            samples with values unkown to the node's split.
+    """
+    def __init__(self, root_node):
+        """Compiles the tree rooted at the TreeNode `root_node`."""
+        tree_nodes = [root_node]
+        first_child_index = []
+        node_index = 0
+        while node_index < len(tree_nodes):
+            first_child_index.append(len(tree_nodes))
+            if not tree_nodes[node_index].is_leaf:
+                tree_nodes.extend(tree_nodes[node_index].nodes)
+            node_index += 1
+
+        self.num_nodes = len(tree_nodes)
+        self.split_attrib_index = np.full(self.num_nodes, -1, dtype=int)
+        self.mid_point = np.full(self.num_nodes, np.nan)
+        self.first_child_index = np.array(first_child_index, dtype=int)
+        self.num_children = np.zeros(self.num_nodes, dtype=int)
+        self.value_to_split_start = np.zeros(self.num_nodes, dtype=int)
+        self.value_to_split_size = np.zeros(self.num_nodes, dtype=int)
+        self.most_common_int_class = np.array(
+            [tree_node.most_common_int_class for tree_node in tree_nodes], dtype=int)
+        values_to_split_tables = []
+        value_to_split_start = 0
+        for node_index, tree_node in enumerate(tree_nodes):
+            if tree_node.is_leaf:
+                continue
+            self.split_attrib_index[node_index] = tree_node.node_split.separation_attrib_index
+            self.num_children[node_index] = len(tree_node.nodes)
+            if tree_node.node_split.mid_point is not None:
+                self.mid_point[node_index] = tree_node.node_split.mid_point
+                continue
+            values_to_split = tree_node.node_split.values_to_split
+            values_to_split_table = np.full(max(values_to_split) + 1, -1, dtype=int)
+            values_to_split_table[list(values_to_split)] = list(values_to_split.values())
+            values_to_split_tables.append(values_to_split_table)
+            self.value_to_split_start[node_index] = value_to_split_start
+            self.value_to_split_size[node_index] = len(values_to_split_table)
+            value_to_split_start += len(values_to_split_table)
+        if values_to_split_tables:
+            self.value_to_split = np.concatenate(values_to_split_tables)
+        else:
+            self.value_to_split = np.empty(0, dtype=int)
+
+    def _get_samples_split(self, node_index, samples_values):
+        """Returns an np.array with the index of the child of the node `node_index` that each sample
+        goes to, given their values in the node's split attribute. Samples with values unkown to the
+        split get -1.
+        """
+        if not self.value_to_split_size[node_index]:
+            samples_split = (samples_values > self.mid_point[node_index]).astype(int)
+            samples_split[np.isnan(samples_values)] = -1
+            return samples_split
+        value_to_split_start = self.value_to_split_start[node_index]
+        value_to_split_size = self.value_to_split_size[node_index]
+        is_known_value = (samples_values >= 0) & (samples_values < value_to_split_size)
+        samples_split = np.full(len(samples_values), -1, dtype=int)
+        samples_split[is_known_value] = self.value_to_split[
+            value_to_split_start + samples_values[is_known_value]]
+        return samples_split
+
+    def classify(self, attrib_columns, samples_indices):
+        """Classifies the samples `samples_indices` of `attrib_columns` (see
+        `Dataset.attrib_columns`), routing all samples that reach a node at once.
+
+        Returns:
+            A tuple of arrays containing, for each sample in `samples_indices` and in order, the
+            predicted class, wether it was classified with an unkown value and the attribute index
+            where the unkown value occurred (-1 if none).
+        """
+        samples_indices = np.asarray(samples_indices, dtype=int)
+        num_samples = len(samples_indices)
+        predicted_classes = np.empty(num_samples, dtype=int)
+        classified_with_unkown_value = np.zeros(num_samples, dtype=bool)
+        unkown_value_attrib_index = np.full(num_samples, -1, dtype=int)
+        # Each entry has a node index and the positions (in `samples_indices`) of the samples that
+        # reached it.
+        nodes_to_route = [(0, np.arange(num_samples))]
+        while nodes_to_route:
+            node_index, samples_positions = nodes_to_route.pop()
+            split_attrib_index = self.split_attrib_index[node_index]
+            if split_attrib_index < 0 or not len(samples_positions):
+                predicted_classes[samples_positions] = self.most_common_int_class[node_index]
+                continue
+            samples_split = self._get_samples_split(
+                node_index,
+                attrib_columns[split_attrib_index][samples_indices[samples_positions]])
+            unkown_samples_positions = samples_positions[samples_split == -1]
+            predicted_classes[unkown_samples_positions] = self.most_common_int_class[node_index]
+            classified_with_unkown_value[unkown_samples_positions] = True
+            unkown_value_attrib_index[unkown_samples_positions] = split_attrib_index
+            first_child_index = self.first_child_index[node_index]
+            for split_index in range(self.num_children[node_index]):
+                nodes_to_route.append((first_child_index + split_index,
+                                       samples_positions[samples_split == split_index]))
+        return predicted_classes, classified_with_unkown_value, unkown_value_attrib_index
+
+
 class TreeNode(object):
     """Contains information of a certain node of a decision tree.
 
@@ -684,8 +1022,16 @@ class TreeNode(object):
             many criteria when calculating the optimal split. Note that, for invalid attributes, the
             entry is a tuple with empty lists ([], []).
         curr_dataset (Dataset): dataset containing the training samples.
-        valid_samples_indices (:obj:'list' of 'int'): contains the indices of the valid training
-            samples.
+        valid_samples_indices (:obj:'np.array' of 'int'): contains the indices of the valid training
+            samples. When training out of core, it is `None` in nodes whose samples did not fit in
+            the memory budget (see `_LevelWiseTreeGrower`). In memory-lean training, it is `None`
+            once released, as are `contingency_tables`, `sorted_samples_indices` and, except at the
+            root, the lists of valid attributes (see `_release_training_state`).
+        sorted_samples_indices (:obj:'dict' of 'np.array' of 'int'): given the index of a valid
+            numeric attribute, returns the indices of the valid training samples sorted by their
+            value in this attribute (and then by class). It is calculated only at the root (or when
+            first needed), since child nodes receive it already partitioned, and it is freed once
+            the child nodes are created. `None` while not calculated.
         valid_nominal_attribute (:obj:'list' of 'bool'): list where the i-th entry indicates wether
             the i-th attribute from the dataset is valid and nominal or not.
         valid_numeric_attribute (:obj:'list' of 'bool'): list where the i-th entry indicates wether
@@ -695,16 +1041,20 @@ class TreeNode(object):
             number of samples having class i.
         most_common_int_class (int): index of the most frequent class.
         number_non_empty_classes (int): number of classes having no sample in this TreeNode.
+        num_bytes_released (int): number of bytes released by `_release_training_state`.
     """
     def __init__(self, curr_dataset, valid_samples_indices, valid_nominal_attribute,
                  valid_numeric_attribute, max_depth_remaining, min_samples_per_node,
-                 use_stop_conditions=False, max_p_value_chi_sq=0.1):
+                 use_stop_conditions=False, max_p_value_chi_sq=0.1, class_index_num_samples=None,
+                 contingency_tables=None, sorted_samples_indices=None, is_root=True):
         """Initializes a TreeNode instance with the given arguments.
 
         Args:
             curr_dataset (Dataset): dataset of samples used for training/split generation.
-            valid_samples_indices (:obj:'list' of 'int'): indices of samples that should be used for
-                training at this node.
+            valid_samples_indices (:obj:'np.array' of 'int'): indices of samples that should be used
+                for training at this node. Lists are converted to arrays. May be `None` when
+                `class_index_num_samples` and `contingency_tables` are given, as when training out
+                of core (see `_LevelWiseTreeGrower`).
             valid_nominal_attribute (:obj:'list' of 'bool'): the i-th entry informs wether the i-th
                 attribute is a valid nominal one.
             valid_numeric_attribute (:obj:'list' of 'bool'): the i-th entry informs wether the i-th
@@ -728,6 +1078,18 @@ class TreeNode(object):
             max_p_value_chi_sq (float, optional): is the maximum p-value allowed for an attribute to
                 be accepted when doing chi-square tests (that is, when `use_stop_conditions` is
                 `True`). A p-value of 1.0 is equal to 100%. Defaults to `0.1`.
+            class_index_num_samples (:obj:'list' of 'int', optional): number of samples of each
+                class at this node, when already known. Defaults to `None`, in which case it is
+                calculated from `valid_samples_indices`.
+            contingency_tables (:obj:'list' of 'ContingencyTable', optional): contingency tables of
+                this node, when already known. Defaults to `None`, in which case they are calculated
+                from `valid_samples_indices`.
+            sorted_samples_indices (:obj:'dict' of 'np.array' of 'int', optional): indices of
+                samples that should be used for training at this node sorted by each valid numeric
+                attribute, when already known. Defaults to `None`, in which case they are sorted
+                when first needed.
+            is_root (bool, optional): indicates if this node is the root of the tree. Defaults to
+                `True`.
         """
         self._use_stop_conditions = use_stop_conditions
         self._max_p_value_chi_sq = max_p_value_chi_sq
@@ -739,30 +1101,78 @@ class TreeNode(object):
         self.node_split = None
         self.nodes = []
         self.contingency_tables = None
+        self._is_root = is_root
+        self.num_bytes_released = 0
 
         self.dataset = curr_dataset
-        self.valid_samples_indices = valid_samples_indices
+        if valid_samples_indices is None:
+            self.valid_samples_indices = None
+        else:
+            self.valid_samples_indices = np.asarray(valid_samples_indices, dtype=int)
+        self.sorted_samples_indices = sorted_samples_indices
         # Note that self.valid_nominal_attribute might be different from
         # self.dataset.valid_nominal_attribute when use_stop_conditions == True.
         self.valid_nominal_attribute = valid_nominal_attribute
         self.valid_numeric_attribute = valid_numeric_attribute
 
-        self.num_valid_samples = len(valid_samples_indices)
-        self.class_index_num_samples = [0] * curr_dataset.num_classes
-        # Fill self.class_index_num_samples
-        for sample_index in valid_samples_indices:
-            self.class_index_num_samples[
-                curr_dataset.sample_class[sample_index]] += 1
+        if class_index_num_samples is None:
+            class_index_num_samples = np.bincount(
+                curr_dataset.sample_class[self.valid_samples_indices],
+                minlength=curr_dataset.num_classes).tolist()
+        self.class_index_num_samples = class_index_num_samples
+        self.num_valid_samples = sum(class_index_num_samples)
         self.number_non_empty_classes = sum(
             num_samples_curr_class > 0 for num_samples_curr_class in self.class_index_num_samples)
         self.most_common_int_class = self.class_index_num_samples.index(
             max(self.class_index_num_samples))
 
-        self._calculate_contingency_tables()
+        if contingency_tables is None:
+            self._calculate_contingency_tables()
+        else:
+            self.contingency_tables = contingency_tables
+
+
+    def __getstate__(self):
+        # The dataset is not pickled with the node (see `_ParallelTreeGrower`).
+        state = self.__dict__.copy()
+        state['dataset'] = None
+        return state
 
+    def _set_dataset(self, curr_dataset):
+        """Sets the dataset of every TreeNode in the subtree rooted at the current TreeNode."""
+        self.dataset = curr_dataset
+        for child_node in self.nodes:
+            child_node._set_dataset(curr_dataset)
+
+    def _get_sorted_samples_indices(self, attrib_index):
+        """Returns the indices of the valid training samples sorted by their value in the valid
+        numeric attribute `attrib_index` and then by class.
+        """
+        if self.sorted_samples_indices is None:
+            self.sorted_samples_indices = {}
+            valid_samples_classes = self.dataset.sample_class[self.valid_samples_indices]
+            for (curr_attrib_index,
+                 is_valid_numeric_attribute) in enumerate(self.valid_numeric_attribute):
+                if not is_valid_numeric_attribute:
+                    continue
+                valid_samples_values = self.dataset.attrib_columns[curr_attrib_index][
+                    self.valid_samples_indices]
+                self.sorted_samples_indices[curr_attrib_index] = self.valid_samples_indices[
+                    np.lexsort((valid_samples_classes, valid_samples_values))]
+        return self.sorted_samples_indices[attrib_index]
+
+    def get_sorted_numeric_values_and_classes(self, attrib_index):
+        """Returns a pair of arrays with the values in the valid numeric attribute `attrib_index`
+        and the classes of the valid training samples, sorted by value and then by class.
+        """
+        sorted_samples_indices = self._get_sorted_samples_indices(attrib_index)
+        return (self.dataset.attrib_columns[attrib_index][sorted_samples_indices],
+                self.dataset.sample_class[sorted_samples_indices])
 
     def _calculate_contingency_tables(self):
         self.contingency_tables = [] # list of `ContingencyTable`'s
+        num_classes = self.dataset.num_classes
+        valid_samples_classes = self.dataset.sample_class[self.valid_samples_indices]
         for (attrib_index,
              is_valid_nominal_attribute) in enumerate(self.valid_nominal_attribute):
             if not is_valid_nominal_attribute:
@@ -770,15 +1180,13 @@ class TreeNode(object):
                 continue
 
             attrib_num_values = len(self.dataset.attrib_int_to_value[attrib_index])
-            curr_contingency_table = np.zeros((attrib_num_values, self.dataset.num_classes),
-                                              dtype=int)
-            curr_values_num_samples = np.zeros((attrib_num_values), dtype=int)
-
-            for sample_index in self.valid_samples_indices:
-                curr_sample_value = self.dataset.samples[sample_index][attrib_index]
-                curr_sample_class = self.dataset.sample_class[sample_index]
-                curr_contingency_table[curr_sample_value][curr_sample_class] += 1
-                curr_values_num_samples[curr_sample_value] += 1
+            valid_samples_values = self.dataset.attrib_columns[attrib_index][
+                self.valid_samples_indices]
+            # Each (value, class) pair is counted in the cell `value * num_classes + class`.
+            curr_contingency_table = np.bincount(
+                valid_samples_values.astype(int) * num_classes + valid_samples_classes,
+                minlength=attrib_num_values * num_classes).reshape(attrib_num_values, num_classes)
+            curr_values_num_samples = curr_contingency_table.sum(axis=1)
 
             self.contingency_tables.append(ContingencyTable(
                 contingency_table=curr_contingency_table,
@@ -838,7 +1246,25 @@ class TreeNode(object):
         Args:
             criterion (Criterion): splitting criterion used to create the tree recursively.
         """
+        if not self._select_split(criterion):
+            self._release_training_state()
+            return None
+        self.nodes = self._create_children_nodes(self._get_splits_samples_indices(),
+                                                 self._get_splits_sorted_samples_indices())
+        # The child nodes already have their samples sorted.
+        self.sorted_samples_indices = None
+        self._release_training_state()
+        for child_node in self.nodes:
+            child_node.create_subtree(criterion)
 
+    def _select_split(self, criterion):
+        """Chooses the best split at the current TreeNode, saving it in `self.node_split`, and
+        updates the valid attributes that are sent to the child nodes. Returns `False` if the
+        current TreeNode should be a leaf, in which case no split is chosen.
+
+        Args:
+            criterion (Criterion): splitting criterion used to choose the split.
+        """
         def _get_values_to_split(splits_values):
             values_to_split = {}
             for split_index, split_values in enumerate(splits_values):
@@ -846,46 +1272,13 @@ class TreeNode(object):
                     values_to_split[value] = split_index
             return values_to_split
 
-        def _get_splits_samples_indices(num_splits, separation_attrib_index, values_to_split,
-                                        valid_samples_indices, samples):
-            splits_samples_indices = [[] for _ in range(num_splits)]
-            for sample_index in valid_samples_indices:
-                sample_value_in_split_attrib = samples[sample_index][separation_attrib_index]
-                try:
-                    splits_samples_indices[values_to_split[
-                        sample_value_in_split_attrib]].append(sample_index)
-                except KeyError:
-                    print('Should not get here. Sample {} has value {} at attribute # {}, '
-                          'but this value is unknown to the decision tree.'.format(
-                              sample_index,
-                              sample_value_in_split_attrib,
-                              separation_attrib_index))
-                    sys.exit(1)
-            return splits_samples_indices
-
-        def _get_numeric_splits_samples_indices(separation_attrib_index, mid_point,
-                                                valid_samples_indices, samples):
-            splits_samples_indices = [[], []]
-            for sample_index in valid_samples_indices:
-                sample_value_in_split_attrib = samples[sample_index][separation_attrib_index]
-                if sample_value_in_split_attrib <= mid_point:
-                    splits_samples_indices[0].append(sample_index)
-                else:
-                    splits_samples_indices[1].append(sample_index)
-            return splits_samples_indices
-
         def _has_multiple_nominal_values(values_num_samples):
             return sum(num_samples > 0 for num_samples in values_num_samples) > 1
 
-        def _has_multiple_numeric_values(valid_samples_indices, sample, attrib_index):
-            values_seen = set()
-            for sample_index in valid_samples_indices:
-                sample_value = sample[sample_index][attrib_index]
-                if sample_value not in values_seen:
-                    if values_seen:
-                        return True
-                    values_seen.add(sample_value)
-            return False
+        def _has_multiple_numeric_values(sorted_samples_indices, attrib_column):
+            return bool(len(sorted_samples_indices)
+                        and attrib_column[sorted_samples_indices[0]] != attrib_column[
+                            sorted_samples_indices[-1]])
 
         def _has_enough_samples_in_second_largest_class(class_index_num_samples,
                                                         most_common_int_class):
@@ -903,7 +1296,7 @@ class TreeNode(object):
                     and not _has_enough_samples_in_second_largest_class(
                         self.class_index_num_samples,
                         self.most_common_int_class))):
-            return None
+            return False
 
         # If a valid attribute has only one value, it should be marked as invalid from this node on.
         num_valid_nominal_attributes = 0
@@ -919,16 +1312,15 @@ class TreeNode(object):
         for attrib_index in range(len(self.valid_numeric_attribute)):
             if not self.valid_numeric_attribute[attrib_index]:
                 continue
-            if not _has_multiple_numeric_values(self.valid_samples_indices,
-                                                self.dataset.samples,
-                                                attrib_index):
+            if not _has_multiple_numeric_values(self._get_sorted_samples_indices(attrib_index),
+                                                self.dataset.attrib_columns[attrib_index]):
                 self.valid_numeric_attribute[attrib_index] = False
             else:
                 num_valid_numeric_attributes += 1
 
         # If there are no valid attributes, this node should be a leaf.
         if not num_valid_nominal_attributes and not num_valid_numeric_attributes:
-            return None
+            return False
 
         if self._use_stop_conditions:
             num_valid_attributes = sum(self.dataset.valid_numeric_attribute)
@@ -953,7 +1345,7 @@ class TreeNode(object):
                         new_valid_nominal_attribute_incl_chi_sq_test[attrib_index] = False
             self.valid_nominal_attribute = new_valid_nominal_attribute_incl_chi_sq_test
             if num_valid_attributes == 0:
-                return None
+                return False
 
         # Get best split. Note that self is the current TreeNode.
         (separation_attrib_index,
@@ -963,18 +1355,13 @@ class TreeNode(object):
         if math.isinf(criterion_value):
             # Stop condition when there is no valid attribute with more than one value (then
             # criterion_value is default, which is +- inf).
-            return None
+            return False
 
         if self.dataset.valid_numeric_attribute[separation_attrib_index]:
             # NUMERIC ATTRIBUTE
             last_left_value = list(splits_values[0])[0]
             first_right_value = list(splits_values[1])[0]
             mid_point = 0.5 * (last_left_value + first_right_value)
-            splits_samples_indices = _get_numeric_splits_samples_indices(
-                separation_attrib_index,
-                mid_point,
-                self.valid_samples_indices,
-                self.dataset.samples)
             # Save this node's split information.
             self.node_split = NodeSplit(separation_attrib_index,
                                         None,
@@ -988,35 +1375,192 @@ class TreeNode(object):
             # Calculate a list containing the inverse information of splits_values: here, given a
             # value, we want to know to which split it belongs
             values_to_split = _get_values_to_split(splits_values)
-
-            splits_samples_indices = _get_splits_samples_indices(len(splits_values),
-                                                                 separation_attrib_index,
-                                                                 values_to_split,
-                                                                 self.valid_samples_indices,
-                                                                 self.dataset.samples)
             # Save this node's split information.
             self.node_split = NodeSplit(separation_attrib_index,
                                         splits_values,
                                         values_to_split,
                                         criterion_value)
 
-        # Create subtrees
         self.is_leaf = False
         if self._use_stop_conditions:
             # Any attribute that has enough samples in the second most frequent value could pass the
             # chi-square test in a descendant node, thus we don't send the information of chi-square
             # test to child nodes.
             self.valid_nominal_attribute = new_valid_nominal_attribute
-        for curr_split_samples_indices in splits_samples_indices:
-            self.nodes.append(TreeNode(self.dataset,
-                                       curr_split_samples_indices,
-                                       self.valid_nominal_attribute[:],
-                                       self.valid_numeric_attribute[:],
-                                       self.max_depth_remaining - 1,
-                                       self._min_samples_per_node,
-                                       self._use_stop_conditions,
-                                       self._max_p_value_chi_sq))
-            self.nodes[-1].create_subtree(criterion)
+        return True
+
+    def _get_num_splits(self):
+        """Returns the number of child nodes created by `self.node_split`."""
+        if self.node_split.mid_point is not None:
+            return 2
+        return len(self.node_split.splits_values)
+
+    def _get_samples_split(self, samples_indices):
+        """Returns an np.array with the index of the split (that is, of the child node) that each
+        training sample in `samples_indices` belongs to, according to `self.node_split`.
+        """
+        separation_attrib_index = self.node_split.separation_attrib_index
+        attrib_column = self.dataset.attrib_columns[separation_attrib_index]
+        samples_values = attrib_column[samples_indices]
+        if self.node_split.mid_point is not None:
+            return (samples_values > self.node_split.mid_point).astype(int)
+
+        # value_to_split[value] = split_index, or -1 if the value is not in any split.
+        value_to_split = np.full(len(self.dataset.attrib_int_to_value[separation_attrib_index]),
+                                 -1,
+                                 dtype=int)
+        value_to_split[list(self.node_split.values_to_split)] = list(
+            self.node_split.values_to_split.values())
+        samples_split = value_to_split[samples_values]
+        if np.any(samples_split == -1):
+            first_unknown_index = int(np.argmax(samples_split == -1))
+            print('Should not get here. Sample {} has value {} at attribute # {}, '
+                  'but this value is unknown to the decision tree.'.format(
+                      samples_indices[first_unknown_index],
+                      samples_values[first_unknown_index],
+                      separation_attrib_index))
+            sys.exit(1)
+        return samples_split
+
+    def _get_splits_samples_indices(self):
+        """Returns a list with the indices of the training samples of each child node."""
+        samples_split = self._get_samples_split(self.valid_samples_indices)
+        return [self.valid_samples_indices[samples_split == split_index]
+                for split_index in range(self._get_num_splits())]
+
+    def _get_splits_sorted_samples_indices(self):
+        """Returns a list with the `sorted_samples_indices` of each child node. These are obtained
+        partitioning the current TreeNode's sorted indices, which keeps them sorted.
+        """
+        splits_sorted_samples_indices = [{} for _ in range(self._get_num_splits())]
+        for (attrib_index,
+             is_valid_numeric_attribute) in enumerate(self.valid_numeric_attribute):
+            if not is_valid_numeric_attribute:
+                continue
+            sorted_samples_indices = self._get_sorted_samples_indices(attrib_index)
+            samples_split = self._get_samples_split(sorted_samples_indices)
+            for split_index, split_sorted_samples_indices in enumerate(
+                    splits_sorted_samples_indices):
+                split_sorted_samples_indices[attrib_index] = sorted_samples_indices[
+                    samples_split == split_index]
+        return splits_sorted_samples_indices
+
+    def _create_children_nodes(self, splits_samples_indices, splits_sorted_samples_indices):
+        """Returns a list with a new TreeNode for each child of the current TreeNode, given the
+        indices of their training samples, unsorted and sorted by each valid numeric attribute. Only
+        the smaller children count their samples: the class counts and contingency tables of the
+        largest child are the current TreeNode's minus the other children's.
+        """
+        largest_split_index = max(range(len(splits_samples_indices)),
+                                  key=lambda split_index: len(splits_samples_indices[split_index]))
+        children_nodes = [
+            self._create_child_node(curr_split_samples_indices,
+                                    sorted_samples_indices=curr_split_sorted_samples_indices)
+            if split_index != largest_split_index else None
+            for split_index, (curr_split_samples_indices,
+                              curr_split_sorted_samples_indices) in enumerate(
+                                  zip(splits_samples_indices, splits_sorted_samples_indices))]
+        siblings_nodes = [child_node for child_node in children_nodes if child_node is not None]
+
+        class_index_num_samples = [
+            num_samples - sum(sibling_node.class_index_num_samples[class_index]
+                              for sibling_node in siblings_nodes)
+            for class_index, num_samples in enumerate(self.class_index_num_samples)]
+        contingency_tables = []
+        for (attrib_index,
+             is_valid_nominal_attribute) in enumerate(self.valid_nominal_attribute):
+            if not is_valid_nominal_attribute:
+                contingency_tables.append(ContingencyTable())
+                continue
+            curr_contingency_table = self.contingency_tables[attrib_index].contingency_table.copy()
+            curr_values_num_samples = self.contingency_tables[
+                attrib_index].values_num_samples.copy()
+            for sibling_node in siblings_nodes:
+                curr_contingency_table -= sibling_node.contingency_tables[
+                    attrib_index].contingency_table
+                curr_values_num_samples -= sibling_node.contingency_tables[
+                    attrib_index].values_num_samples
+            contingency_tables.append(ContingencyTable(
+                contingency_table=curr_contingency_table,
+                values_num_samples=curr_values_num_samples))
+
+        children_nodes[largest_split_index] = self._create_child_node(
+            splits_samples_indices[largest_split_index],
+            class_index_num_samples=class_index_num_samples,
+            contingency_tables=contingency_tables,
+            sorted_samples_indices=splits_sorted_samples_indices[largest_split_index])
+        return children_nodes
+
+    def _create_child_node(self, valid_samples_indices, class_index_num_samples=None,
+                           contingency_tables=None, sorted_samples_indices=None):
+        """Returns a new TreeNode for a child of the current TreeNode, which must already have a
+        split. The arguments are the same ones from `TreeNode.__init__`.
+        """
+        return TreeNode(self.dataset,
+                        valid_samples_indices,
+                        self.valid_nominal_attribute[:],
+                        self.valid_numeric_attribute[:],
+                        self.max_depth_remaining - 1,
+                        self._min_samples_per_node,
+                        self._use_stop_conditions,
+                        self._max_p_value_chi_sq,
+                        class_index_num_samples=class_index_num_samples,
+                        contingency_tables=contingency_tables,
+                        sorted_samples_indices=sorted_samples_indices,
+                        is_root=False)
+
+    def _release_training_state(self):
+        """Releases the state of the current TreeNode which is only needed during training, if
+        `MEMORY_LEAN_TRAINING` is set. Must only be called once the current TreeNode is known to be
+        a leaf or its children are created.
+
+        The contingency tables, the indices of the training samples (unsorted and sorted) and the
+        lists of valid attributes are dropped, while the class counts are kept. The root also keeps
+        its lists of valid attributes and the number of samples per value of its split attribute,
+        which are reported by the experiments. The number of bytes released is added to
+        `num_bytes_released`.
+        """
+        if not MEMORY_LEAN_TRAINING:
+            return
+        num_bytes_released = 0
+        if self.valid_samples_indices is not None:
+            num_bytes_released += self.valid_samples_indices.nbytes
+            self.valid_samples_indices = None
+        if self.sorted_samples_indices is not None:
+            num_bytes_released += sum(sorted_samples_indices.nbytes for sorted_samples_indices
+                                      in self.sorted_samples_indices.values())
+            self.sorted_samples_indices = None
+        if self.contingency_tables is not None:
+            kept_attrib_index = None
+            if self._is_root and not self.is_leaf and self.node_split.mid_point is None:
+                kept_attrib_index = self.node_split.separation_attrib_index
+            for attrib_index, contingency_table in enumerate(self.contingency_tables):
+                if contingency_table.contingency_table is not None:
+                    num_bytes_released += contingency_table.contingency_table.nbytes
+                if (contingency_table.values_num_samples is not None
+                        and attrib_index != kept_attrib_index):
+                    num_bytes_released += contingency_table.values_num_samples.nbytes
+            if kept_attrib_index is None:
+                self.contingency_tables = None
+            else:
+                self.contingency_tables = [
+                    ContingencyTable(values_num_samples=contingency_table.values_num_samples)
+                    if attrib_index == kept_attrib_index else ContingencyTable()
+                    for attrib_index, contingency_table in enumerate(self.contingency_tables)]
+        if not self._is_root and self.valid_nominal_attribute is not None:
+            num_bytes_released += (sys.getsizeof(self.valid_nominal_attribute)
+                                   + sys.getsizeof(self.valid_numeric_attribute))
+            self.valid_nominal_attribute = None
+            self.valid_numeric_attribute = None
+        self.num_bytes_released += num_bytes_released
+
+    def get_num_bytes_released(self):
+        """Returns the number of bytes released by `_release_training_state` in the tree rooted at
+        the current TreeNode."""
+        num_bytes_released = self.num_bytes_released
+        for child_node in self.nodes:
+            num_bytes_released += child_node.get_num_bytes_released()
+        return num_bytes_released
 
     def get_most_popular_subtree(self):
         """Returns the number of samples in the most popular subtree. If it is leaf, returns
@@ -1068,6 +1612,514 @@ class TreeNode(object):
         return ret + 1
 
 
+class _ParallelTreeGrower(object):
+    """Grows a decision tree depth-first, growing the large child subtrees of the root in a pool of
+    processes.
+
+    The root is split in the main process. Its children with at least `min_samples` training samples
+    are sent to the pool, which grows their subtrees with `TreeNode.create_subtree` while the main
+    process grows the smaller ones. The processes are forked after the dataset is set, so they share
+    its columns instead of receiving them pickled. TreeNodes are pickled without their dataset,
+    which is set again when the subtrees are stitched back into the root.
+
+    Each subtree sent to the pool seeds `np.random` from a `np.random.SeedSequence`, whose entropy
+    is drawn once per tree from `np.random` and whose spawn key is the subtree's split index. Thus
+    criteria that choose random partitions (as GW's) give the same tree on every run, regardless of
+    the number of processes and of which process grows each subtree.
+    """
+    def __init__(self, min_samples, num_processes=None):
+        """Initializes the grower. When `num_processes` is `None`, uses the number of CPUs."""
+        self._min_samples = min_samples
+        if num_processes is None:
+            self._num_processes = os.cpu_count()
+        else:
+            self._num_processes = num_processes
+
+    def grow(self, root_node, criterion):
+        """Grows the tree rooted at `root_node` with the given criterion."""
+        global _PARALLEL_DATASET
+        entropy = np.random.randint(2**32)
+        if not root_node._select_split(criterion):
+            root_node._release_training_state()
+            return
+        root_node.nodes = root_node._create_children_nodes(
+            root_node._get_splits_samples_indices(),
+            root_node._get_splits_sorted_samples_indices())
+        root_node.sorted_samples_indices = None
+        root_node._release_training_state()
+        curr_dataset = root_node.dataset
+        _PARALLEL_DATASET = curr_dataset
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self._num_processes,
+                    mp_context=multiprocessing.get_context('fork')) as process_pool:
+                subtrees_futures = {}
+                for split_index, child_node in enumerate(root_node.nodes):
+                    if child_node.num_valid_samples >= self._min_samples:
+                        seed = np.random.SeedSequence(entropy,
+                                                      spawn_key=(split_index,)).generate_state(1)[0]
+                        subtrees_futures[split_index] = process_pool.submit(
+                            _grow_subtree_in_process, child_node, criterion, seed)
+                for split_index, child_node in enumerate(root_node.nodes):
+                    if split_index not in subtrees_futures:
+                        child_node.create_subtree(criterion)
+                for split_index, subtree_future in subtrees_futures.items():
+                    root_node.nodes[split_index] = subtree_future.result()
+                    root_node.nodes[split_index]._set_dataset(curr_dataset)
+        finally:
+            _PARALLEL_DATASET = None
+
+
+def _grow_subtree_in_process(tree_node, criterion, seed):
+    """Grows, in a process of `_ParallelTreeGrower`'s pool, the subtree rooted at `tree_node`."""
+    tree_node._set_dataset(_PARALLEL_DATASET)
+    np.random.seed(seed)
+    tree_node.create_subtree(criterion)
+    return tree_node
+
+
+class _BestFirstTreeGrower(object):
+    """Grows a decision tree iteratively, always splitting next the node with highest priority (see
+    `BEST_FIRST_PRIORITY`), until there are no nodes left to split or a budget runs out.
+
+    Nodes waiting to be split are kept in a heap. A split is only made if the tree still fits in
+    `max_leaves` and `max_nodes` afterwards; otherwise the node becomes a leaf and growth goes on
+    with the next one. Once `time_budget` runs out, every node waiting to be split becomes a leaf.
+    Thus the tree is valid whenever growth stops. Without budgets it is the same tree grown
+    depth-first, except when using criteria that choose random partitions (as GW's).
+
+    When the priority is the number of samples, a node's split is only chosen when it leaves the
+    heap, so no time is spent choosing splits of nodes that end up as leaves. When it is the
+    impurity gain, the split must be chosen before the node enters the heap.
+    """
+    def __init__(self, priority='num samples', max_leaves=None, max_nodes=None, time_budget=None):
+        """Initializes the grower. Budgets which are `None` are not limited."""
+        if priority not in ('num samples', 'impurity gain'):
+            print('Unkown best-first priority: {}. Should be either "num samples" or '
+                  '"impurity gain".'.format(priority))
+            sys.exit(1)
+        self._priority = priority
+        self._max_leaves = max_leaves
+        self._max_nodes = max_nodes
+        self._time_budget = time_budget
+        # Heap of (priority, insertion order, TreeNode), with the highest priority first.
+        self._nodes_heap = []
+        self._num_pushed_nodes = 0
+
+    def grow(self, root_node, criterion):
+        """Grows the tree rooted at `root_node` with the given criterion. Returns `True` if a budget
+        ran out before the tree was fully grown."""
+        start_time = timeit.default_timer()
+        num_nodes = 1
+        num_leaves = 1
+        budget_ran_out = False
+        self._push_node(root_node, criterion)
+        while self._nodes_heap:
+            tree_node = heapq.heappop(self._nodes_heap)[2]
+            if (self._time_budget is not None
+                    and timeit.default_timer() - start_time >= self._time_budget):
+                self._make_leaf(tree_node)
+                budget_ran_out = True
+                break
+            if self._priority == 'num samples' and not tree_node._select_split(criterion):
+                tree_node._release_training_state()
+                continue
+            num_splits = tree_node._get_num_splits()
+            if ((self._max_nodes is not None and num_nodes + num_splits > self._max_nodes)
+                    or (self._max_leaves is not None
+                        and num_leaves + num_splits - 1 > self._max_leaves)):
+                self._make_leaf(tree_node)
+                budget_ran_out = True
+                continue
+            tree_node.nodes = tree_node._create_children_nodes(
+                tree_node._get_splits_samples_indices(),
+                tree_node._get_splits_sorted_samples_indices())
+            tree_node.sorted_samples_indices = None
+            tree_node._release_training_state()
+            num_nodes += num_splits
+            num_leaves += num_splits - 1
+            for child_node in tree_node.nodes:
+                self._push_node(child_node, criterion)
+        for _, _, tree_node in self._nodes_heap:
+            self._make_leaf(tree_node)
+        self._nodes_heap = []
+        return budget_ran_out
+
+    def _push_node(self, tree_node, criterion):
+        """Puts `tree_node` in the heap of nodes waiting to be split, unless it must be a leaf."""
+        if self._priority == 'num samples':
+            priority = -tree_node.num_valid_samples
+        else:
+            if not tree_node._select_split(criterion):
+                tree_node._release_training_state()
+                return
+            priority = -self._get_impurity_gain(tree_node)
+        heapq.heappush(self._nodes_heap, (priority, self._num_pushed_nodes, tree_node))
+        self._num_pushed_nodes += 1
+
+    @staticmethod
+    def _get_impurity_gain(tree_node):
+        """Returns the decrease in the Gini impurity, weighted by the number of samples, given by
+        the split of `tree_node`.
+        """
+        def _get_weighted_gini_impurity(class_index_num_samples):
+            num_samples = class_index_num_samples.sum()
+            if num_samples == 0:
+                return 0.0
+            return num_samples - np.square(class_index_num_samples).sum() / num_samples
+
+        num_classes = tree_node.dataset.num_classes
+        num_splits = tree_node._get_num_splits()
+        samples_split = tree_node._get_samples_split(tree_node.valid_samples_indices)
+        samples_class = tree_node.dataset.sample_class[tree_node.valid_samples_indices]
+        splits_class_num_samples = np.bincount(samples_split * num_classes + samples_class,
+                                               minlength=num_splits * num_classes).reshape(
+                                                   num_splits, num_classes)
+        return (_get_weighted_gini_impurity(np.array(tree_node.class_index_num_samples))
+                - sum(_get_weighted_gini_impurity(class_num_samples)
+                      for class_num_samples in splits_class_num_samples))
+
+    @staticmethod
+    def _make_leaf(tree_node):
+        """Makes `tree_node`, whose split may already have been chosen, a leaf."""
+        tree_node.is_leaf = True
+        tree_node.node_split = None
+        tree_node._release_training_state()
+
+
+def _get_training_num_bytes_per_sample(curr_dataset):
+    """Returns the number of bytes used by each training sample of a TreeNode: its index in the
+    node's valid samples and in the node's sorted samples of each valid numeric attribute.
+    """
+    return np.dtype(int).itemsize * (1 + sum(curr_dataset.valid_numeric_attribute))
+
+
+class _LevelWiseTreeGrower(object):
+    """Grows a decision tree one level at a time.
+
+    Each training sample has the id of the node of the current level where it is, or -1 if it is in
+    no node of this level. In each level, the class counts and contingency tables of all its nodes
+    are calculated with one `np.bincount` per attribute over the samples' nodes' ids and values, the
+    best split of each node is chosen by the criterion and then another pass over the samples sends
+    each one to its child node in the next level. Numeric attributes are sorted only once, at the
+    root: the sorted indices of all nodes in a level are obtained in one pass over each sorted
+    attribute.
+
+    When a memory budget is given, the indices of the training samples and the ids of their nodes
+    are kept in memory-mapped files in `temp_folder` and read in chunks of `OUT_OF_CORE_CHUNK_SIZE`
+    samples, and only the nodes with more samples than fit in the budget (the large nodes) are grown
+    level by level. The indices of the small ones are read in batches that fit in the budget, and
+    their subtrees are grown in memory by `TreeNode.create_subtree`. Choosing a split on a numeric
+    attribute needs the node's samples sorted by value, which don't fit in the budget, so numeric
+    attributes are not used to split large nodes, but are still valid in their children.
+    """
+    def __init__(self, curr_dataset, training_samples_indices, max_depth, min_samples_per_node,
+                 use_stop_conditions, max_p_value_chi_sq, memory_budget=None, temp_folder=None):
+        """Initializes the samples' nodes' ids. The arguments are the same ones from
+        `DecisionTree.train`, with `memory_budget` in bytes. When there is a budget, `temp_folder`
+        is where the training samples' indices and nodes' ids are written to.
+        """
+        self._dataset = curr_dataset
+        self._max_depth = max_depth
+        self._min_samples_per_node = min_samples_per_node
+        self._use_stop_conditions = use_stop_conditions
+        self._max_p_value_chi_sq = max_p_value_chi_sq
+        self._root_node = None
+
+        num_samples = len(training_samples_indices)
+        # self._nodes_ids[i] is the id of the node containing the i-th training sample in the
+        # current level, or -1 if it is in no node of this level.
+        if memory_budget is None:
+            self._max_samples_in_memory = None
+            self._chunk_size = max(num_samples, 1)
+            self._samples_indices = np.array(training_samples_indices, dtype=int)
+            self._nodes_ids = np.zeros(num_samples, dtype=np.int32)
+            # self._sorted_positions[attrib_index] contains the positions of the training samples
+            # sorted by their value in this numeric attribute and then by class.
+            samples_classes = curr_dataset.sample_class[self._samples_indices]
+            self._sorted_positions = {}
+            for (attrib_index,
+                 is_valid_numeric_attribute) in enumerate(curr_dataset.valid_numeric_attribute):
+                if is_valid_numeric_attribute:
+                    self._sorted_positions[attrib_index] = np.lexsort(
+                        (samples_classes,
+                         curr_dataset.attrib_columns[attrib_index][self._samples_indices]))
+        else:
+            self._max_samples_in_memory = max(
+                memory_budget // _get_training_num_bytes_per_sample(curr_dataset), 1)
+            self._chunk_size = OUT_OF_CORE_CHUNK_SIZE
+            self._samples_indices = np.lib.format.open_memmap(
+                os.path.join(temp_folder, 'samples_indices.npy'),
+                mode='w+',
+                dtype=int,
+                shape=(num_samples,))
+            self._nodes_ids = np.lib.format.open_memmap(
+                os.path.join(temp_folder, 'nodes_ids.npy'),
+                mode='w+',
+                dtype=np.int32,
+                shape=(num_samples,))
+            for start in range(0, num_samples, self._chunk_size):
+                end = start + self._chunk_size
+                self._samples_indices[start:end] = training_samples_indices[start:end]
+                self._nodes_ids[start:end] = 0
+            self._sorted_positions = None
+
+    def _iterate_chunks(self):
+        """Yields, for each chunk of training samples, a tuple containing its first position and
+        in-memory copies of its samples' indices and nodes' ids.
+        """
+        for start in range(0, len(self._samples_indices), self._chunk_size):
+            end = start + self._chunk_size
+            yield (start,
+                   np.array(self._samples_indices[start:end]),
+                   np.array(self._nodes_ids[start:end]))
+
+    @staticmethod
+    def _group_by_node(nodes_ids, values, first_node_id, num_nodes):
+        """Returns a list with, for each of the `num_nodes` nodes starting at id `first_node_id`,
+        the entries of `values` whose entry in `nodes_ids` is the node's id, in their original
+        order.
+        """
+        is_in_nodes = (nodes_ids >= first_node_id) & (nodes_ids < first_node_id + num_nodes)
+        nodes_positions = nodes_ids[is_in_nodes] - first_node_id
+        values = values[is_in_nodes]
+        # Stable sort, so that the values of each node are kept in their original order.
+        values_order = np.argsort(nodes_positions, kind='stable')
+        nodes_ends = np.cumsum(np.bincount(nodes_positions, minlength=num_nodes))
+        return np.split(values[values_order], nodes_ends[:-1])
+
+    def _place_node(self, parent_node, split_index, tree_node):
+        if parent_node is None:
+            self._root_node = tree_node
+        else:
+            parent_node.nodes[split_index] = tree_node
+
+    def grow(self, criterion):
+        """Grows the tree with the given criterion and returns its root TreeNode."""
+        # Nodes of the current level grown level-wise, given as (parent TreeNode, split index),
+        # where the root has no parent. A node's id is its position in this list.
+        large_nodes_places = [(None, 0)]
+        large_nodes = []
+        while large_nodes_places:
+            # The children of the previous level's nodes are all created now.
+            parent_nodes = large_nodes
+            large_nodes = self._create_large_nodes(large_nodes_places)
+            for tree_node in parent_nodes:
+                tree_node._release_training_state()
+            if self._max_samples_in_memory is None:
+                self._set_samples_indices(large_nodes)
+            large_nodes_places = []
+            small_nodes_places = []
+            small_nodes_num_samples = []
+            # Child nodes of each large node, as (is large, position in large_nodes_places or
+            # small_nodes_places), or None if the node is a leaf.
+            nodes_children = []
+            for tree_node in large_nodes:
+                if self._max_samples_in_memory is None:
+                    is_split = tree_node._select_split(criterion)
+                else:
+                    # Numeric attributes are hidden while the split is chosen and then restored,
+                    # so that the children can use them.
+                    valid_numeric_attribute = tree_node.valid_numeric_attribute
+                    tree_node.valid_numeric_attribute = [False] * len(valid_numeric_attribute)
+                    is_split = tree_node._select_split(criterion)
+                    tree_node.valid_numeric_attribute = valid_numeric_attribute
+                if is_split:
+                    splits_num_samples = self._get_splits_num_samples(tree_node)
+                tree_node.sorted_samples_indices = None
+                if not is_split:
+                    nodes_children.append(None)
+                    continue
+                tree_node.nodes = [None] * len(splits_num_samples)
+                curr_node_children = []
+                for split_index, split_num_samples in enumerate(splits_num_samples):
+                    if (self._max_samples_in_memory is None
+                            or split_num_samples > self._max_samples_in_memory):
+                        curr_node_children.append((True, len(large_nodes_places)))
+                        large_nodes_places.append((tree_node, split_index))
+                    else:
+                        curr_node_children.append((False, len(small_nodes_places)))
+                        small_nodes_places.append((tree_node, split_index))
+                        small_nodes_num_samples.append(split_num_samples)
+                nodes_children.append(curr_node_children)
+
+            # In the next level, large nodes have the first ids, followed by the small ones.
+            splits_nodes_ids = [
+                None if curr_node_children is None else np.array(
+                    [position if is_large else len(large_nodes_places) + position
+                     for is_large, position in curr_node_children],
+                    dtype=np.int32)
+                for curr_node_children in nodes_children]
+            if large_nodes_places or small_nodes_places:
+                self._send_samples_to_children(large_nodes, splits_nodes_ids)
+            self._grow_small_nodes(small_nodes_places,
+                                   small_nodes_num_samples,
+                                   len(large_nodes_places),
+                                   criterion)
+        for tree_node in large_nodes:
+            tree_node._release_training_state()
+        return self._root_node
+
+    def _create_large_nodes(self, large_nodes_places):
+        """Creates the TreeNodes of the current level's large nodes, calculating their class counts
+        and contingency tables in a pass over the training samples. Returns the list of created
+        TreeNodes, in order of id.
+        """
+        num_nodes = len(large_nodes_places)
+        num_classes = self._dataset.num_classes
+        nodes_valid_nominal_attribute = [
+            (self._dataset.valid_nominal_attribute if parent_node is None
+             else parent_node.valid_nominal_attribute)
+            for parent_node, _ in large_nodes_places]
+        attribs_num_values = {
+            attrib_index: len(self._dataset.attrib_int_to_value[attrib_index])
+            for attrib_index in range(len(self._dataset.valid_nominal_attribute))
+            if any(valid_nominal_attribute[attrib_index]
+                   for valid_nominal_attribute in nodes_valid_nominal_attribute)}
+
+        # Counts of (node id, class) and of (node id, attribute value, class), flattened.
+        nodes_classes_num_samples = np.zeros(num_nodes * num_classes, dtype=int)
+        attribs_tables = {attrib_index: np.zeros(num_nodes * attrib_num_values * num_classes,
+                                                 dtype=int)
+                          for attrib_index, attrib_num_values in attribs_num_values.items()}
+        for _, samples_indices, nodes_ids in self._iterate_chunks():
+            is_in_large_node = (nodes_ids >= 0) & (nodes_ids < num_nodes)
+            samples_indices = samples_indices[is_in_large_node]
+            nodes_ids = nodes_ids[is_in_large_node].astype(int)
+            samples_classes = self._dataset.sample_class[samples_indices]
+            nodes_classes_num_samples += np.bincount(nodes_ids * num_classes + samples_classes,
+                                                     minlength=num_nodes * num_classes)
+            for attrib_index, attrib_num_values in attribs_num_values.items():
+                samples_values = self._dataset.attrib_columns[attrib_index][samples_indices]
+                attribs_tables[attrib_index] += np.bincount(
+                    (nodes_ids * attrib_num_values + samples_values) * num_classes
+                    + samples_classes,
+                    minlength=num_nodes * attrib_num_values * num_classes)
+        nodes_classes_num_samples = nodes_classes_num_samples.reshape(num_nodes, num_classes)
+        for attrib_index, attrib_num_values in attribs_num_values.items():
+            attribs_tables[attrib_index] = attribs_tables[attrib_index].reshape(
+                num_nodes, attrib_num_values, num_classes)
+
+        large_nodes = []
+        for node_id, (parent_node, split_index) in enumerate(large_nodes_places):
+            contingency_tables = []
+            for (attrib_index,
+                 is_valid_nominal_attribute) in enumerate(nodes_valid_nominal_attribute[node_id]):
+                if not is_valid_nominal_attribute:
+                    contingency_tables.append(ContingencyTable())
+                    continue
+                curr_contingency_table = attribs_tables[attrib_index][node_id].copy()
+                contingency_tables.append(ContingencyTable(
+                    contingency_table=curr_contingency_table,
+                    values_num_samples=curr_contingency_table.sum(axis=1)))
+            class_index_num_samples = nodes_classes_num_samples[node_id].tolist()
+            if parent_node is None:
+                tree_node = TreeNode(self._dataset,
+                                     None,
+                                     self._dataset.valid_nominal_attribute[:],
+                                     self._dataset.valid_numeric_attribute[:],
+                                     self._max_depth,
+                                     self._min_samples_per_node,
+                                     self._use_stop_conditions,
+                                     self._max_p_value_chi_sq,
+                                     class_index_num_samples=class_index_num_samples,
+                                     contingency_tables=contingency_tables)
+            else:
+                tree_node = parent_node._create_child_node(
+                    None,
+                    class_index_num_samples=class_index_num_samples,
+                    contingency_tables=contingency_tables)
+            self._place_node(parent_node, split_index, tree_node)
+            large_nodes.append(tree_node)
+        return large_nodes
+
+    def _set_samples_indices(self, large_nodes):
+        """Sets the `valid_samples_indices` and `sorted_samples_indices` of every large node, which
+        must be in memory.
+        """
+        for tree_node, node_samples_indices in zip(
+                large_nodes, self._read_samples_indices(0, len(large_nodes))):
+            tree_node.valid_samples_indices = node_samples_indices
+            tree_node.sorted_samples_indices = {}
+        for attrib_index, sorted_positions in self._sorted_positions.items():
+            if not any(tree_node.valid_numeric_attribute[attrib_index]
+                       for tree_node in large_nodes):
+                continue
+            for tree_node, node_sorted_samples_indices in zip(
+                    large_nodes,
+                    self._group_by_node(self._nodes_ids[sorted_positions],
+                                        self._samples_indices[sorted_positions],
+                                        0,
+                                        len(large_nodes))):
+                if tree_node.valid_numeric_attribute[attrib_index]:
+                    tree_node.sorted_samples_indices[attrib_index] = node_sorted_samples_indices
+
+    def _get_splits_num_samples(self, tree_node):
+        """Returns the number of samples in each child of `tree_node`, which must already have a
+        split.
+        """
+        node_split = tree_node.node_split
+        if node_split.mid_point is not None:
+            # Numeric splits are only chosen when training in memory.
+            return np.bincount(tree_node._get_samples_split(tree_node.valid_samples_indices),
+                               minlength=2).tolist()
+        values_num_samples = tree_node.contingency_tables[
+            node_split.separation_attrib_index].values_num_samples
+        return [sum(int(values_num_samples[value]) for value in split_values)
+                for split_values in node_split.splits_values]
+
+    def _send_samples_to_children(self, large_nodes, splits_nodes_ids):
+        """Sets the id of each training sample's node to the id of its child node in the next
+        level, given by `splits_nodes_ids[node_id][split_index]`. Samples in leaves get id -1.
+        """
+        for start, samples_indices, nodes_ids in self._iterate_chunks():
+            new_nodes_ids = np.full(len(nodes_ids), -1, dtype=np.int32)
+            for node_id, node_positions in enumerate(self._group_by_node(
+                    nodes_ids, np.arange(len(nodes_ids)), 0, len(large_nodes))):
+                if splits_nodes_ids[node_id] is None or not len(node_positions):
+                    continue
+                new_nodes_ids[node_positions] = splits_nodes_ids[node_id][
+                    large_nodes[node_id]._get_samples_split(samples_indices[node_positions])]
+            self._nodes_ids[start:start + len(nodes_ids)] = new_nodes_ids
+
+    def _read_samples_indices(self, first_node_id, num_nodes):
+        """Returns a list with the indices of the training samples in each of the `num_nodes` nodes
+        starting at id `first_node_id`, in training order. Needs one pass over the training samples.
+        """
+        nodes_samples_indices = [[] for _ in range(num_nodes)]
+        for _, samples_indices, nodes_ids in self._iterate_chunks():
+            for node_position, node_samples_indices in enumerate(
+                    self._group_by_node(nodes_ids, samples_indices, first_node_id, num_nodes)):
+                nodes_samples_indices[node_position].append(node_samples_indices)
+        return [np.concatenate(node_samples_indices) if node_samples_indices
+                else np.zeros(0, dtype=int)
+                for node_samples_indices in nodes_samples_indices]
+
+    def _grow_small_nodes(self, small_nodes_places, small_nodes_num_samples, first_small_node_id,
+                          criterion):
+        """Reads the indices of the small nodes in batches that fit in the memory budget, creating
+        each node and growing its subtree in memory.
+        """
+        batch_start = 0
+        while batch_start < len(small_nodes_places):
+            batch_end = batch_start + 1
+            batch_num_samples = small_nodes_num_samples[batch_start]
+            while (batch_end < len(small_nodes_places)
+                   and (batch_num_samples + small_nodes_num_samples[batch_end]
+                        <= self._max_samples_in_memory)):
+                batch_num_samples += small_nodes_num_samples[batch_end]
+                batch_end += 1
+            batch_samples_indices = self._read_samples_indices(first_small_node_id + batch_start,
+                                                               batch_end - batch_start)
+            for (parent_node, split_index), node_samples_indices in zip(
+                    small_nodes_places[batch_start:batch_end], batch_samples_indices):
+                tree_node = parent_node._create_child_node(node_samples_indices)
+                self._place_node(parent_node, split_index, tree_node)
+                tree_node.create_subtree(criterion)
+            del batch_samples_indices
+            batch_start = batch_end
+
+
 class NodeSplit(object):
     """Data structure containing information about the best split found on a node.
 
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+This module contains the logging layer shared by the datasets, decision trees and experiments.
+
+Messages are written to the standard output, in levels: messages about single samples (missing
+values, values unkown to a split, etc) are logged in the DEBUG level, progress messages in the INFO
+level and problems which do not stop the program in the WARNING level. Messages about single
+samples are also counted per attribute, and the counts are reported with `report_counts` once per
+fold or trial. In quiet mode only warnings and these reports are shown, so the per-sample messages
+don't even need to be formatted.
+"""
+
+import collections
+import logging
+import sys
+
+
+#: Name of the logger shared by all modules.
+LOGGER_NAME = 'dissertation'
+#: Minimum level of the messages shown in quiet mode.
+QUIET_LEVEL = logging.WARNING
+
+#: Logger shared by all modules.
+LOGGER = logging.getLogger(LOGGER_NAME)
+
+# _COUNTS[event_name][attrib_index] = number of times the event happened since the last report.
+_COUNTS = collections.OrderedDict()
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Handler writing to the current `sys.stdout`, so that redirecting the standard output also
+    redirects the log messages.
+    """
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _init_logger():
+    handler = _StdoutHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(logging.DEBUG)
+    LOGGER.propagate = False
+
+
+def set_level(level):
+    """Sets the minimum level of the messages shown. Defaults to `logging.DEBUG`."""
+    LOGGER.setLevel(level)
+
+
+def get_level():
+    """Returns the minimum level of the messages shown."""
+    return LOGGER.level
+
+
+def set_quiet(quiet):
+    """Sets quiet mode on or off. In quiet mode, only warnings and the counts reported by
+    `report_counts` are shown.
+    """
+    if quiet:
+        LOGGER.setLevel(QUIET_LEVEL)
+    else:
+        LOGGER.setLevel(logging.DEBUG)
+
+
+def is_verbose():
+    """Indicates wether messages about single samples (DEBUG level) are shown. When they aren't,
+    callers should only count them (see `count_events`), without formatting the messages.
+    """
+    return LOGGER.isEnabledFor(logging.DEBUG)
+
+
+def debug(message):
+    """Logs a message about a single sample."""
+    LOGGER.debug(message)
+
+
+def info(message=''):
+    """Logs a progress message."""
+    LOGGER.info(message)
+
+
+def warning(message):
+    """Logs a message about a problem which does not stop the program."""
+    LOGGER.warning(message)
+
+
+def count_events(event_name, attrib_indices):
+    """Counts one occurrence of the event `event_name` for each attribute index in
+    `attrib_indices` (which may contain `None` for events not related to an attribute).
+    """
+    if event_name not in _COUNTS:
+        _COUNTS[event_name] = collections.Counter()
+    _COUNTS[event_name].update(attrib_indices)
+
+
+def report_counts(title):
+    """Logs, in the WARNING level, the events counted since the last report, and resets the counts.
+    Nothing is logged if no event happened.
+    """
+    events_counts = [(event_name, event_counts)
+                     for event_name, event_counts in _COUNTS.items() if event_counts]
+    _COUNTS.clear()
+    if not events_counts:
+        return
+    lines = ['{}:'.format(title)]
+    for event_name, event_counts in events_counts:
+        attrib_counts = ', '.join(
+            'attrib #{}: {}'.format(attrib_index, num_events)
+            for attrib_index, num_events in sorted(
+                item for item in event_counts.items() if item[0] is not None))
+        if attrib_counts:
+            lines.append('\t{}: {} ({})'.format(event_name,
+                                               sum(event_counts.values()),
+                                               attrib_counts))
+        else:
+            lines.append('\t{}: {}'.format(event_name, sum(event_counts.values())))
+    LOGGER.warning('\n'.join(lines))
+
+
+_init_logger()
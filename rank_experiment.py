@@ -16,6 +16,7 @@ import timeit
 import criteria
 import dataset
 import decision_tree
+import logger
 
 import numpy as np
 from sklearn.model_selection import StratifiedKFold, KFold
@@ -52,6 +53,11 @@ def main(experiment_config):
         else:
             starting_seed = experiment_config["starting seed index"]
 
+        if "num processes to load datasets" not in experiment_config:
+            num_processes_to_load_datasets = None
+        else:
+            num_processes_to_load_datasets = experiment_config["num processes to load datasets"]
+
         if experiment_config["use enough depth"]:
             experiment_config["max depth"] = None
 
@@ -91,9 +97,9 @@ def main(experiment_config):
                                                dataset_config["missing value string"],
                                                experiment_config["use numeric attributes"])
                 for criterion in criteria_list:
-                    print('-'*100)
-                    print(criterion.name)
-                    print()
+                    logger.info('-'*100)
+                    logger.info(criterion.name)
+                    logger.info()
                     run(dataset_config["dataset name"],
                         curr_dataset,
                         criterion,
@@ -110,15 +116,16 @@ def main(experiment_config):
                         output_split_char=',')
         else:
             datasets = dataset.load_all_datasets(datasets_configs,
-                                                 experiment_config["use numeric attributes"])
+                                                 experiment_config["use numeric attributes"],
+                                                 num_processes_to_load_datasets)
             for ((dataset_name, curr_dataset),
                  min_num_samples_allowed) in itertools.product(
                      datasets,
                      experiment_config["prunning parameters"]["min num samples allowed"]):
                 for criterion in criteria_list:
-                    print('-'*100)
-                    print(criterion.name)
-                    print()
+                    logger.info('-'*100)
+                    logger.info(criterion.name)
+                    logger.info()
                     run(dataset_name,
                         curr_dataset,
                         criterion,
@@ -221,7 +228,7 @@ def run(dataset_name, curr_dataset, criterion, min_num_samples_allowed, max_dept
                   max_p_value_chi_sq, num_samples, original_valid_nominal_attributes,
                   original_valid_numeric_attributes, training_samples_indices,
                   validation_sample_indices, output_file_descriptor, output_split_char=','):
-        print('\nFold #{}'.format(fold_number + 1))
+        logger.info('\nFold #{}'.format(fold_number + 1))
         print_information_per_attrib = {} # ...[attrib_index] = print_information
         accuracy_criterion_value = [] # ...[...] = (accuracy_with_missing_values, criterion_value)
         tree = decision_tree.DecisionTree(criterion)
@@ -235,8 +242,8 @@ def run(dataset_name, curr_dataset, criterion, min_num_samples_allowed, max_dept
                 continue
 
             # Let's pretend only the current attribute is valid.
-            print()
-            print('Current attribute: {} ({})'.format(
+            logger.info()
+            logger.info('Current attribute: {} ({})'.format(
                 curr_dataset.attrib_names[attrib_index], attrib_index))
             curr_dataset.valid_nominal_attribute = [False] * num_attributes
             curr_dataset.valid_nominal_attribute[attrib_index] = is_valid_nominal_attrib
@@ -339,6 +346,7 @@ def run(dataset_name, curr_dataset, criterion, min_num_samples_allowed, max_dept
                       *print_information_per_attrib[attrib_index],
                       output_file_descriptor,
                       output_split_char)
+        logger.report_counts('Fold #{}'.format(fold_number + 1))
 
 
     if seed is not None:
@@ -354,10 +362,10 @@ def run(dataset_name, curr_dataset, criterion, min_num_samples_allowed, max_dept
     sample_indices_and_classes = list(enumerate(curr_dataset.sample_class))
     num_samples = len(sample_indices_and_classes)
     for trial_number in range(num_trials):
-        print('*'*80)
-        print('STARTING TRIAL #{} USING SEED #{}'.format(
+        logger.info('*'*80)
+        logger.info('STARTING TRIAL #{} USING SEED #{}'.format(
             trial_number + 1, starting_seed + trial_number))
-        print()
+        logger.info()
 
         if seed is None:
             random.seed(RANDOM_SEEDS[trial_number + starting_seed - 1])
@@ -10,7 +10,10 @@ import os
 import shutil
 import sys
 
+import criteria
 import cross_validation_experiment
+import decision_tree
+import logger
 import rank_experiment
 import train_and_test_experiment
 import t_student
@@ -43,6 +46,115 @@ def main(experiment_config_filepath):
     else:
         os.makedirs(experiment_config["output folder"])
 
+    # Quiet mode
+    if "quiet mode" not in experiment_config:
+        logger.set_quiet(False)
+    else:
+        logger.set_quiet(experiment_config["quiet mode"])
+
+    # Tree growth order
+    if "tree growth order" not in experiment_config:
+        decision_tree.TREE_GROWTH_ORDER = 'depth-first'
+    elif experiment_config["tree growth order"] in ('depth-first', 'level-wise', 'best-first'):
+        decision_tree.TREE_GROWTH_ORDER = experiment_config["tree growth order"]
+    else:
+        print('"tree growth order" must be either "depth-first", "level-wise" or "best-first".')
+        print('Please change the configurarion file and try again.')
+        sys.exit(1)
+
+    # Best-first growth
+    if "best-first priority" not in experiment_config:
+        decision_tree.BEST_FIRST_PRIORITY = 'num samples'
+    elif experiment_config["best-first priority"] in ('num samples', 'impurity gain'):
+        decision_tree.BEST_FIRST_PRIORITY = experiment_config["best-first priority"]
+    else:
+        print('"best-first priority" must be either "num samples" or "impurity gain".')
+        print('Please change the configurarion file and try again.')
+        sys.exit(1)
+    if "max leaves" not in experiment_config:
+        decision_tree.MAX_LEAVES = None
+    else:
+        decision_tree.MAX_LEAVES = experiment_config["max leaves"]
+    if "max nodes" not in experiment_config:
+        decision_tree.MAX_NODES = None
+    else:
+        decision_tree.MAX_NODES = experiment_config["max nodes"]
+    if "training time budget in seconds" not in experiment_config:
+        decision_tree.TRAINING_TIME_BUDGET = None
+    else:
+        decision_tree.TRAINING_TIME_BUDGET = experiment_config["training time budget in seconds"]
+
+    # Parallel subtrees
+    if "parallel subtrees min samples" not in experiment_config:
+        decision_tree.PARALLEL_SUBTREES_MIN_SAMPLES = None
+    else:
+        decision_tree.PARALLEL_SUBTREES_MIN_SAMPLES = experiment_config[
+            "parallel subtrees min samples"]
+    if "num processes for subtrees" not in experiment_config:
+        decision_tree.PARALLEL_SUBTREES_NUM_PROCESSES = None
+    else:
+        decision_tree.PARALLEL_SUBTREES_NUM_PROCESSES = experiment_config[
+            "num processes for subtrees"]
+
+    # Concurrent evaluation of attributes
+    if "attributes executor" not in experiment_config:
+        criteria.ATTRIBUTES_EXECUTOR = None
+    elif experiment_config["attributes executor"] in (None, 'thread'):
+        criteria.ATTRIBUTES_EXECUTOR = experiment_config["attributes executor"]
+    else:
+        print('"attributes executor" must be either null or "thread".')
+        print('Please change the configurarion file and try again.')
+        sys.exit(1)
+    if "attributes executor num workers" not in experiment_config:
+        criteria.ATTRIBUTES_EXECUTOR_NUM_WORKERS = None
+    else:
+        criteria.ATTRIBUTES_EXECUTOR_NUM_WORKERS = experiment_config[
+            "attributes executor num workers"]
+
+    # SDP solver used by the GW criteria
+    if "sdp solver" not in experiment_config:
+        criteria.SDP_SOLVER = 'cvxpy'
+    elif experiment_config["sdp solver"] in ('cvxpy', 'low-rank'):
+        criteria.SDP_SOLVER = experiment_config["sdp solver"]
+    else:
+        print('"sdp solver" must be either "cvxpy" or "low-rank".')
+        print('Please change the configurarion file and try again.')
+        sys.exit(1)
+    if "sdp solver per criterion" not in experiment_config:
+        criteria.SDP_SOLVER_PER_CRITERION = {}
+    elif all(sdp_solver in ('cvxpy', 'low-rank')
+             for sdp_solver in experiment_config["sdp solver per criterion"].values()):
+        criteria.SDP_SOLVER_PER_CRITERION = experiment_config["sdp solver per criterion"]
+    else:
+        print('"sdp solver per criterion" values must be either "cvxpy" or "low-rank".')
+        print('Please change the configurarion file and try again.')
+        sys.exit(1)
+    if "sdp solver eps" not in experiment_config:
+        criteria.SDP_SOLVER_EPS = None
+    else:
+        criteria.SDP_SOLVER_EPS = experiment_config["sdp solver eps"]
+    if "sdp solver max iters" not in experiment_config:
+        criteria.SDP_SOLVER_MAX_ITERS = None
+    else:
+        criteria.SDP_SOLVER_MAX_ITERS = experiment_config["sdp solver max iters"]
+    if "sdp solver time limit in seconds" not in experiment_config:
+        criteria.SDP_SOLVER_TIME_LIMIT = None
+    else:
+        criteria.SDP_SOLVER_TIME_LIMIT = experiment_config["sdp solver time limit in seconds"]
+
+    # Memory-lean training
+    if "memory lean training" not in experiment_config:
+        decision_tree.MEMORY_LEAN_TRAINING = False
+    else:
+        decision_tree.MEMORY_LEAN_TRAINING = experiment_config["memory lean training"]
+
+    # Memory budget for training
+    if "training memory budget in MB" not in experiment_config:
+        decision_tree.TRAINING_MEMORY_BUDGET = None
+    else:
+        decision_tree.TRAINING_MEMORY_BUDGET = int(
+            experiment_config["training memory budget in MB"] * 2**20)
+
     # Copy experiment config file to output folder.
     try:
         shutil.copyfile(experiment_config_filepath,
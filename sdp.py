@@ -0,0 +1,187 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Module used to solve the Semidefinite Relaxation of the Max Cut problem, as given by Goemans and
+Williamson, 1995.
+'''
+
+import math
+import threading
+import time
+
+import numpy as np
+
+
+# Default tolerance and maximum number of sweeps used by `solve_max_cut_low_rank`.
+_LOW_RANK_EPS = 1e-6
+_LOW_RANK_MAX_ITERS = 1000
+# Seed of the starting factor used by `solve_max_cut_low_rank`, so its results are deterministic and
+# don't change the global random state.
+_LOW_RANK_SEED = 0
+
+# Compiled problems, one per number of vertices, as {num_vertices: (problem, weights, var)}. Each
+# thread has its own cache, since the weights parameter is changed before every solve.
+_PROBLEMS_CACHE = threading.local()
+
+
+def _get_problem(num_vertices):
+    # cvxpy is heavy to import, so it is only imported when first needed.
+    import cvxpy as cvx
+    try:
+        problems = _PROBLEMS_CACHE.problems
+    except AttributeError:
+        problems = {}
+        _PROBLEMS_CACHE.problems = problems
+    if num_vertices not in problems:
+        weights = cvx.Parameter((num_vertices, num_vertices))
+        var = cvx.Variable((num_vertices, num_vertices), PSD=True)
+        obj = cvx.Minimize(0.25 * cvx.trace(weights.T @ var))
+        constraints = [cvx.diag(var) == 1]
+        problems[num_vertices] = (cvx.Problem(obj, constraints), weights, var)
+    return problems[num_vertices]
+
+
+def solve_max_cut_sdp(weights, eps=None, max_iters=None, time_limit=None):
+    """
+    Solves the Semidefinite Relaxation of the Max Cut problem using SCS.
+
+    The problem is built and compiled only once for each number of vertices. Later calls only
+    change the value of the weights parameter. Only the compilation is reused: the solver never
+    starts from the previous solution, so the result doesn't depend on which problems were solved
+    before it.
+
+    Parameters
+    ----------
+    weights : np.ndarray
+        Square matrix with the weight of each edge.
+    eps : float
+        Absolute and relative tolerance of the solver. When `None`, uses the solver's default.
+    max_iters : int
+        Maximum number of iterations of the solver. When `None`, uses the solver's default.
+    time_limit : float
+        Maximum time, in seconds, spent by the solver. When `None`, uses the solver's default.
+
+    Returns
+    -------
+    var : np.ndarray
+        Solution of the relaxation, a positive semidefinite matrix with unit diagonal.
+    """
+    problem, weights_param, var = _get_problem(weights.shape[0])
+    weights_param.value = weights
+    solver_options = {}
+    if eps is not None:
+        solver_options['eps_abs'] = eps
+        solver_options['eps_rel'] = eps
+    if max_iters is not None:
+        solver_options['max_iters'] = max_iters
+    if time_limit is not None:
+        solver_options['time_limit_secs'] = time_limit
+    problem.solve(solver='SCS', warm_start=False, verbose=False, **solver_options)
+    return var.value
+
+
+def solve_max_cut_low_rank(weights, eps=None, max_iters=None, time_limit=None, rank=None):
+    """
+    Solves the Semidefinite Relaxation of the Max Cut problem on a low-rank factor, as given by
+    Burer and Monteiro, 2003, using block coordinate descent on the unit vectors of the vertices.
+
+    Each vertex's vector is, in turn, set to the unit vector minimizing the objective with the
+    others fixed. The rank given by Barvinok and Pataki is large enough to contain an optimal
+    solution. After each sweep over the vertices, the norms of the vectors' gradients give a dual
+    solution, whose value bounds how far the objective is from the optimum. The solver stops once
+    this duality gap is small enough, since a small decrease of the objective in a sweep doesn't
+    mean it is close to the optimum.
+
+    Parameters
+    ----------
+    weights : np.ndarray
+        Square matrix with the weight of each edge.
+    eps : float
+        Duality gap, relative to the objective, below which the solver stops. When `None`, uses
+        `1e-6`.
+    max_iters : int
+        Maximum number of sweeps over the vertices. When `None`, uses `1000`.
+    time_limit : float
+        Maximum time, in seconds, spent by the solver. When `None`, there is no limit.
+    rank : int
+        Number of rows of the factor. When `None`, uses `ceil(sqrt(2 * num_vertices)) + 1`,
+        limited to the number of vertices.
+
+    Returns
+    -------
+    factor : np.ndarray
+        Matrix with one unit column per vertex, such that `np.dot(factor.T, factor)` is the
+        solution of the relaxation.
+    """
+    if eps is None:
+        eps = _LOW_RANK_EPS
+    if max_iters is None:
+        max_iters = _LOW_RANK_MAX_ITERS
+    num_vertices = weights.shape[0]
+    if rank is None:
+        rank = min(num_vertices, int(math.ceil(math.sqrt(2 * num_vertices))) + 1)
+
+    # The diagonal only adds a constant to the objective, since every vector has unit norm.
+    sym_weights = 0.5 * (np.asarray(weights, dtype=np.float64)
+                         + np.asarray(weights, dtype=np.float64).T)
+    np.fill_diagonal(sym_weights, 0.0)
+
+    factor = np.random.RandomState(_LOW_RANK_SEED).randn(rank, num_vertices)
+    factor /= np.linalg.norm(factor, axis=0)
+
+    start_time = time.time()
+    for _ in range(max_iters):
+        for vertex in range(num_vertices):
+            gradient = np.dot(factor, sym_weights[:, vertex])
+            gradient_norm = np.linalg.norm(gradient)
+            if gradient_norm > 0.0:
+                factor[:, vertex] = -gradient / gradient_norm
+        # For every feasible solution X of the relaxation and D = diag(gradients_norms), we have
+        # <W, X> = <W + D, X> - trace(D) >= num_vertices * min(0, lambda_min(W + D)) - trace(D).
+        gradients = np.dot(factor, sym_weights)
+        gradients_norms = np.linalg.norm(gradients, axis=0)
+        obj_value = np.sum(factor * gradients)
+        min_eigenvalue = np.linalg.eigvalsh(sym_weights + np.diag(gradients_norms))[0]
+        lower_bound = num_vertices * min(0.0, min_eigenvalue) - np.sum(gradients_norms)
+        if obj_value - lower_bound <= eps * max(1.0, abs(obj_value)):
+            break
+        if time_limit is not None and time.time() - start_time >= time_limit:
+            break
+    return factor
+
+
+def test(cut_rel_tol=1e-4):
+    """Checks that `solve_max_cut_low_rank` returns unit vectors and that its relaxation's cut is at
+    most `cut_rel_tol` (relative) below the one of `solve_max_cut_sdp`. Besides random weights, uses
+    almost uniform ones, as GW Squared Gini's, on which the coordinate descent converges slowly.
+    """
+    random_state = np.random.RandomState(1)
+    # Weights given by GW Squared Gini to an attribute of the cars dataset.
+    weights_list = [np.array([[0, 11940, 13030, 12006],
+                              [11940, 0, 13503, 12525],
+                              [13030, 13503, 0, 13659],
+                              [12006, 12525, 13659, 0]], dtype=float)]
+    for num_vertices in (2, 5, 10, 20, 40):
+        for min_weight in (0, 10000):
+            weights = random_state.randint(min_weight,
+                                           min_weight + 1000,
+                                           size=(num_vertices, num_vertices)).astype(float)
+            weights = weights + weights.T
+            np.fill_diagonal(weights, 0.0)
+            weights_list.append(weights)
+
+    print('-' * 80)
+    print('TESTING solve_max_cut_low_rank')
+    for weights in weights_list:
+        sdp_cut = 0.25 * np.sum(weights * (1.0 - solve_max_cut_sdp(weights)))
+        factor = solve_max_cut_low_rank(weights)
+        low_rank_cut = 0.25 * np.sum(weights * (1.0 - np.dot(factor.T, factor)))
+        print('num_vertices:', weights.shape[0])
+        print('cvxpy relaxation cut:', sdp_cut)
+        print('low-rank relaxation cut:', low_rank_cut)
+        assert np.allclose(np.linalg.norm(factor, axis=0), 1.0)
+        assert low_rank_cut >= sdp_cut - cut_rel_tol * abs(sdp_cut)
+    print('OK')
+
+if __name__ == '__main__':
+    test()
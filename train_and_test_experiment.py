@@ -15,6 +15,7 @@ import timeit
 import criteria
 import dataset
 import decision_tree
+import logger
 
 import numpy as np
 
@@ -53,6 +54,11 @@ def main(experiment_config):
         else:
             starting_seed = experiment_config["starting seed index"]
 
+        if "num processes to load datasets" not in experiment_config:
+            num_processes_to_load_datasets = None
+        else:
+            num_processes_to_load_datasets = experiment_config["num processes to load datasets"]
+
         if experiment_config["prunning parameters"]["use chi-sq test"]:
             max_p_value_chi_sq = experiment_config["prunning parameters"]["max chi-sq p-value"]
             decision_tree.MIN_SAMPLES_IN_SECOND_MOST_FREQUENT_VALUE = experiment_config[
@@ -79,15 +85,16 @@ def main(experiment_config):
                                 for folderpath in datasets_folders]
         if experiment_config["load one dataset at a time"]:
             datasets = dataset.load_all_datasets(datasets_configs,
-                                                 experiment_config["use numeric attributes"])
+                                                 experiment_config["use numeric attributes"],
+                                                 num_processes_to_load_datasets)
             for ((dataset_name, curr_dataset),
                  min_num_samples_allowed) in itertools.product(
                      datasets,
                      experiment_config["prunning parameters"]["min num samples allowed"]):
                 for criterion in criteria_list:
-                    print('-'*100)
-                    print(criterion.name)
-                    print()
+                    logger.info('-'*100)
+                    logger.info(criterion.name)
+                    logger.info()
                     run(dataset_name,
                         curr_dataset,
                         experiment_config["num training samples"],
@@ -113,9 +120,9 @@ def main(experiment_config):
                                                dataset_config["missing value string"],
                                                experiment_config["use numeric attributes"])
                 for criterion in criteria_list:
-                    print('-'*100)
-                    print(criterion.name)
-                    print()
+                    logger.info('-'*100)
+                    logger.info(criterion.name)
+                    logger.info()
                     run(dataset_config["dataset name"],
                         curr_dataset,
                         experiment_config["num training samples"],
@@ -208,10 +215,10 @@ def run(dataset_name, train_dataset, num_training_samples, criterion, min_num_sa
 
     training_samples_indices = list(range(train_dataset.num_samples))
     for trial_number in range(num_trials):
-        print('*'*80)
-        print('STARTING TRIAL #{} USING SEED #{}'.format(
+        logger.info('*'*80)
+        logger.info('STARTING TRIAL #{} USING SEED #{}'.format(
             trial_number + 1, starting_seed + trial_number))
-        print()
+        logger.info()
 
         if seed is None:
             random.seed(RANDOM_SEEDS[trial_number + starting_seed - 1])
@@ -237,9 +244,9 @@ def run(dataset_name, train_dataset, num_training_samples, criterion, min_num_sa
                or sum(tree.get_root_node().valid_nominal_attribute) == 0):
             num_random_tries += 1
             if num_random_tries == MAX_RANDOM_TRIES:
-                print('Already did {} random generation, none worked (only one class or no valid'
-                      ' attribute).'.format(MAX_RANDOM_TRIES))
-                print('Will skip to the next test.')
+                logger.warning('Already did {} random generation, none worked (only one class or no'
+                               ' valid attribute).\nWill skip to the next test.'.format(
+                                   MAX_RANDOM_TRIES))
                 return None
 
             random.shuffle(training_samples_indices)
@@ -271,6 +278,7 @@ def run(dataset_name, train_dataset, num_training_samples, criterion, min_num_sa
          _,
          num_unkown,
          _) = tree.test(curr_test_samples_indices)
+        logger.report_counts('Trial #{}'.format(trial_number + 1))
 
         accuracy_with_missing_values = (100.0 * num_correct_classifications_w_unkown
                                         / len(curr_test_samples_indices))